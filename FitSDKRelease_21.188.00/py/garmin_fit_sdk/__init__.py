@@ -16,10 +16,12 @@ from garmin_fit_sdk.accumulator import Accumulator
 from garmin_fit_sdk.bitstream import BitStream
 from garmin_fit_sdk.crc_calculator import CrcCalculator
 from garmin_fit_sdk.decoder import Decoder
+from garmin_fit_sdk.enum_tables import FitEnum
 from garmin_fit_sdk.fit import BASE_TYPE, BASE_TYPE_DEFINITIONS
 from garmin_fit_sdk.hr_mesg_utils import expand_heart_rates
-from garmin_fit_sdk.profile import Profile
-from garmin_fit_sdk.stream import Stream
+from garmin_fit_sdk.message_columns import MessageColumns
+from garmin_fit_sdk.lazy_profile import LazyProfile, Profile
+from garmin_fit_sdk.stream import BufferStream, Stream
 from garmin_fit_sdk.util import FIT_EPOCH_S, convert_timestamp_to_datetime
 
 __version__ = '21.188.0'
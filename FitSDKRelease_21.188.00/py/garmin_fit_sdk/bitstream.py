@@ -72,9 +72,22 @@ class BitStream:
     def read_bits(self, number_bits_to_read):
         '''Reads the specificed number of bits if possible.'''
         value = 0
-
-        for i in range(number_bits_to_read):
-            value |= self.read_bit() << i
+        bits_read = 0
+
+        # Take as many bits as possible from the current position at once instead of one bit at a time
+        while bits_read < number_bits_to_read:
+            if self.has_bits_available() is False:
+                self.__raise_error()
+
+            if self._current_bit >= self._bits_per_position:
+                self.__next_byte()
+
+            count = min(number_bits_to_read - bits_read, self._bits_per_position - self._current_bit)
+            value |= (self._current_byte & ((1 << count) - 1)) << bits_read
+            self._current_byte = (self._current_byte >> count)
+            self._current_bit += count
+            self._bits_available -= count
+            bits_read += count
 
         return value
 
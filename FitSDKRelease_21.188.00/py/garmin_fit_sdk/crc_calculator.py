@@ -12,10 +12,18 @@
 ############################################################################################
 
 
-_CRC_TABLE = [
-    0x0000, 0xCC01, 0xD801, 0x1400, 0xF001, 0x3C00, 0x2800, 0xE401,
-    0xA001, 0x6C00, 0x7800, 0xB401, 0x5000, 0x9C01, 0x8801, 0x4400
-]
+def _build_crc_table():
+    '''Builds the byte-wise lookup table for the CRC-16 (polynomial 0xA001) used by FIT files.'''
+    crc_table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 0x01 else crc >> 1
+        crc_table.append(crc)
+
+    return tuple(crc_table)
+
+_CRC_TABLE = _build_crc_table()
 
 
 class CrcCalculator:
@@ -29,26 +37,22 @@ class CrcCalculator:
         '''Returns the calculated CRC value.'''
         return self._crc
 
-    def __update_crc(self, value):
-        # compute checksum of lower four bits of byte
-        temp = _CRC_TABLE[self._crc & 0xF]
-        self._crc = (self._crc >> 4) & 0x0FFF
-        self._crc = self._crc ^ temp ^ _CRC_TABLE[value & 0xF]
+    def update(self, buffer):
+        '''Adds a whole chunk of bytes (bytes, bytearray or memoryview) for calculating the CRC.'''
+        crc = self._crc
+        crc_table = _CRC_TABLE
 
-        # compute checksum of upper four bits of byte
-        temp = _CRC_TABLE[self._crc & 0xF]
-        self._crc = (self._crc >> 4) & 0x0FFF
-        self._crc = self._crc ^ temp ^ _CRC_TABLE[(value >> 4) & 0xF]
+        for byte in buffer:
+            crc = (crc >> 8) ^ crc_table[(crc ^ byte) & 0xFF]
 
-        return self._crc
+        self._crc = crc
+        self._bytes_seen += len(buffer)
+
+        return crc
 
     def add_bytes(self, buffer, start, end):
         '''Adds another chunk of bytes for calculating the CRC.'''
-        for i in range(start, end):
-            self._crc = self.__update_crc(buffer[i])
-            self._bytes_seen += 1
-
-        return self._crc
+        return self.update(buffer[start:end])
 
     @staticmethod
     def calculate_crc(buffer, start: int, end: int):
@@ -12,25 +12,40 @@
 ############################################################################################
 
 
-import copy
+import struct
+from collections import deque
 
-from . import Accumulator, BitStream, CrcCalculator
+from . import Accumulator, CrcCalculator
 from . import fit as FIT
 from . import hr_mesg_utils, util
-from .profile import Profile
+from .enum_tables import convert_values, get_enum_table, get_name_table
+from .message_columns import MessageColumns
+from .lazy_profile import Profile
 from .stream import Endianness, Stream
 from enum import Enum
 
 _CRCSIZE = 2
 _COMPRESSED_HEADER_MASK = 0x80
+_COMPRESSED_LOCAL_MESG_NUM_MASK = 0x60
+_COMPRESSED_TIME_MASK = 0x1F
 _MESG_DEFINITION_MASK = 0x40
 _MESG_HEADER_MASK = 0x00
 _LOCAL_MESG_NUM_MASK = 0x0F
 _DEV_DATA_MASK = 0x20
 
+_TIMESTAMP_FIELD_ID = 253
+_INVALID_TIMESTAMP = 0xFFFFFFFF
+
 _HEADER_WITH_CRC_SIZE = 14
 _HEADER_WITHOUT_CRC_SIZE = 12
 
+_NO_REFERENCE_VALUE = object()
+
+_SINGLE_VALUE_FIELD = 0
+_ARRAY_FIELD = 1
+_BYTE_ARRAY_FIELD = 2
+_STRING_FIELD = 3
+
 DecodeMode = Enum('DecodeMode', ['NORMAL', 'SKIP_HEADER', 'DATA_ONLY'])
 
 class Decoder:
@@ -52,6 +67,8 @@ class Decoder:
         self._local_mesg_defs = {}
         self._developer_data_defs = {}
         self._messages = {}
+        self._num_field_descriptions = 0
+        self._last_timestamp = 0
         self._accumulator = Accumulator()
 
         self._fields_with_subfields = []
@@ -60,9 +77,11 @@ class Decoder:
         self._decode_mode = DecodeMode.NORMAL
 
         self._mesg_listener = None
+        self._columns = None
         self._apply_scale_and_offset = True
         self._convert_timestamps_to_datetimes = True
         self._convert_types_to_strings = True
+        self._convert_types_to_enums = False
         self._enable_crc_check = True
         self._expand_sub_fields = True
         self._expand_components = True
@@ -103,7 +122,8 @@ class Decoder:
             if file_header.header_size is _HEADER_WITH_CRC_SIZE and file_header.header_crc != CrcCalculator.calculate_crc(self._stream.slice(0, 12), 0, 12):
                 return False
 
-            file_crc = CrcCalculator.calculate_crc(self._stream.read_bytes(file_header.file_total_size),0, file_header.file_total_size)
+            # Buffer backed streams return a view, so the file is not copied to calculate its CRC
+            file_crc = CrcCalculator.calculate_crc(self._stream.read_view(file_header.file_total_size),0, file_header.file_total_size)
             crc_from_file = self._stream.read_byte() + (self._stream.read_byte() << 8)
             if crc_from_file != file_crc:
                 return False
@@ -121,39 +141,232 @@ class Decoder:
                 expand_components = True,
                 merge_heart_rates = True,
                 mesg_listener = None,
-                decode_mode = DecodeMode.NORMAL):
+                decode_mode = DecodeMode.NORMAL,
+                include_mesgs = None,
+                exclude_mesgs = None,
+                convert_types_to_enums = False):
         '''Reads the entire contents of the fit file and returns the decoded messages'''
+        self.__set_options(apply_scale_and_offset, convert_datetimes_to_dates, convert_types_to_strings,
+                           enable_crc_check, expand_sub_fields, expand_components, merge_heart_rates, decode_mode,
+                           include_mesgs, exclude_mesgs, convert_types_to_enums)
+        self._mesg_listener = mesg_listener
+
+        errors = []
+        try:
+            for mesg_def, message in self.__decode_messages():
+                # Append decoded message
+                self._messages[mesg_def['messages_key']].append(message)
+
+                if self._mesg_listener is not None:
+                    self._mesg_listener(mesg_def['global_mesg_num'], message)
+
+            if self._merge_heart_rates is True and 'hr_mesgs' in self._messages and 'record_mesgs' in self._messages:
+                hr_mesg_utils.merge_heart_rates(self._messages['hr_mesgs'], self._messages['record_mesgs'])
+
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception as error:
+            errors.append(error)
+
+        return self._messages, errors
+
+    def read_columnar(self, apply_scale_and_offset = True,
+                convert_datetimes_to_dates = False,
+                convert_types_to_strings = False,
+                enable_crc_check = True,
+                expand_sub_fields = True,
+                expand_components = True,
+                merge_heart_rates = True,
+                decode_mode = DecodeMode.NORMAL,
+                include_mesgs = None,
+                exclude_mesgs = None,
+                convert_types_to_enums = False,
+                convert_datetimes_to_datetime64 = False):
+        '''Reads the entire contents of the fit file and returns the decoded messages as columns per message type'''
+        # datetime64 columns are converted from the raw timestamps when the columns are exported
+        if convert_datetimes_to_datetime64 is True:
+            convert_datetimes_to_dates = False
+
+        self.__set_options(apply_scale_and_offset, convert_datetimes_to_dates, convert_types_to_strings,
+                           enable_crc_check, expand_sub_fields, expand_components, merge_heart_rates, decode_mode,
+                           include_mesgs, exclude_mesgs, convert_types_to_enums)
+        self._mesg_listener = None
+
+        # Most messages are written straight into the columns while they are decoded and come back as None
+        columns = self._columns = {}
+        datetime64_fields = {}
+        hr_mesgs = []
+
+        errors = []
+        try:
+            for mesg_def, message in self.__decode_messages():
+                messages_key = mesg_def['messages_key']
+                if convert_datetimes_to_datetime64 is True and messages_key not in datetime64_fields:
+                    datetime64_fields[messages_key] = self.__get_date_time_field_names(mesg_def['global_mesg_num'])
+
+                if message is None:
+                    continue
+
+                self.__get_message_columns(messages_key).append(message)
+
+                # HR messages are kept so they can be merged into the record columns
+                if self._merge_heart_rates is True and messages_key == 'hr_mesgs':
+                    hr_mesgs.append(message)
+
+            if self._merge_heart_rates is True and len(hr_mesgs) > 0 and 'record_mesgs' in columns:
+                self.__merge_heart_rate_columns(hr_mesgs, columns['record_mesgs'])
+
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception as error:
+            errors.append(error)
+        finally:
+            self._columns = None
+
+        return {messages_key: columns[messages_key].to_dict(datetime64_fields.get(messages_key, ()))
+                for messages_key in columns}, errors
+
+    def iter_messages(self, apply_scale_and_offset = True,
+                convert_datetimes_to_dates = True,
+                convert_types_to_strings = True,
+                enable_crc_check = True,
+                expand_sub_fields = True,
+                expand_components = True,
+                merge_heart_rates = True,
+                decode_mode = DecodeMode.NORMAL,
+                include_mesgs = None,
+                exclude_mesgs = None,
+                convert_types_to_enums = False):
+        '''Decodes the fit file one message at a time and yields (mesg_num, message) tuples in file order.
+
+        Decoded messages are not kept by the decoder. Errors are raised instead of being returned.
+        When merge_heart_rates is enabled a record is held back, along with the messages after it, until
+        its heart rate is known, which is when a later heart rate has been decoded or the stream ends.
+        '''
+        self.__set_options(apply_scale_and_offset, convert_datetimes_to_dates, convert_types_to_strings,
+                           enable_crc_check, expand_sub_fields, expand_components, merge_heart_rates, decode_mode,
+                           include_mesgs, exclude_mesgs, convert_types_to_enums)
+        self._mesg_listener = None
+
+        if self._merge_heart_rates is False:
+            for mesg_def, message in self.__decode_messages():
+                yield mesg_def['global_mesg_num'], message
+            return
+
+        heart_rate_merger = hr_mesg_utils.HeartRateMerger()
+        held_back_mesgs = deque()
+        num_held_back_records = 0
+
+        for mesg_def, message in self.__decode_messages():
+            messages_key = mesg_def['messages_key']
+            if messages_key == 'record_mesgs':
+                heart_rate_merger.add_record_mesg(message)
+                num_held_back_records += 1
+            elif messages_key == 'hr_mesgs':
+                heart_rate_merger.add_hr_mesg(message)
+
+            if num_held_back_records == 0:
+                yield mesg_def['global_mesg_num'], message
+                continue
+
+            held_back_mesgs.append((mesg_def['global_mesg_num'], messages_key, message))
+            num_held_back_records = yield from self.__yield_merged_mesgs(held_back_mesgs, num_held_back_records,
+                                                                         heart_rate_merger.get_num_pending_records())
+
+        heart_rate_merger.finish()
+        yield from self.__yield_merged_mesgs(held_back_mesgs, num_held_back_records, 0)
+
+    @staticmethod
+    def __yield_merged_mesgs(held_back_mesgs, num_held_back_records, num_pending_records):
+        '''Yields the held back messages up to the first record which has not been merged, and returns the number of records still held back.'''
+        while len(held_back_mesgs) > 0:
+            mesg_num, messages_key, message = held_back_mesgs[0]
+            if messages_key == 'record_mesgs':
+                if num_held_back_records == num_pending_records:
+                    break
+                num_held_back_records -= 1
+
+            held_back_mesgs.popleft()
+            yield mesg_num, message
+
+        return num_held_back_records
+
+    @staticmethod
+    def __get_date_time_field_names(global_mesg_num):
+        fields = Profile['messages'][global_mesg_num]['fields'] if global_mesg_num in Profile['messages'] else {}
+        return {field['name'] for field in fields.values() if field['type'] == 'date_time'}
+
+    def __set_options(self, apply_scale_and_offset, convert_datetimes_to_dates, convert_types_to_strings,
+                      enable_crc_check, expand_sub_fields, expand_components, merge_heart_rates, decode_mode,
+                      include_mesgs, exclude_mesgs, convert_types_to_enums):
         self._apply_scale_and_offset = apply_scale_and_offset
         self._convert_timestamps_to_datetimes = convert_datetimes_to_dates
         self._convert_types_to_strings = convert_types_to_strings
+        self._convert_types_to_enums = convert_types_to_enums
         self._enable_crc_check = enable_crc_check
         self._expand_sub_fields = expand_sub_fields
         self._expand_components = expand_components
         self._merge_heart_rates = merge_heart_rates
-        self._mesg_listener = mesg_listener
         self._decode_mode = decode_mode
+        self._include_mesgs = include_mesgs
+        self._exclude_mesgs = exclude_mesgs
 
         self._local_mesg_defs = {}
         self._developer_data_defs = {}
         self._messages = {}
+        self._num_field_descriptions = 0
+        self._columns = None
 
-        errors = []
-        try:
-            if self._merge_heart_rates and (not self._apply_scale_and_offset or not self._expand_components):
-                self.__raise_error("merge_heart_rates requires both apply_scale_and_offset and expand_components to be enabled!")
+    def __decode_messages(self):
+        if self._merge_heart_rates and (not self._apply_scale_and_offset or not self._expand_components):
+            self.__raise_error("merge_heart_rates requires both apply_scale_and_offset and expand_components to be enabled!")
 
-            while self._stream.position() < self._stream.get_length():
-                self.__decode_next_file()
+        self._include_mesg_nums = self.__lookup_mesg_nums(self._include_mesgs)
+        self._exclude_mesg_nums = self.__lookup_mesg_nums(self._exclude_mesgs)
 
-            if self._merge_heart_rates is True and 'hr_mesgs' in self._messages:
-                hr_mesg_utils.merge_heart_rates(self._messages['hr_mesgs'], self._messages['record_mesgs'])
+        while self._stream.position() < self._stream.get_length():
+            yield from self.__decode_next_file()
 
-        except (KeyboardInterrupt, SystemExit):
-            raise
-        except Exception as error:
-            errors.append(error)
+    def __lookup_mesg_nums(self, mesgs):
+        if mesgs is None:
+            return None
 
-        return self._messages, errors
+        mesg_nums = set()
+        for mesg in mesgs:
+            if isinstance(mesg, int):
+                mesg_nums.add(mesg)
+            elif str(mesg).upper() in Profile['mesg_num']:
+                mesg_nums.add(Profile['mesg_num'][str(mesg).upper()])
+            else:
+                self.__raise_error("Unknown message name " + str(mesg))
+
+        return mesg_nums
+
+    def __is_mesg_skipped(self, global_mesg_num):
+        # Developer data definitions are always decoded since other messages depend on them
+        if global_mesg_num == Profile['mesg_num']['DEVELOPER_DATA_ID'] or global_mesg_num == Profile['mesg_num']['FIELD_DESCRIPTION']:
+            return False
+
+        if self._include_mesg_nums is not None and global_mesg_num not in self._include_mesg_nums:
+            return True
+
+        return self._exclude_mesg_nums is not None and global_mesg_num in self._exclude_mesg_nums
+
+    def __get_message_columns(self, messages_key):
+        message_columns = self._columns.get(messages_key)
+        if message_columns is None:
+            message_columns = self._columns[messages_key] = MessageColumns()
+
+        return message_columns
+
+    def __merge_heart_rate_columns(self, hr_mesgs, record_columns):
+        records = [{'timestamp': record_columns.get_value(row, 'timestamp')} for row in range(record_columns.get_num_rows())]
+
+        hr_mesg_utils.merge_heart_rates(hr_mesgs, records)
+
+        for row, record in enumerate(records):
+            if 'heart_rate' in record:
+                record_columns.set_value(row, 'heart_rate', record['heart_rate'])
 
     def __decode_next_file(self):
         position = self._stream.position()
@@ -164,11 +377,15 @@ class Decoder:
         crc_calculator = CrcCalculator() if self._enable_crc_check is True else None
         self._stream.set_crc_calculator(crc_calculator)
 
+        self._last_timestamp = 0
+
         file_header = self.read_file_header(False, decode_mode=self._decode_mode)
 
         # Read data definitions and messages
         while self._stream.position() < (position + file_header.header_size + file_header.data_size):
-            self.__decode_next_record()
+            decoded_message = self.__decode_next_record()
+            if decoded_message is not None:
+                yield decoded_message
 
 
         self._stream.set_crc_calculator(None)
@@ -182,15 +399,18 @@ class Decoder:
     def __decode_next_record(self):
         record_header = self._stream.peek_byte()
 
+        # Compressed timestamp headers use bit 6 for the local message number, so they are checked first
         if record_header & _COMPRESSED_HEADER_MASK == _COMPRESSED_HEADER_MASK:
-            self.__decode_compressed_timestamp_message()
+            return self.__decode_message()
 
-        if record_header & _MESG_DEFINITION_MASK == _MESG_HEADER_MASK:
-            self.__decode_message()
+        elif record_header & _MESG_DEFINITION_MASK == _MESG_HEADER_MASK:
+            return self.__decode_message()
 
-        if record_header & _MESG_DEFINITION_MASK == _MESG_DEFINITION_MASK:
+        elif record_header & _MESG_DEFINITION_MASK == _MESG_DEFINITION_MASK:
             self.__decode_mesg_def()
 
+        return None
+
     def __decode_mesg_def(self):
         record_header = self._stream.read_byte()
 
@@ -212,6 +432,7 @@ class Decoder:
         mesg_def["developer_field_defs"] = []
         mesg_def["message_size"] = 0
         mesg_def["developer_data_size"] = 0
+        mesg_def["timestamp_struct"] = None
 
         for i in range(mesg_def["num_fields"]):
             field_definition = {
@@ -229,6 +450,11 @@ class Decoder:
             num_field_elements = int(field_definition["size"] / FIT.BASE_TYPE_DEFINITIONS[field_definition["base_type"]]["size"])
             field_definition["num_field_elements"] = num_field_elements
 
+            # Remember where the timestamp is so it can be tracked for compressed timestamp headers
+            if field_definition["field_id"] == _TIMESTAMP_FIELD_ID and field_definition["base_type"] == FIT.BASE_TYPE['UINT32'] \
+                    and num_field_elements == 1:
+                mesg_def["timestamp_struct"] = struct.Struct(mesg_def["struct_format_string"][0] + str(mesg_def["message_size"]) + "xI")
+
             struct_format_string += str(num_field_elements) if num_field_elements > 1 else ''
             struct_format_string += FIT.BASE_TYPE_DEFINITIONS[field_definition["base_type"]]["type_code"]
 
@@ -262,8 +488,17 @@ class Decoder:
 
         #TODO add option for unknown data
 
+        # Unwanted message types keep only their sizes so their payloads can be skipped
+        if self.__is_mesg_skipped(mesg_def["global_mesg_num"]):
+            mesg_def["is_skipped"] = True
+            self._local_mesg_defs[mesg_def["local_mesg_num"]] = mesg_def
+            return
+
         # Add the profile to the local message definition
-        self._local_mesg_defs[mesg_def["local_mesg_num"]] = {**mesg_def, **message_profile}
+        local_mesg_def = {**mesg_def, **message_profile}
+        local_mesg_def["is_skipped"] = False
+        self.__build_decode_plan(local_mesg_def)
+        self._local_mesg_defs[mesg_def["local_mesg_num"]] = local_mesg_def
 
         messages_key = message_profile['messages_key'] if 'messages_key' in message_profile else None
         if message_profile is not None and messages_key not in self._messages:
@@ -272,13 +507,25 @@ class Decoder:
     def __decode_message(self):
         record_header = self._stream.read_byte()
 
-        local_mesg_num = record_header & _LOCAL_MESG_NUM_MASK
+        if record_header & _COMPRESSED_HEADER_MASK == _COMPRESSED_HEADER_MASK:
+            local_mesg_num = (record_header & _COMPRESSED_LOCAL_MESG_NUM_MASK) >> 5
+            timestamp = self.__decode_compressed_timestamp(record_header & _COMPRESSED_TIME_MASK)
+        else:
+            local_mesg_num = record_header & _LOCAL_MESG_NUM_MASK
+            timestamp = None
+
         if local_mesg_num in self._local_mesg_defs:
             mesg_def = self._local_mesg_defs[local_mesg_num]
         else:
             self.__raise_error("Invalid local message number")
 
-        messages_key = mesg_def['messages_key']
+        if mesg_def["is_skipped"] is True:
+            self.__skip_message(mesg_def)
+            return None
+
+        if mesg_def['column_plan'] is not None:
+            self.__read_message_into_columns(mesg_def, timestamp)
+            return mesg_def, None
 
         # Decode regular message
         message = {}
@@ -287,6 +534,34 @@ class Decoder:
 
         message = self.__read_message(mesg_def)
 
+        if timestamp is not None and mesg_def['timestamp_field_name'] is not None \
+                and mesg_def['timestamp_field_name'] not in message:
+            message[mesg_def['timestamp_field_name']] = {
+                'raw_field_value': timestamp,
+                'field_definition_number': _TIMESTAMP_FIELD_ID
+            }
+
+        developer_fields = self.__read_developer_fields(mesg_def)
+
+        if mesg_def['global_mesg_num'] == Profile['mesg_num']['DEVELOPER_DATA_ID']:
+            self.__add_developer_data_id_to_profile(message)
+
+        elif mesg_def['global_mesg_num'] == Profile['mesg_num']['FIELD_DESCRIPTION']:
+            message['key'] = self._num_field_descriptions
+            self._num_field_descriptions += 1
+            self.__add_field_description_to_profile(message)
+
+        else:
+            message = self.__apply_profile(mesg_def, message)
+
+        self.__clean_message(message)
+
+        if len(developer_fields) != 0:
+            message['developer_fields'] = developer_fields
+
+        return mesg_def, message
+
+    def __read_developer_fields(self, mesg_def):
         developer_fields = {}
 
         # Decode developer data if it exists
@@ -309,99 +584,303 @@ class Decoder:
                 if field_value is not None:
                     developer_fields[field_profile['key']] = field_value
 
-        if mesg_def['global_mesg_num'] == Profile['mesg_num']['DEVELOPER_DATA_ID']:
-            self.__add_developer_data_id_to_profile(message)
+        return developer_fields
 
-        elif mesg_def['global_mesg_num'] == Profile['mesg_num']['FIELD_DESCRIPTION']:
-            message['key'] = len(self._messages[messages_key])
-            self.__add_field_description_to_profile(message)
+    def __read_message_into_columns(self, mesg_def, timestamp):
+        '''
+        Decodes a message straight into the columns of its message type. Fields are transformed and
+        written as they are read, only the fields which are expanded into sub fields or components are
+        collected in a message first.
+        '''
+        message_columns = self.__get_message_columns(mesg_def['messages_key'])
+        message_columns.add_row()
+        write_value = message_columns.write_value
 
-        else:
-            message = self.__apply_profile(mesg_def, message)
+        global_mesg_num = mesg_def['global_mesg_num']
+        raw_values = self._stream.read_struct(mesg_def['struct'])
+        message = {}
+        self._fields_to_expand = []
+        self._fields_with_subfields = []
 
-        self.__clean_message(message)
+        for (field_id, field_name, field_kind, index, num_elements, invalid, convert_invalids_to_none,
+             has_sub_fields, has_components, is_accumulated, is_expanded, transform) in mesg_def['column_plan']:
+
+            if field_kind == _SINGLE_VALUE_FIELD:
+                field_value = raw_values[index]
+                if field_value == invalid and convert_invalids_to_none:
+                    continue
+            else:
+                field_value = self.__read_field_values(raw_values, field_kind, index, num_elements, invalid,
+                                                       convert_invalids_to_none)
+                if field_value is None:
+                    continue
+
+            if is_accumulated:
+                for value in field_value if isinstance(field_value, list) else (field_value,):
+                    self._accumulator.createAccumulatedField(global_mesg_num, field_id, int(value))
+
+            if is_expanded:
+                message[field_name] = {
+                'raw_field_value': field_value,
+                'field_definition_number': field_id
+                }
+
+                if has_sub_fields:
+                    self._fields_with_subfields.append(field_name)
+
+                if has_components:
+                    self._fields_to_expand.append(field_name)
+                continue
+
+            if transform is not None:
+                field_value = self.__transform_value(transform, field_value)
+            write_value(field_name, util._sanitize_values(field_value))
+
+        timestamp_index = mesg_def['timestamp_index']
+        if timestamp_index is not None and raw_values[timestamp_index] != _INVALID_TIMESTAMP:
+            self._last_timestamp = raw_values[timestamp_index]
+
+        timestamp_field_name = mesg_def['timestamp_field_name']
+        if timestamp is not None and timestamp_field_name is not None \
+                and message_columns.get_value(message_columns.get_num_rows() - 1, timestamp_field_name) is None:
+            write_value(timestamp_field_name, self.__transform_value(mesg_def['transform_plan'][_TIMESTAMP_FIELD_ID], timestamp))
+
+        developer_fields = self.__read_developer_fields(mesg_def)
+
+        if len(message) > 0:
+            self.__apply_profile(mesg_def, message)
+            for field_name, field in message.items():
+                write_value(field_name, util._sanitize_values(field['field_value']))
 
         if len(developer_fields) != 0:
-            message['developer_fields'] = developer_fields
+            write_value('developer_fields', developer_fields)
 
-        # Append decoded message
-        self._messages[messages_key].append(message)
+    def __decode_compressed_timestamp(self, time_offset):
+        '''Rolls the 5-bit time offset of a compressed timestamp header forward from the last full timestamp.'''
+        last_timestamp = self._last_timestamp
 
-        if self._mesg_listener is not None:
-            self._mesg_listener(mesg_def['global_mesg_num'], message)
+        timestamp = (last_timestamp & ~_COMPRESSED_TIME_MASK) + time_offset
+        if time_offset < (last_timestamp & _COMPRESSED_TIME_MASK):
+            timestamp += _COMPRESSED_TIME_MASK + 1
 
-    def __decode_compressed_timestamp_message(self):
-        self.__raise_error("Compressed timestamp messages are not currently supported")
+        self._last_timestamp = timestamp
+        return timestamp
 
-    def __read_message(self, mesg_def):
-        message = {}
-        raw_values = self.__read_raw_values(mesg_def["message_size"], mesg_def["struct_format_string"])
+    def __skip_message(self, mesg_def):
+        timestamp_struct = mesg_def["timestamp_struct"]
+        size = mesg_def["message_size"] + mesg_def["developer_data_size"]
+
+        # Skipped messages still carry the timestamp that compressed timestamp headers are relative to
+        if timestamp_struct is not None:
+            timestamp = self._stream.read_struct(timestamp_struct)[0]
+            if timestamp != _INVALID_TIMESTAMP:
+                self._last_timestamp = timestamp
+            size -= timestamp_struct.size
+
+        self._stream.skip_bytes(size)
 
+    def __build_decode_plan(self, mesg_def):
+        '''Compiles the struct and per-field steps used to decode and transform messages of a definition.'''
+        fields = mesg_def['fields']
+        decode_plan = []
+        transform_plan = {}
+        sub_field_transform_plan = {}
+        sub_field_plans = {}
+
+        timestamp_index = None
         index = 0
         for field in mesg_def['field_definitions']:
             base_type_definition = FIT.BASE_TYPE_DEFINITIONS[field["base_type"]]
-            invalid = base_type_definition["invalid"]
             num_elements = field["num_field_elements"]
-
             field_id = field["field_id"]
-            field_profile = mesg_def['fields'][field_id] if field_id in mesg_def['fields'] else None
-            field_name = field_profile['name'] if field_id in mesg_def['fields'] else field_id
+            field_profile = fields[field_id] if field_id in fields else None
 
-            if field_profile is not None and 'has_components' in field_profile:
-                convert_invalids_to_none = not field_profile['has_components']
+            if base_type_definition['type'] == FIT.BASE_TYPE["STRING"]:
+                field_kind = _STRING_FIELD
+            elif num_elements > 1 and base_type_definition['type'] == FIT.BASE_TYPE["BYTE"]:
+                field_kind = _BYTE_ARRAY_FIELD
+            elif num_elements > 1:
+                field_kind = _ARRAY_FIELD
             else:
-                convert_invalids_to_none = True
-
-            field_value = None
+                field_kind = _SINGLE_VALUE_FIELD
+
+            if field_profile is not None:
+                decode_plan.append((
+                    field_id,
+                    field_profile['name'],
+                    field_kind,
+                    index,
+                    num_elements,
+                    base_type_definition["invalid"],
+                    not field_profile['has_components'],
+                    len(field_profile['sub_fields']) > 0,
+                    field_profile['has_components'],
+                    field_profile['is_accumulated'],
+                    field_profile
+                ))
+
+                transform_plan[field_id] = self.__build_field_transform(field_profile)
+                for sub_field in field_profile['sub_fields']:
+                    sub_field_transform_plan[(field_id, sub_field['name'])] = self.__build_field_transform(sub_field)
+                if len(field_profile['sub_fields']) > 0:
+                    sub_field_plans[field_profile['name']] = self.__build_sub_field_plan(field_profile)
+            else:
+                decode_plan.append((field_id, field_id, field_kind, index, num_elements,
+                                    base_type_definition["invalid"], True, False, False, False, None))
+
+            if mesg_def['timestamp_struct'] is not None and field_id == _TIMESTAMP_FIELD_ID:
+                timestamp_index = index
+
+            index += num_elements if field_kind != _STRING_FIELD else 1
+
+        # Compressed timestamp headers add a timestamp field that is not part of the definition
+        timestamp_profile = fields.get(_TIMESTAMP_FIELD_ID)
+        if timestamp_profile is not None and _TIMESTAMP_FIELD_ID not in transform_plan:
+            transform_plan[_TIMESTAMP_FIELD_ID] = self.__build_field_transform(timestamp_profile)
+
+        mesg_def['struct'] = struct.Struct(mesg_def['struct_format_string'])
+        mesg_def['decode_plan'] = decode_plan
+        mesg_def['transform_plan'] = transform_plan
+        mesg_def['sub_field_transform_plan'] = sub_field_transform_plan
+        mesg_def['sub_field_plans'] = sub_field_plans
+        mesg_def['component_plans'] = {}
+        mesg_def['timestamp_index'] = timestamp_index
+        # Messages without a timestamp in the profile are left unchanged
+        mesg_def['timestamp_field_name'] = timestamp_profile['name'] if timestamp_profile is not None else None
+        mesg_def['column_plan'] = self.__build_column_plan(mesg_def) if self._columns is not None else None
+
+    def __build_column_plan(self, mesg_def):
+        '''
+        Compiles the steps used to decode messages of a definition straight into columns, or returns None
+        if they are decoded into a message which is then appended to the columns. Each step is the field's
+        decode plan entry without the profile, followed by whether the field is expanded into sub fields or
+        components, and therefore collected in a message first, and the field's transform.
+        '''
+        global_mesg_num = mesg_def['global_mesg_num']
+        if global_mesg_num == Profile['mesg_num']['DEVELOPER_DATA_ID'] or global_mesg_num == Profile['mesg_num']['FIELD_DESCRIPTION']:
+            return None
 
-            # Fields with strings or string arrays
-            if base_type_definition['type'] == FIT.BASE_TYPE["STRING"]:
-                field_value = util._convert_string(raw_values[index])
+        # HR messages are merged into the records as messages
+        if self._merge_heart_rates is True and mesg_def['messages_key'] == 'hr_mesgs':
+            return None
 
-            # Fields with an array of values
-            elif num_elements > 1:
-                field_value = []
+        expanded_names = set()
+        for (field_id, field_name, field_kind, index, num_elements, invalid, convert_invalids_to_none,
+             has_sub_fields, has_components, is_accumulated, field_profile) in mesg_def['decode_plan']:
+            # Accumulated fields with components are accumulated relative to the rest of the message
+            if is_accumulated and len(field_profile['components']) > 0:
+                return None
+
+            if has_sub_fields and self._expand_sub_fields is True:
+                expanded_names.add(field_name)
+                expanded_names.update(mesg_def['sub_field_plans'][field_name][0])
+
+            if has_components and self._expand_components is True:
+                expanded_names.add(field_name)
+
+        return tuple(step[:-1] + (step[1] in expanded_names, mesg_def['transform_plan'].get(step[0]))
+                     for step in mesg_def['decode_plan'])
+
+    @staticmethod
+    def __build_sub_field_plan(field_profile):
+        '''
+        Compiles the reference fields and map items of a field's sub fields. The sub fields which apply
+        to each combination of reference field values are resolved the first time it is seen and cached.
+        '''
+        reference_names = []
+        sub_fields = []
+        for sub_field in field_profile['sub_fields']:
+            map_items = tuple((map_item['name'], map_item['raw_value']) for map_item in sub_field['map'])
+            for reference_name, _ in map_items:
+                if reference_name not in reference_names:
+                    reference_names.append(reference_name)
+            sub_fields.append((sub_field['name'], sub_field['has_components'], map_items))
+
+        return (tuple(reference_names), tuple(sub_fields), {})
+
+    def __build_field_transform(self, field_profile):
+        field_type = field_profile['type']
+        scale = field_profile['scale']
+        offset = field_profile['offset']
+
+        return (
+            self.__get_type_table(field_type),
+            field_type in FIT.NUMERIC_FIELD_TYPES,
+            len(scale) > 1,
+            scale[0] if scale else 1,
+            offset[0] if offset else 0,
+            field_type == 'date_time'
+        )
+
+    def __get_type_table(self, field_type):
+        '''Returns the table used to convert values of a type to strings or enums, or None if they are not converted.'''
+        if self._convert_types_to_enums is True:
+            return get_enum_table(field_type)
+
+        if self._convert_types_to_strings is True:
+            return get_name_table(field_type)
+
+        return None
 
-                if(base_type_definition['type'] == FIT.BASE_TYPE["BYTE"]):
-                    raw_array = raw_values[index : index + num_elements]
-                    field_value = raw_array if util._only_invalid_values(raw_array, invalid) is False else None
-                else:
-                    for i in range(num_elements):
-                        raw_value = raw_values[index + i] if raw_values[index + i] != invalid or not convert_invalids_to_none else None
-                        field_value.append(raw_value)
+    def __read_message(self, mesg_def):
+        message = {}
+        raw_values = self._stream.read_struct(mesg_def['struct'])
 
-                    if self.__is_array_all_none(field_value) is True:
-                        field_value = None
+        for (field_id, field_name, field_kind, index, num_elements, invalid, convert_invalids_to_none,
+             has_sub_fields, has_components, is_accumulated, field_profile) in mesg_def['decode_plan']:
 
             # Fields with a single value
+            if field_kind == _SINGLE_VALUE_FIELD:
+                field_value = raw_values[index]
+                if field_value == invalid and convert_invalids_to_none:
+                    continue
             else:
-                if raw_values[index] != invalid or not convert_invalids_to_none:
-                    field_value = raw_values[index]
+                field_value = self.__read_field_values(raw_values, field_kind, index, num_elements, invalid,
+                                                       convert_invalids_to_none)
+                if field_value is None:
+                    continue
 
-            if field_value is not None:
-                message[field_name] = {
-                'raw_field_value': field_value,
-                'field_definition_number': field_id
-                }
+            message[field_name] = {
+            'raw_field_value': field_value,
+            'field_definition_number': field_id
+            }
 
-                if field_profile and len(field_profile['sub_fields']) > 0:
-                    self._fields_with_subfields.append(field_name)
+            if has_sub_fields:
+                self._fields_with_subfields.append(field_name)
 
-                if field_profile and field_profile['has_components'] is True:
-                    self._fields_to_expand.append(field_name)
+            if has_components:
+                self._fields_to_expand.append(field_name)
 
-                if field_profile and field_profile['is_accumulated'] is True:
-                    self.__set_accumulated_value(mesg_def, message, field_profile, field_value)
+            if is_accumulated:
+                self.__set_accumulated_value(mesg_def, message, field_profile, field_value)
 
-            index += num_elements if base_type_definition['type'] != FIT.BASE_TYPE["STRING"] else 1
+        timestamp_index = mesg_def['timestamp_index']
+        if timestamp_index is not None and raw_values[timestamp_index] != _INVALID_TIMESTAMP:
+            self._last_timestamp = raw_values[timestamp_index]
 
         return message
 
+    def __read_field_values(self, raw_values, field_kind, index, num_elements, invalid, convert_invalids_to_none):
+        '''Returns the value of a string or array field, or None if the field holds only invalid values.'''
+        # Fields with strings or string arrays
+        if field_kind == _STRING_FIELD:
+            return util._convert_string(raw_values[index])
+
+        # Fields with an array of bytes
+        if field_kind == _BYTE_ARRAY_FIELD:
+            field_value = list(raw_values[index : index + num_elements])
+            return None if util._only_invalid_values(field_value, invalid) is True else field_value
+
+        # Fields with an array of values
+        field_value = [raw_value if raw_value != invalid or not convert_invalids_to_none else None
+                       for raw_value in raw_values[index : index + num_elements]]
+        return None if self.__is_array_all_none(field_value) is True else field_value
+
     def __apply_profile(self, mesg_def: dict, raw_message: dict):
         message = raw_message
 
 
-        self.__expand_sub_fields(mesg_def['global_mesg_num'], message)
+        self.__expand_sub_fields(mesg_def, message)
 
         self.__expand_components(mesg_def['global_mesg_num'], message, mesg_def['fields'], mesg_def)
 
@@ -410,38 +889,46 @@ class Decoder:
         return message
 
     def __transform_values(self, message, mesg_def):
-        for field in message:
-            if 'is_expanded_field'in message[field] and message[field]['is_expanded_field'] is True:
+        transform_plan = mesg_def['transform_plan']
+        sub_field_transform_plan = mesg_def['sub_field_transform_plan']
+
+        for field_name, field in message.items():
+            if field.get('is_expanded_field') is True:
                 continue
 
-            field_name = field
-            field_id = message[field]['field_definition_number']
-            field_profile = mesg_def['fields'][field_id] if field_id in mesg_def['fields'] else None
-            field_type = field_profile['type'] if field_id in mesg_def['fields'] else field_id
+            field_id = field['field_definition_number']
+            if field.get('is_sub_field'):
+                transform = sub_field_transform_plan[(field_id, field_name)]
+            else:
+                transform = transform_plan.get(field_id)
 
-            is_sub_field = message[field]['is_sub_field'] if 'is_sub_field' in message[field] else False
-            if is_sub_field:
-                field_profile = self.__get_subfield_profile(field_profile, field_name)
-                field_type = field_profile['type'] if field_id in mesg_def['fields'] else field_id
+            # Fields missing from the profile are passed through untouched
+            field['field_value'] = field['raw_field_value'] if transform is None else \
+                self.__transform_value(transform, field['raw_field_value'])
+        return
 
-            field_value = message[field_name]['raw_field_value']
-            # Optional data operations
-            if self._convert_types_to_strings is True:
-                field_value = self.__convert_type_to_string(field_type, message[field_name]['raw_field_value'])
+    def __transform_value(self, transform, raw_field_value):
+        type_table, is_numeric, has_multiple_scales, scale, offset, is_date_time = transform
+        field_value = raw_field_value
 
-            if self._apply_scale_and_offset is True and field_type in FIT.NUMERIC_FIELD_TYPES:
-                field_value = self.__apply_scale_and_offset(field_profile, message[field_name]['raw_field_value'])
+        # Optional data operations
+        if type_table is not None:
+            field_value = convert_values(type_table, raw_field_value)
 
-            if self._convert_timestamps_to_datetimes is True and field_type == 'date_time':
-                field_value = util.convert_timestamp_to_datetime(message[field_name]['raw_field_value'])
+        if self._apply_scale_and_offset is True and is_numeric:
+            field_value = raw_field_value if has_multiple_scales else \
+                self.__apply_scale_and_offset(scale, offset, raw_field_value)
 
-            message[field_name]['field_value'] = field_value
-        return
+        if self._convert_timestamps_to_datetimes is True and is_date_time:
+            field_value = util.convert_timestamp_to_datetime(raw_field_value)
+
+        return field_value
 
     def __expand_components(self, mesg_num, message, fields, mesg_def):
         if self._expand_components is False or len(self._fields_to_expand) == 0:
             return
 
+        component_plans = mesg_def['component_plans']
         mesg = {}
 
         while len(self._fields_to_expand) > 0:
@@ -449,36 +936,36 @@ class Decoder:
 
             field_to_expand = message.get(field_name) or mesg.get(field_name)
 
-            raw_field_value = field_to_expand['raw_field_value']
-            field_definition_number = field_to_expand['field_definition_number']
-            field_profile = mesg_def['fields'].get(field_definition_number)
+            if field_name in component_plans:
+                component_plan = component_plans[field_name]
+            else:
+                component_plan = self.__build_component_plan(mesg_def, field_to_expand, field_name)
+                component_plans[field_name] = component_plan
 
-            if field_profile is None: 
+            if component_plan is None:
                 continue
 
-            is_sub_field = field_to_expand.get('is_sub_field') or False
-            if is_sub_field is True:
-                field_profile = self.__get_subfield_profile(field_profile, field_name)
-
-            base_type = FIT.FIELD_TYPE_TO_BASE_TYPE[field_profile['type']] if field_profile['type'] in FIT.FIELD_TYPE_TO_BASE_TYPE else None
-
-            if field_profile['has_components'] is False or base_type is None:
-                continue
+            invalid, bits_per_value, value_mask, components = component_plan
+            raw_field_value = field_to_expand['raw_field_value']
 
-            if util._only_invalid_values(raw_field_value, FIT.BASE_TYPE_DEFINITIONS[base_type]['invalid']) is True:
+            if util._only_invalid_values(raw_field_value, invalid) is True:
                 continue
 
-            bitstream = BitStream(raw_field_value, base_type)
+            # Pack the value, or the array of values with the first element in the lowest bits, into one integer
+            if isinstance(raw_field_value, list):
+                packed_value = 0
+                for i, element in enumerate(raw_field_value):
+                    packed_value |= (element & value_mask) << (i * bits_per_value)
+                bits_available = bits_per_value * len(raw_field_value)
+            else:
+                packed_value = raw_field_value & value_mask
+                bits_available = bits_per_value
 
-            for i in range(len(field_profile['components'])):
-                if bitstream.bits_available() < field_profile['bits'][i]:
+            for (target_field, bits, shift, mask, scale, offset, invalid_value, type_table) in components:
+                if bits_available - shift < bits:
                     break
 
-                target_field = fields[field_profile['components'][i]]
                 if target_field['name'] not in mesg:
-                    base_type = FIT.FIELD_TYPE_TO_BASE_TYPE[target_field['type']] if target_field['type'] in FIT.FIELD_TYPE_TO_BASE_TYPE else target_field['type']
-                    invalid_value = FIT.BASE_TYPE_DEFINITIONS[base_type]['invalid'] if base_type in FIT.BASE_TYPE_DEFINITIONS else 0xFF
-
                     mesg[target_field['name']] = {
                         'field_value': [],
                         'raw_field_value': [],
@@ -487,13 +974,13 @@ class Decoder:
                         'invalid': invalid_value
                     }
 
-                value = bitstream.read_bits(field_profile['bits'][i])
+                value = (packed_value >> shift) & mask
 
                 if target_field['is_accumulated'] is True: 
-                    value = self._accumulator.accumulate(mesg_num, target_field['num'], value, field_profile['bits'][i])
+                    value = self._accumulator.accumulate(mesg_num, target_field['num'], value, bits)
 
                 # Undo component scale and offset before applying the destination field's scale and offset
-                value = (value / field_profile['scale'][i]) - field_profile['offset'][i]
+                value = (value / scale) - offset
                 value = int(value) if value.is_integer() else value
                 raw_value = (value + target_field['offset'][0]) * target_field['scale'][0]
 
@@ -502,15 +989,15 @@ class Decoder:
                 if raw_value == invalid_value:
                     mesg[target_field['name']]['field_value'].append(None)
                 else:
-                    if self._convert_types_to_strings is True:
-                            value = self.__convert_type_to_string(target_field['type'], value)
+                    if type_table is not None:
+                        value = convert_values(type_table, value)
 
                     mesg[target_field['name']]['field_value'].append(value)
 
                 if target_field['has_components'] is True:
                     self._fields_to_expand.append(target_field['name'])
 
-                if bitstream.has_bits_available() is False:
+                if shift + bits == bits_available:
                     break
 
         for field_name in mesg:
@@ -518,37 +1005,99 @@ class Decoder:
             mesg[field_name]['field_value'] = util._sanitize_values(mesg[field_name]['field_value'])
             message[field_name] = mesg[field_name]
 
-    def __expand_sub_fields(self, global_mesg_num, message):
-        if self._expand_sub_fields is False or len(self._fields_with_subfields) == 0:
-            return
+    def __build_component_plan(self, mesg_def, field_to_expand, field_name):
+        '''
+        Compiles the bit offsets used to extract the components of a field, or returns None if the field
+        can not be expanded. Each component is a (target_field, bits, shift, mask, scale, offset,
+        target_invalid, type_table) tuple, where shift is the sum of the bits of the components before it.
+        '''
+        fields = mesg_def['fields']
+        field_profile = fields.get(field_to_expand['field_definition_number'])
 
-        # Save the original fields for iteration before expanding sub fields.
-        for field in self._fields_with_subfields:
-            if message[field]['field_definition_number'] in Profile['messages'][global_mesg_num]['fields']:
-                field_profile = Profile['messages'][global_mesg_num]['fields'][message[field]['field_definition_number']]
-            else:
-                continue
+        if field_profile is None:
+            return None
 
-            if len(field_profile['sub_fields']) > 0:
-                self.__expand_sub_field(message, field_profile)
+        if field_to_expand.get('is_sub_field') is True:
+            field_profile = self.__get_subfield_profile(field_profile, field_name)
 
-    def __expand_sub_field(self, message, field_profile):
-        for sub_field in field_profile['sub_fields']:
-            for map_item in sub_field['map']:
-                reference_field_profile = message[map_item['name']] if map_item['name'] in message else None
+        base_type = FIT.FIELD_TYPE_TO_BASE_TYPE[field_profile['type']] if field_profile['type'] in FIT.FIELD_TYPE_TO_BASE_TYPE else None
 
-                if reference_field_profile is None:
-                    continue
+        if field_profile['has_components'] is False or base_type is None:
+            return None
 
-                if reference_field_profile['raw_field_value'] == map_item['raw_value']:
-                    message[sub_field['name']] = copy.deepcopy(message[field_profile['name']])
-                    message[sub_field['name']]['is_sub_field'] = True
+        base_type_definition = FIT.BASE_TYPE_DEFINITIONS[base_type]
+        bits_per_value = base_type_definition['size'] * 8
+
+        components = []
+        shift = 0
+        for i, component_field_num in enumerate(field_profile['components']):
+            target_field = fields[component_field_num]
+            target_base_type = FIT.FIELD_TYPE_TO_BASE_TYPE[target_field['type']] if target_field['type'] in FIT.FIELD_TYPE_TO_BASE_TYPE else target_field['type']
+            invalid_value = FIT.BASE_TYPE_DEFINITIONS[target_base_type]['invalid'] if target_base_type in FIT.BASE_TYPE_DEFINITIONS else 0xFF
+
+            bits = field_profile['bits'][i]
+            components.append((
+                target_field,
+                bits,
+                shift,
+                (1 << bits) - 1,
+                field_profile['scale'][i],
+                field_profile['offset'][i],
+                invalid_value,
+                self.__get_type_table(target_field['type'])
+            ))
+            shift += bits
+
+        return (base_type_definition['invalid'], bits_per_value, (1 << bits_per_value) - 1, components)
+
+    def __expand_sub_fields(self, mesg_def, message):
+        if self._expand_sub_fields is False or len(self._fields_with_subfields) == 0:
+            return
 
-                    if sub_field['has_components'] is True:
-                        self._fields_to_expand.append(sub_field['name'])
+        sub_field_plans = mesg_def['sub_field_plans']
+        for field_name in self._fields_with_subfields:
+            reference_names, sub_fields, resolved = sub_field_plans[field_name]
+
+            reference_values = tuple(self.__get_reference_value(message, reference_name) for reference_name in reference_names)
+            matching_sub_fields = resolved.get(reference_values)
+            if matching_sub_fields is None:
+                matching_sub_fields = self.__resolve_sub_fields(sub_fields, dict(zip(reference_names, reference_values)))
+                resolved[reference_values] = matching_sub_fields
+
+            field = message[field_name]
+            for sub_field_name, has_components in matching_sub_fields:
+                # Integer values are shared with the field, arrays are copied so the two fields can be transformed separately
+                raw_field_value = field['raw_field_value']
+                message[sub_field_name] = {
+                    'raw_field_value': list(raw_field_value) if isinstance(raw_field_value, list) else raw_field_value,
+                    'field_definition_number': field['field_definition_number'],
+                    'is_sub_field': True
+                }
 
+                if has_components is True:
+                    self._fields_to_expand.append(sub_field_name)
+
+    @staticmethod
+    def __get_reference_value(message, reference_name):
+        if reference_name not in message:
+            return _NO_REFERENCE_VALUE
+
+        raw_field_value = message[reference_name]['raw_field_value']
+        return tuple(raw_field_value) if isinstance(raw_field_value, list) else raw_field_value
+
+    @staticmethod
+    def __resolve_sub_fields(sub_fields, reference_values):
+        '''Returns the (name, has_components) of the sub fields with a map item matching the reference field values.'''
+        matching_sub_fields = []
+        for sub_field_name, has_components, map_items in sub_fields:
+            for reference_name, raw_value in map_items:
+                reference_value = reference_values[reference_name]
+                if reference_value is not _NO_REFERENCE_VALUE and reference_value == raw_value:
+                    matching_sub_fields.append((sub_field_name, has_components))
                     break
 
+        return tuple(matching_sub_fields)
+
     def __get_subfield_profile(self, field_profile, name):
         return next(sub_field for sub_field in field_profile['sub_fields'] if sub_field['name'] == name) or {}
 
@@ -566,46 +1115,18 @@ class Decoder:
 
             self._accumulator.createAccumulatedField(mesg_def['global_mesg_num'], field['num'], int(value))
 
-    def __convert_type_to_string(self, field_type, raw_field_value):
-        try:
-            if field_type in Profile['types']:
-                types = Profile['types'][field_type]
-            else:
-                return raw_field_value
-
-            field_value = raw_field_value
-
-            if isinstance(raw_field_value, list):
-                for i in range(len(raw_field_value)):
-                    field_value[i] = types[str(raw_field_value[i])] if str(raw_field_value[i]) in types else raw_field_value[i]
-                return field_value
-
-            return types[str(raw_field_value)] if str(raw_field_value) in types else field_value
-        except Exception:
-            return raw_field_value
-
-    def __apply_scale_and_offset(self, field_profile, raw_field_value):
-
-        if self._apply_scale_and_offset is False:
-            return raw_field_value
-
+    def __apply_scale_and_offset(self, scale, offset, raw_field_value):
         if raw_field_value is None:
             return raw_field_value
 
-        if len(field_profile['scale']) > 1:
-            return raw_field_value
-
-        scale = field_profile['scale'][0] if field_profile['scale'] else 1
-        offset = field_profile['offset'][0] if field_profile['offset'] else 0
-
         try:
 
-            field_values = raw_field_value
-
+            # Arrays are scaled into a new list, the raw values may be shared with sub fields
             if isinstance(raw_field_value, list):
-                for i in range(len(raw_field_value)):
-                    field_value = raw_field_value[i] / scale if (raw_field_value[i] is not None and scale != 1) else raw_field_value[i]
-                    field_values[i] = (field_value - offset) if raw_field_value[i] is not None else None
+                field_values = []
+                for value in raw_field_value:
+                    field_value = value / scale if (value is not None and scale != 1) else value
+                    field_values.append((field_value - offset) if value is not None else None)
                 return field_values
 
             field_value = raw_field_value / scale if scale != 1 else raw_field_value
@@ -694,9 +1215,6 @@ class Decoder:
                     message[field] = message[field]['field_value'] if 'field_value' in message[field] else message[field]['raw_field_value']
                 message[field] = util._sanitize_values(message[field])
 
-    def __read_raw_values(self, message_size, struct_format_string):
-        return self._stream.read_and_unpack(message_size, struct_format_string)
-
     def __read_raw_value(self, message_size, struct_format_string):
         field_value = self._stream.read_and_unpack(message_size, struct_format_string)
         return field_value if len(field_value) > 1 else field_value[0]
@@ -0,0 +1,75 @@
+'''enum_tables.py: Contains the integer keyed lookup tables used to convert enum field values to their names.'''
+
+###########################################################################################
+# Copyright 2025 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+from .lazy_profile import Profile
+
+_NOT_AN_ENUM = object()
+
+_name_tables = {}
+_enum_tables = {}
+
+
+class FitEnum(int):
+    '''
+    An enum field value which compares and hashes as its integer value and converts to a string as its name.
+
+    One instance is created per type and value, and shared by every decoded message.
+
+    Attributes:
+        name: The name of the value in the FIT Profile.
+        type: The name of the FIT Profile type.
+    '''
+    def __new__(cls, value, name, field_type):
+        enum = super().__new__(cls, value)
+        enum.name = name
+        enum.type = field_type
+        return enum
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return f"<{self.type}.{self.name}: {int(self)}>"
+
+    def __reduce__(self):
+        return (FitEnum, (int(self), self.name, self.type))
+
+
+def get_name_table(field_type):
+    '''Returns the names of a type's values keyed by integer value, or None if the type has no values in the profile.'''
+    table = _name_tables.get(field_type, _NOT_AN_ENUM)
+    if table is _NOT_AN_ENUM:
+        if field_type in Profile['types']:
+            # Decoded values are only ever looked up by their decimal string, keys such as '0xF7' name ranges
+            table = {int(key): name for key, name in Profile['types'][field_type].items() if key.isdigit()}
+        else:
+            table = None
+        _name_tables[field_type] = table
+
+    return table
+
+
+def get_enum_table(field_type):
+    '''Returns shared FitEnum values keyed by integer value, or None if the type has no values in the profile.'''
+    table = _enum_tables.get(field_type, _NOT_AN_ENUM)
+    if table is _NOT_AN_ENUM:
+        names = get_name_table(field_type)
+        table = {value: FitEnum(value, name, field_type) for value, name in names.items()} if names is not None else None
+        _enum_tables[field_type] = table
+
+    return table
+
+
+def convert_values(table, raw_field_value):
+    '''Looks up an integer value, or each integer in a list of values, in a table. Values not in the table are returned as is.'''
+    if isinstance(raw_field_value, list):
+        return [table.get(value, value) if type(value) is int else value for value in raw_field_value]
+
+    return table.get(raw_field_value, raw_field_value) if type(raw_field_value) is int else raw_field_value
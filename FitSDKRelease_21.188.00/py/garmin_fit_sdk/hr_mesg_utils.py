@@ -12,6 +12,7 @@
 ############################################################################################
 
 
+from collections import deque
 from datetime import datetime
 
 from . import util
@@ -22,92 +23,177 @@ def merge_heart_rates(hr_mesgs, record_mesgs):
     if hr_mesgs is None or record_mesgs is None or len(hr_mesgs) == 0 or len(record_mesgs) == 0:
         return
 
-    heartrates = expand_heart_rates(hr_mesgs)
+    heart_rate_merger = HeartRateMerger()
 
-    heartrate_index = 0
-    record_range_start_time = None
-
-    for i in range(len(record_mesgs)):
-        message = record_mesgs[i]
+    for message in hr_mesgs:
+        heart_rate_merger.add_hr_mesg(message)
 
-        hr_sum = 0
-        hr_sum_count = 0
+    for message in record_mesgs:
+        heart_rate_merger.add_record_mesg(message)
 
-        record_range_end_time = seconds_since_fit_epoch(message['timestamp'])
+    heart_rate_merger.finish()
 
-        if record_range_start_time is None:
-            record_range_start_time = record_range_end_time
 
-        if record_range_start_time == record_range_end_time:
-            record_range_start_time -= 1
-            heartrate_index = heartrate_index - 1 if heartrate_index >= 1 else 0
+def expand_heart_rates(hr_mesgs):
+    '''Takes the heart rate messages and expands them to 250ms increments.'''
+    if hr_mesgs is None or len(hr_mesgs) == 0:
+        return []
 
-        finding_in_range_hr_mesgs = True
-        while(finding_in_range_hr_mesgs and (heartrate_index < len(heartrates))):
-            heart_rate = heartrates[heartrate_index]
+    heartrates = []
+    heart_rate_expander = _HeartRateExpander()
 
-            # Check if the heartrate timestamp is > record start time
-            # and if the heartrate timestamp is <= to record end time
-            if heart_rate['timestamp'] > record_range_start_time and heart_rate['timestamp'] <= record_range_end_time:
-                hr_sum += heart_rate['heart_rate']
-                hr_sum_count += 1
-            # Check if the heartrate timestamp exceeds the record time
-            elif heart_rate['timestamp'] > record_range_end_time:
-                finding_in_range_hr_mesgs = False
+    for message in hr_mesgs:
+        heart_rate_expander.expand(message, heartrates)
 
-                if hr_sum_count > 0:
-                    # Update record's heart rate value
-                    #avg_hr = round(hr_sum / hr_sum_count, 0)
-                    avg_hr = int((hr_sum / hr_sum_count) + .5)
-                    message['heart_rate'] = avg_hr
-                # Reset HR average accumulators
-                hr_sum = 0
-                hr_sum_count = 0
-                record_range_start_time = record_range_end_time
+    return heartrates
 
-                # Breaks out of finding_in_range_hr_messages while loop without incrementing heartrate_index
-                break
-            heartrate_index += 1
 
+class HeartRateMerger:
+    '''
+    Merges heart rate messages into record messages as the messages are decoded.
+
+    A record's heart rate is the average of the expanded heart rates since the previous record. It is
+    known once a heart rate after the record's timestamp has been expanded, or once the end of the
+    file is reached. Records are merged in order, and expanded heart rates which can no longer be
+    averaged into a record are dropped.
+
+    Attributes:
+        _heartrates: The expanded heart rates which may still be averaged into a record.
+        _heartrates_offset: The number of expanded heart rates dropped from the start of _heartrates.
+        _heartrate_index: The index, counting dropped heart rates, of the next heart rate to average.
+        _record_range_start_time: The timestamp of the last merged record, in seconds since the FIT epoch.
+        _pending_records: The records whose heart rate is not known yet.
+    '''
+    def __init__(self):
+        self._heart_rate_expander = _HeartRateExpander()
+        self._heartrates = []
+        self._heartrates_offset = 0
+        self._heartrate_index = 0
+        self._record_range_start_time = None
+        self._pending_records = deque()
+
+    def add_hr_mesg(self, message):
+        '''Expands a heart rate message and merges the records it completes.'''
+        self._heart_rate_expander.expand(message, self._heartrates)
+        self.__merge_records(False)
+
+    def add_record_mesg(self, message):
+        '''Adds a record message, which is merged once its heart rate is known.'''
+        self._pending_records.append(message)
+        self.__merge_records(False)
+
+    def finish(self):
+        '''Merges the remaining records once all heart rate messages have been added.'''
+        self.__merge_records(True)
+
+    def get_num_pending_records(self):
+        '''Returns the number of records, the most recently added ones, which have not been merged yet.'''
+        return len(self._pending_records)
+
+    def __merge_records(self, is_finished):
+        heartrates = self._heartrates
+
+        while len(self._pending_records) > 0:
+            message = self._pending_records[0]
+
+            hr_sum = 0
+            hr_sum_count = 0
+
+            record_range_start_time = self._record_range_start_time
+            record_range_end_time = seconds_since_fit_epoch(message['timestamp'])
+            heartrate_index = self._heartrate_index
+
+            if record_range_start_time is None:
+                record_range_start_time = record_range_end_time
 
-def expand_heart_rates(hr_mesgs):
-    '''Takes the heart rate messages and expands them to 250ms increments.'''
+            if record_range_start_time == record_range_end_time:
+                record_range_start_time -= 1
+                heartrate_index = heartrate_index - 1 if heartrate_index >= 1 else 0
+
+            index = max(heartrate_index - self._heartrates_offset, 0)
+            while index < len(heartrates):
+                heart_rate = heartrates[index]
+
+                # Check if the heartrate timestamp is > record start time
+                # and if the heartrate timestamp is <= to record end time
+                if heart_rate['timestamp'] > record_range_start_time and heart_rate['timestamp'] <= record_range_end_time:
+                    hr_sum += heart_rate['heart_rate']
+                    hr_sum_count += 1
+                # Check if the heartrate timestamp exceeds the record time
+                elif heart_rate['timestamp'] > record_range_end_time:
+                    if hr_sum_count > 0:
+                        # Update record's heart rate value
+                        #avg_hr = round(hr_sum / hr_sum_count, 0)
+                        avg_hr = int((hr_sum / hr_sum_count) + .5)
+                        message['heart_rate'] = avg_hr
+
+                    record_range_start_time = record_range_end_time
+
+                    # Breaks out of the loop without incrementing the index
+                    break
+                index += 1
+            else:
+                # Heart rates after the record's timestamp may still be added
+                if is_finished is False:
+                    return
+
+            self._record_range_start_time = record_range_start_time
+            self._heartrate_index = index + self._heartrates_offset
+            self._pending_records.popleft()
+
+        # Keep the heart rate before the next one, records with the same timestamp step back to it
+        num_dropped = self._heartrate_index - 1 - self._heartrates_offset
+        if num_dropped > len(heartrates) // 2:
+            del heartrates[:num_dropped]
+            self._heartrates_offset += num_dropped
+
+
+class _HeartRateExpander:
+    '''
+    Expands heart rate messages to 250ms increments, one message at a time.
+
+    Attributes:
+        _anchor_timestamp: The timestamp of the last anchor HR message, in seconds since the FIT epoch.
+        _anchor_event_timestamp: The event timestamp of the last anchor HR message.
+        _previous_hr: The last expanded heart rate.
+    '''
     GAP_INCREMENT_MILLISECONDS = 250
     GAP_INCREMENT_SECONDS = GAP_INCREMENT_MILLISECONDS / 1000.0
     GAP_MAX_MILLISECONDS = 5000
     GAP_MAX_STEPS = GAP_MAX_MILLISECONDS / GAP_INCREMENT_MILLISECONDS
 
-    if hr_mesgs is None or len(hr_mesgs) == 0:
-        return []
-
-    anchor_event_timestamp = 0.0
-    anchor_timestamp = None
+    def __init__(self):
+        self._anchor_event_timestamp = 0.0
+        self._anchor_timestamp = None
+        self._previous_hr = None
 
-    heartrates = []
-
-    for message in hr_mesgs:
+    def expand(self, message, heartrates):
+        '''Appends the expanded heart rates of a heart rate message to heartrates.'''
         if message is None:
-            __raise_error("HR message must not be None.")
+            _raise_error("HR message must not be None.")
 
         event_timestamps = message['event_timestamp'] if isinstance(message['event_timestamp'], list) else [message['event_timestamp']]
         filtered_bpm = message['filtered_bpm'] if isinstance(message['filtered_bpm'], list) else [message['filtered_bpm']]
 
         # Update HR anchor timestamp if present
         if 'timestamp' in message and message['timestamp'] is not None:
-            anchor_timestamp = seconds_since_fit_epoch(message['timestamp'])
+            self._anchor_timestamp = seconds_since_fit_epoch(message['timestamp'])
 
             if message['fractional_timestamp'] is not None:
-                anchor_timestamp += message['fractional_timestamp']
+                self._anchor_timestamp += message['fractional_timestamp']
 
             if len(event_timestamps) == 1:
-                anchor_event_timestamp = event_timestamps[0]
+                self._anchor_event_timestamp = event_timestamps[0]
             else:
-                __raise_error("Anchor HR message must have at least one event_timestamp")
+                _raise_error("Anchor HR message must have at least one event_timestamp")
+
+        anchor_timestamp = self._anchor_timestamp
+        anchor_event_timestamp = self._anchor_event_timestamp
 
         if anchor_timestamp is None or anchor_event_timestamp is None:
-            __raise_error("No anchor timestamp received in an HR message before delta HR messages")
+            _raise_error("No anchor timestamp received in an HR message before delta HR messages")
         elif len(event_timestamps) != len(filtered_bpm):
-            __raise_error("HR message with mismatching event timestamp and filtered bpm")
+            _raise_error("HR message with mismatching event timestamp and filtered bpm")
 
         for i in range(len(event_timestamps)):
             event_timestamp = event_timestamps[i]
@@ -116,7 +202,7 @@ def expand_heart_rates(hr_mesgs):
                 if anchor_event_timestamp - event_timestamp > (0x400000):
                     event_timestamp += 0x400000
                 else:
-                    __raise_error("Anchor event_timestamp is greater than subsequent event_timestamp. This does not allow for correct delta caluclation.")
+                    _raise_error("Anchor event_timestamp is greater than subsequent event_timestamp. This does not allow for correct delta caluclation.")
 
 
             current_hr = { 'timestamp': anchor_timestamp, 'heart_rate': filtered_bpm[i] }
@@ -124,21 +210,21 @@ def expand_heart_rates(hr_mesgs):
 
             # Carry the previous HR value forward across the gap to the current
             # HR value for up to 5 seconds in 250ms increments
-            if len(heartrates) > 0:
-                previous_hr = heartrates[len(heartrates) - 1]
+            previous_hr = self._previous_hr
+            if previous_hr is not None:
                 gap_in_milliseconds = abs(current_hr['timestamp'] - previous_hr['timestamp']) * 1000
                 step = 1
 
-                while(gap_in_milliseconds > GAP_INCREMENT_MILLISECONDS and step <= GAP_MAX_STEPS):
+                while(gap_in_milliseconds > self.GAP_INCREMENT_MILLISECONDS and step <= self.GAP_MAX_STEPS):
                     gap_hr = { 'timestamp': previous_hr['timestamp'], 'heart_rate': previous_hr['heart_rate'] }
-                    gap_hr['timestamp'] += (GAP_INCREMENT_SECONDS * step)
+                    gap_hr['timestamp'] += (self.GAP_INCREMENT_SECONDS * step)
                     heartrates.append(gap_hr)
 
-                    gap_in_milliseconds -= GAP_INCREMENT_MILLISECONDS
+                    gap_in_milliseconds -= self.GAP_INCREMENT_MILLISECONDS
                     step += 1
 
             heartrates.append(current_hr)
-    return heartrates
+            self._previous_hr = current_hr
 
 def seconds_since_fit_epoch(timestamp):
     '''Gives the time in seconds since the fit epoch.'''
@@ -147,6 +233,6 @@ def seconds_since_fit_epoch(timestamp):
 
     return timestamp
 
-def __raise_error(error = ""):
+def _raise_error(error = ""):
         message = f"FIT Runtime Error {error}"
         raise RuntimeError(message)
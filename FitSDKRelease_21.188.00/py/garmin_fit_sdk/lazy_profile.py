@@ -0,0 +1,192 @@
+'''lazy_profile.py: Contains the LazyProfile class which loads the FIT Profile on first access, one message and type at a time.'''
+
+###########################################################################################
+# Copyright 2025 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+import marshal
+import os
+import sys
+
+_PROFILE_SOURCE = os.path.join(os.path.dirname(__file__), 'profile.py')
+_CACHE_FILE = os.path.join(os.path.dirname(__file__), '__pycache__',
+                           'profile.' + str(sys.implementation.cache_tag) + '.marshal')
+
+_SPLIT_KEYS = ('messages', 'types')
+
+
+def _build_blobs():
+    '''Imports the full profile module and splits the messages and types into one marshal blob per entry.'''
+    from .profile import Profile
+
+    blobs = {}
+    for key, value in Profile.items():
+        if key in _SPLIT_KEYS:
+            blobs[key] = {entry_key: marshal.dumps(entry) for entry_key, entry in value.items()}
+        else:
+            blobs[key] = value
+
+    return blobs
+
+
+def _read_cache(cache_file):
+    try:
+        if os.path.getmtime(cache_file) < os.path.getmtime(_PROFILE_SOURCE):
+            return None
+
+        with open(cache_file, 'rb') as file:
+            return marshal.load(file)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def _write_cache(cache_file, blobs):
+    # The cache is optional, e.g. the package directory may be read only
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        temp_file = cache_file + '.' + str(os.getpid())
+        with open(temp_file, 'wb') as file:
+            marshal.dump(blobs, file)
+        os.replace(temp_file, cache_file)
+    except OSError:
+        pass
+
+
+class _LazyTable(dict):
+    '''
+    A dictionary of profile entries which are unmarshalled the first time they are accessed.
+
+    Attributes:
+        _blobs:    The marshalled entries keyed the same as the profile.
+        _complete: Whether every entry has been unmarshalled and stored in the profile's order.
+    '''
+    def __init__(self, blobs):
+        super().__init__()
+        self._blobs = blobs
+        self._complete = False
+
+    def __missing__(self, key):
+        value = marshal.loads(self._blobs[key])
+        self[key] = value
+        return value
+
+    def __contains__(self, key):
+        return key in self._blobs
+
+    def __len__(self):
+        return len(self._blobs)
+
+    def __iter__(self):
+        return iter(self._blobs)
+
+    def __eq__(self, other):
+        return dict.__eq__(self.load_all(), other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return dict.__repr__(self.load_all())
+
+    def get(self, key, default=None):
+        return self[key] if key in self._blobs else default
+
+    def keys(self):
+        return dict.keys(self.load_all())
+
+    def values(self):
+        return dict.values(self.load_all())
+
+    def items(self):
+        return dict.items(self.load_all())
+
+    def load_all(self):
+        '''Unmarshals every entry that has not been accessed yet and returns the table in profile order.'''
+        if not self._complete:
+            # Entries were added in access order, re-insert them in the profile's order
+            entries = {key: dict.get(self, key) if dict.__contains__(self, key) else marshal.loads(blob)
+                       for key, blob in self._blobs.items()}
+            dict.clear(self)
+            dict.update(self, entries)
+            self._complete = True
+
+        return self
+
+
+class LazyProfile(dict):
+    '''
+    The FIT Profile, loaded the first time any of its keys are accessed.
+
+    The messages and types are split into one marshal blob per message and per type, which is cached
+    next to the package's bytecode. Only the messages and types that are looked up are unmarshalled.
+    When the cache is missing or older than profile.py it is rebuilt from profile.py. Like bytecode,
+    the cache is not written when sys.dont_write_bytecode is set.
+
+    Attributes:
+        _cache_file: The path of the marshal cache, or None to always build from profile.py.
+        _loaded:     Whether the profile has been loaded.
+    '''
+    def __init__(self, cache_file=_CACHE_FILE):
+        super().__init__()
+        self._cache_file = cache_file
+        self._loaded = False
+
+    def __missing__(self, key):
+        if self._loaded or not dict.__contains__(self.load(), key):
+            raise KeyError(key)
+
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        return dict.__contains__(self.load(), key)
+
+    def __len__(self):
+        return dict.__len__(self.load())
+
+    def __iter__(self):
+        return dict.__iter__(self.load())
+
+    def __eq__(self, other):
+        return dict.__eq__(self.load(), other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return dict.__repr__(self.load())
+
+    def get(self, key, default=None):
+        return dict.get(self.load(), key, default)
+
+    def keys(self):
+        return dict.keys(self.load())
+
+    def values(self):
+        return dict.values(self.load())
+
+    def items(self):
+        return dict.items(self.load())
+
+    def load(self):
+        '''Loads the profile from the cache, or from profile.py, if it has not been loaded yet.'''
+        if self._loaded:
+            return self
+
+        blobs = _read_cache(self._cache_file) if self._cache_file is not None else None
+        if blobs is None:
+            blobs = _build_blobs()
+            if self._cache_file is not None and not sys.dont_write_bytecode:
+                _write_cache(self._cache_file, blobs)
+
+        for key, value in blobs.items():
+            dict.__setitem__(self, key, _LazyTable(value) if key in _SPLIT_KEYS else value)
+
+        self._loaded = True
+        return self
+
+
+Profile = LazyProfile()
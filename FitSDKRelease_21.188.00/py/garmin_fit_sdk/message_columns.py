@@ -0,0 +1,216 @@
+'''message_columns.py: Contains the MessageColumns class which stores decoded messages of one type as columns.'''
+
+###########################################################################################
+# Copyright 2025 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+from array import array
+
+from .util import FIT_EPOCH_S
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_INT_TYPE_CODE = 'q'
+_FLOAT_TYPE_CODE = 'd'
+
+_TYPE_CODES = {
+    int: _INT_TYPE_CODE,
+    float: _FLOAT_TYPE_CODE,
+}
+
+_NUMPY_DTYPES = {
+    _INT_TYPE_CODE: 'int64',
+    _FLOAT_TYPE_CODE: 'float64',
+}
+
+
+class MessageColumns:
+    '''
+    A class that accumulates decoded messages of a single message type as one column per field.
+
+    Numeric fields are stored in typed arrays (array.array, or NumPy arrays when NumPy is installed
+    and the columns are exported). Fields holding strings, lists or other objects are stored in plain
+    lists. Every column has a validity mask which is 0 for rows where the field was not present.
+
+    Attributes:
+        _num_rows: The number of messages appended so far.
+        _columns: The column values keyed by field name.
+        _valid: The validity masks keyed by field name.
+    '''
+    def __init__(self):
+        self._num_rows = 0
+        self._columns = {}
+        self._valid = {}
+
+    def get_num_rows(self):
+        '''Returns the number of messages stored in the columns.'''
+        return self._num_rows
+
+    def append(self, message):
+        '''Appends a decoded message as a new row.'''
+        self.add_row()
+
+        for field_name, value in message.items():
+            self.write_value(field_name, value)
+
+    def add_row(self):
+        '''Adds an empty row which write_value writes into, and returns its index.'''
+        self._num_rows += 1
+        return self._num_rows - 1
+
+    def write_value(self, field_name, value):
+        '''Writes the value of a field into the last row, replacing the value if the field is already set.'''
+        row = self._num_rows - 1
+
+        # Most values are appended to a column which already has the value's type
+        valid = self._valid.get(field_name)
+        if valid is not None and len(valid) == row:
+            column = self._columns[field_name]
+            if not isinstance(column, array):
+                column.append(value)
+                valid.append(1)
+                return
+
+            if _TYPE_CODES.get(type(value)) == column.typecode:
+                try:
+                    column.append(value)
+                    valid.append(1)
+                    return
+                except OverflowError:
+                    pass
+
+        if field_name not in self._columns:
+            self.__add_column(field_name, value)
+
+        valid = self._valid[field_name]
+        if len(valid) > row:
+            column = self.__fit_column_to_value(field_name, value)
+            column[row] = value
+            valid[row] = 1
+            return
+
+        self.__pad_column(field_name, row)
+        self.__append_value(field_name, value)
+
+    def get_value(self, row, field_name):
+        '''Returns the value of a field in the given row, or None if it is not present.'''
+        if field_name not in self._columns or row >= len(self._valid[field_name]) or self._valid[field_name][row] == 0:
+            return None
+
+        return self._columns[field_name][row]
+
+    def set_value(self, row, field_name, value):
+        '''Sets the value of a field in an existing row.'''
+        if row >= self._num_rows:
+            raise IndexError("FIT Runtime Error, row " + str(row) + " is out of range.")
+
+        if field_name not in self._columns:
+            self.__add_column(field_name, value)
+
+        self.__pad_column(field_name, self._num_rows)
+        column = self.__fit_column_to_value(field_name, value)
+        column[row] = value
+        self._valid[field_name][row] = 1
+
+    def to_dict(self, datetime64_fields=()):
+        '''
+        Returns the number of rows, the columns and their validity masks.
+
+        When NumPy is installed, integer columns of FIT timestamps whose names are in datetime64_fields
+        are returned as datetime64[s] arrays.
+        '''
+        columns = {}
+        valid = {}
+
+        for field_name in self._columns:
+            self.__pad_column(field_name, self._num_rows)
+
+            column = self._columns[field_name]
+            if numpy is not None:
+                if isinstance(column, array):
+                    column = numpy.frombuffer(column, dtype=_NUMPY_DTYPES[column.typecode])
+                    if field_name in datetime64_fields and column.dtype.kind == 'i':
+                        column = (column + FIT_EPOCH_S).astype('datetime64[s]')
+                columns[field_name] = column
+                valid[field_name] = numpy.frombuffer(self._valid[field_name], dtype='uint8').astype(bool)
+            else:
+                columns[field_name] = column
+                valid[field_name] = self._valid[field_name]
+
+        return {
+            'num_rows': self._num_rows,
+            'columns': columns,
+            'valid': valid,
+        }
+
+    def __add_column(self, field_name, value):
+        type_code = self.__get_type_code(value)
+        self._columns[field_name] = array(type_code) if type_code is not None else []
+        self._valid[field_name] = array('B')
+
+    def __pad_column(self, field_name, num_rows):
+        valid = self._valid[field_name]
+        missing = num_rows - len(valid)
+        if missing <= 0:
+            return
+
+        column = self._columns[field_name]
+        if isinstance(column, array):
+            column.extend(array(column.typecode, bytes(missing * column.itemsize)))
+        else:
+            column.extend([None] * missing)
+
+        valid.extend(bytes(missing))
+
+    def __append_value(self, field_name, value):
+        column = self.__fit_column_to_value(field_name, value)
+        column.append(value)
+        self._valid[field_name].append(1)
+
+    def __fit_column_to_value(self, field_name, value):
+        '''Widens the column's storage so that it can hold the given value.'''
+        column = self._columns[field_name]
+        if not isinstance(column, array):
+            return column
+
+        type_code = self.__get_type_code(value)
+        if type_code == column.typecode:
+            return column
+
+        if type_code == _FLOAT_TYPE_CODE and column.typecode == _INT_TYPE_CODE:
+            column = array(_FLOAT_TYPE_CODE, column)
+        elif type_code == _INT_TYPE_CODE and column.typecode == _FLOAT_TYPE_CODE and self.__fits_int64(value):
+            return column
+        else:
+            column = self.__column_to_list(field_name, column)
+
+        self._columns[field_name] = column
+        return column
+
+    def __column_to_list(self, field_name, column):
+        valid = self._valid[field_name]
+        return [value if valid[i] else None for i, value in enumerate(column)]
+
+    @staticmethod
+    def __get_type_code(value):
+        if isinstance(value, bool):
+            return None
+
+        if isinstance(value, int):
+            return _INT_TYPE_CODE if MessageColumns.__fits_int64(value) else None
+
+        if isinstance(value, float):
+            return _FLOAT_TYPE_CODE
+
+        return None
+
+    @staticmethod
+    def __fits_int64(value):
+        return -0x8000000000000000 <= value <= 0x7FFFFFFFFFFFFFFF
@@ -2,7 +2,8 @@
     1. From a binary .fit file
     2. From a Python bytearray
     3. From a Python BytesIO object
-    4. From a Python BufferedReader'''
+    4. From a Python BufferedReader
+    5. From a memory-mapped .fit file or any object supporting the buffer protocol (zero-copy)'''
 
 ###########################################################################################
 # Copyright 2025 Garmin International, Inc.
@@ -16,10 +17,11 @@
 ############################################################################################
 
 
+import mmap
 import os
 from enum import Enum
 from io import BufferedReader, BytesIO
-from struct import unpack
+from struct import unpack, unpack_from
 
 
 class Endianness(str, Enum):
@@ -70,6 +72,26 @@ class Stream:
         stream = Stream(buffered_reader, length)
         return stream
 
+    @staticmethod
+    def from_mmap(filename):
+        '''Creates a zero-copy stream object from a memory-mapped .fit file'''
+        with open(filename, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return BufferStream(memoryview(b''))
+
+            mapped_file = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return BufferStream(memoryview(mapped_file), mapped_file)
+
+    @staticmethod
+    def from_buffer(buffer, length = None):
+        '''Creates a zero-copy stream object from a memoryview or any object supporting the buffer protocol'''
+        view = memoryview(buffer).cast('B')
+        if length is not None:
+            view = view[0:length]
+
+        return BufferStream(view)
+
     @staticmethod
     def __calc_stream_size(buffered_reader: BufferedReader):
         starting_position = buffered_reader.tell()
@@ -87,6 +109,9 @@ class Stream:
     def __del__(self):
         self.close()
 
+    def __enter__(self):
+        return self
+
     def __exit__(self, *_):
         self.close()
 
@@ -121,7 +146,7 @@ class Stream:
     def read_byte(self):
         '''Reads one byte from the stream.'''
         if self.position() > self._stream_length - 1:
-            raise IndexError("FIT Runtime Error, end of file reached at byte pos: " + self.position())
+            raise IndexError("FIT Runtime Error, end of file reached at byte pos: " + str(self.position()))
         return self.read_bytes(1)[0]
 
     def read_bytes(self, num_bytes: int):
@@ -132,10 +157,25 @@ class Stream:
         read_bytes = self._buffered_reader.read(num_bytes)[0:num_bytes]
 
         if self._crc_calculator is not None:
-            self._crc_calculator.add_bytes(read_bytes, 0, num_bytes)
+            self._crc_calculator.update(read_bytes)
 
         return read_bytes
 
+    def read_view(self, num_bytes: int):
+        '''Reads the given amount of bytes from the stream, as a view into the stream's buffer when it has one.'''
+        return self.read_bytes(num_bytes)
+
+    def skip_bytes(self, num_bytes: int):
+        '''Advances the stream position past the given amount of bytes without returning them.'''
+        if num_bytes > (self._stream_length - self.position()):
+            raise IndexError("FIT Runtime Error number of bytes provided is longer than the number of bytes remaining")
+
+        # The CRC has to see every byte, so only seek when it is not being calculated
+        if self._crc_calculator is not None:
+            self.read_bytes(num_bytes)
+        else:
+            self.seek(self.position() + num_bytes)
+
     def read_unint_16(self, endianness: Endianness = Endianness.LITTLE):
         '''Reads a 16-bit unsigned integer from the stream with the given endianness'''
         return int.from_bytes(self.read_bytes(2), endianness)
@@ -169,6 +209,10 @@ class Stream:
 
         return values
 
+    def read_struct(self, compiled_struct):
+        '''Reads the bytes of a precompiled struct.Struct from the stream and returns the unpacked tuple'''
+        return compiled_struct.unpack(self.read_bytes(compiled_struct.size))
+
     def get_crc_caclulator(self):
         '''Returns the CRC calculator'''
         return self._crc_calculator
@@ -176,3 +220,120 @@ class Stream:
     def set_crc_calculator(self, crc_calculator):
         '''Sets the CRC calculator'''
         self._crc_calculator = crc_calculator
+
+
+class BufferStream(Stream):
+    '''
+    A stream of data from a .fit file held in memory, e.g. a memory-mapped file.
+
+    Reads index directly into the buffer with an integer offset and unpack structs in place,
+    so reading does not go through a BufferedReader or copy the message bytes.
+
+    Attributes:
+        _buffer:          A flat memoryview of unsigned bytes holding the stream data.
+        _mmap:            The memory map backing the buffer, if the stream owns one.
+        _offset:          The current position in the stream.
+        _stream_length:   The length of the stream.
+        _crc_calculator:  The CRC calculator which calculates the CRC each time bytes are read.
+    '''
+    def __init__(self, buffer: memoryview, mapped_file = None):
+        self._buffer = buffer
+        self._mmap = mapped_file
+        self._offset = 0
+        self._stream_length = len(buffer)
+
+        self._crc_calculator = None
+
+    def close(self):
+        '''Releases the buffer and closes the memory map in the stream.'''
+        if self._buffer is None:
+            return
+
+        self._buffer.release()
+        self._buffer = None
+
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def get_buffered_reader(self):
+        '''Returns None since the stream is not backed by a buffered reader.'''
+        return None
+
+    def get_buffer(self):
+        '''Returns the memoryview of the stream.'''
+        return self._buffer
+
+    def peek_byte(self):
+        '''Reads one byte from the stream without advancing stream position.'''
+        return self._buffer[self._offset]
+
+    def peek_bytes(self, num_bytes: int):
+        '''Reads the given amount of bytes from the stream without advancing stream position '''
+        return self._buffer[self._offset:self._offset + num_bytes].tobytes()
+
+    def slice(self, start: int, end: int):
+        '''Returns all of the bytes from the stream between the given start and end.'''
+        return self._buffer[start:end].tobytes()
+
+    def seek(self, position: int):
+        '''Moves the stream position of stream to the given position.'''
+        self._offset = position
+
+    def read_byte(self):
+        '''Reads one byte from the stream.'''
+        offset = self._offset
+        if offset > self._stream_length - 1:
+            raise IndexError("FIT Runtime Error, end of file reached at byte pos: " + str(offset))
+
+        value = self._buffer[offset]
+        self._offset = offset + 1
+
+        if self._crc_calculator is not None:
+            self._crc_calculator.update((value,))
+
+        return value
+
+    def read_bytes(self, num_bytes: int):
+        '''Reads the given amount of bytes from the stream.'''
+        return self.read_view(num_bytes).tobytes()
+
+    def skip_bytes(self, num_bytes: int):
+        '''Advances the stream position past the given amount of bytes without returning them.'''
+        self.read_view(num_bytes)
+
+    def reset(self):
+        '''Resets the stream position to the beginning of the stream.'''
+        self._offset = 0
+
+    def position(self):
+        '''Returns the current position in the stream.'''
+        return self._offset
+
+    def read_and_unpack(self, size: int, struct_format_string):
+        '''Reads a given number of bytes and unpacks the binary struct given a formatting string template'''
+        offset = self._offset
+        self.read_view(size)
+
+        return list(unpack_from(struct_format_string, self._buffer, offset))
+
+    def read_struct(self, compiled_struct):
+        '''Unpacks a precompiled struct.Struct in place at the current position and advances past it'''
+        offset = self._offset
+        self.read_view(compiled_struct.size)
+
+        return compiled_struct.unpack_from(self._buffer, offset)
+
+    def read_view(self, num_bytes: int):
+        '''Advances past the given amount of bytes, feeding them to the CRC calculator, and returns a view of them without copying.'''
+        offset = self._offset
+        if num_bytes > (self._stream_length - offset):
+            raise IndexError("FIT Runtime Error number of bytes provided is longer than the number of bytes remaining")
+
+        self._offset = offset + num_bytes
+        view = self._buffer[offset:self._offset]
+
+        if self._crc_calculator is not None:
+            self._crc_calculator.update(view)
+
+        return view
@@ -12,14 +12,15 @@
 ############################################################################################
 
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 FIT_EPOCH_S = 631065600
+FIT_EPOCH = datetime(1989, 12, 31, tzinfo=timezone.utc)
 
 def convert_timestamp_to_datetime(timestamp):
     '''Takes a FIT datetime timestamp and converts it to a python datetime in utc'''
-    utc_datetime = datetime.fromtimestamp((timestamp if timestamp else 0) + FIT_EPOCH_S, timezone.utc)
-    return utc_datetime.replace(tzinfo=timezone.utc)
+    # Adding a timedelta to the epoch avoids the time zone conversion done by datetime.fromtimestamp
+    return FIT_EPOCH + timedelta(seconds=timestamp) if timestamp else FIT_EPOCH
 
 def _convert_string(string):
     '''Takes a string and converts it according to the fit protocol standard.'''
@@ -0,0 +1,77 @@
+'''bench_components.py: Compares extracting field components bit by bit with a BitStream and with the shift and mask plan used by the Decoder.
+
+Run from the py directory with: python -m tests.bench_components
+'''
+
+###########################################################################################
+# Copyright 2025 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+import glob
+import timeit
+
+from garmin_fit_sdk import BitStream, Decoder, Stream
+from garmin_fit_sdk import fit as FIT
+
+_REPEAT = 5
+_NUMBER = 10000
+
+# compressed_speed_distance: three bytes holding a 12 bit speed and a 12 bit distance
+_BYTES = [0x10, 0x32, 0x54]
+_BITS = [12, 12]
+
+
+def _read_bit_by_bit():
+    bit_stream = BitStream(_BYTES, FIT.BASE_TYPE['BYTE'])
+    values = []
+    for bits in _BITS:
+        value = 0
+        for i in range(bits):
+            value |= bit_stream.read_bit() << i
+        values.append(value)
+    return values
+
+
+def _read_bits():
+    bit_stream = BitStream(_BYTES, FIT.BASE_TYPE['BYTE'])
+    return [bit_stream.read_bits(bits) for bits in _BITS]
+
+
+def _shift_and_mask():
+    packed_value = 0
+    for i, element in enumerate(_BYTES):
+        packed_value |= (element & 0xFF) << (i * 8)
+    return [(packed_value >> 0) & 0xFFF, (packed_value >> 12) & 0xFFF]
+
+
+def _best_time(function, number=1):
+    return min(timeit.repeat(function, number=number, repeat=_REPEAT)) / number
+
+
+def main():
+    '''Prints the component extraction timings and the decode timings with and without component expansion.'''
+    assert _read_bit_by_bit() == _read_bits() == _shift_and_mask()
+
+    for name, function in [('bit by bit', _read_bit_by_bit), ('BitStream.read_bits', _read_bits), ('shift and mask', _shift_and_mask)]:
+        print(f"{name:<24}{_best_time(function, _NUMBER) * 1e6:>10.2f} us")
+    print()
+
+    print(f"{'file':<40}{'read (ms)':>12}{'no components (ms)':>20}")
+    for file in sorted(glob.glob('tests/fits/*.fit') + glob.glob('../examples/Activity.fit')):
+        with open(file, 'rb') as fit_file:
+            data = fit_file.read()
+
+        # Merging heart rates requires expanded components, so it is disabled for both
+        read_time = _best_time(lambda: Decoder(Stream.from_byte_array(data)).read(merge_heart_rates=False))
+        no_components_time = _best_time(
+            lambda: Decoder(Stream.from_byte_array(data)).read(expand_components=False, merge_heart_rates=False))
+
+        print(f"{file:<40}{read_time * 1000:>12.1f}{no_components_time * 1000:>20.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+'''bench_crc_calculator.py: Compares the table driven CrcCalculator with the nibble based CRC on the test FIT files.
+
+Run from the py directory with: python -m tests.bench_crc_calculator
+'''
+
+###########################################################################################
+# Copyright 2025 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+import glob
+import timeit
+
+from garmin_fit_sdk import CrcCalculator, Decoder, Stream
+
+from tests.test_crc_calculator import nibble_crc
+
+_REPEAT = 5
+
+
+def _best_time(function, number=1):
+    return min(timeit.repeat(function, number=number, repeat=_REPEAT)) / number
+
+
+def main():
+    '''Prints the CRC and decode timings for every file in tests/fits.'''
+    print(f"{'file':<40}{'nibble (ms)':>14}{'table (ms)':>14}{'speedup':>10}{'read (ms)':>12}{'no crc (ms)':>14}")
+
+    for file in sorted(glob.glob('tests/fits/*.fit')):
+        with open(file, 'rb') as fit_file:
+            data = fit_file.read()
+
+        assert CrcCalculator.calculate_crc(data, 0, len(data)) == nibble_crc(data, 0, len(data))
+
+        nibble_time = _best_time(lambda: nibble_crc(data, 0, len(data)))
+        table_time = _best_time(lambda: CrcCalculator.calculate_crc(data, 0, len(data)))
+        read_time = _best_time(lambda: Decoder(Stream.from_byte_array(data)).read())
+        read_without_crc_time = _best_time(lambda: Decoder(Stream.from_byte_array(data)).read(enable_crc_check=False))
+
+        print(f"{file:<40}{nibble_time * 1000:>14.2f}{table_time * 1000:>14.2f}{nibble_time / table_time:>9.1f}x"
+              f"{read_time * 1000:>12.1f}{read_without_crc_time * 1000:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+'''bench_import.py: Compares the cold-start time of importing the SDK with the lazily loaded and the eagerly imported profile.
+
+Run from the py directory with: python -m tests.bench_import
+'''
+
+###########################################################################################
+# Copyright 2025 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+import os
+import subprocess
+import sys
+import time
+
+_REPEAT = 20
+
+_CASES = [
+    ('python startup', 'pass'),
+    ('import garmin_fit_sdk (lazy profile)', 'import garmin_fit_sdk'),
+    ('import garmin_fit_sdk + profile.py', 'import garmin_fit_sdk, garmin_fit_sdk.profile'),
+    ('decode (lazy profile)',
+     'from garmin_fit_sdk import Decoder, Stream; Decoder(Stream.from_file("tests/fits/HrmPluginTestActivity.fit")).read()'),
+    ('decode + profile.py',
+     'import garmin_fit_sdk.profile; from garmin_fit_sdk import Decoder, Stream; '
+     'Decoder(Stream.from_file("tests/fits/HrmPluginTestActivity.fit")).read()'),
+]
+
+
+def _best_time(code):
+    best = None
+    for _ in range(_REPEAT):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def main():
+    '''Prints the best wall time of a fresh interpreter for each case.'''
+    # Write the bytecode and profile caches first so only the cold start of the interpreter is measured
+    env = {key: value for key, value in os.environ.items() if key != 'PYTHONDONTWRITEBYTECODE'}
+    subprocess.run([sys.executable, '-m', 'compileall', '-q', 'garmin_fit_sdk'], check=True, env=env)
+    subprocess.run([sys.executable, '-c', 'from garmin_fit_sdk import Profile; Profile.load()'], check=True, env=env)
+
+    for name, code in _CASES:
+        print(f"{name:<40}{_best_time(code) * 1000:>10.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
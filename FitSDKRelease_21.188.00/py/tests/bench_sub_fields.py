@@ -0,0 +1,40 @@
+'''bench_sub_fields.py: Compares decoding with and without sub field expansion.
+
+Run from the py directory with: python -m tests.bench_sub_fields
+'''
+
+###########################################################################################
+# Copyright 2025 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+import glob
+import timeit
+
+from garmin_fit_sdk import Decoder, Stream
+
+_REPEAT = 10
+
+
+def _best_time(function):
+    return min(timeit.repeat(function, number=1, repeat=_REPEAT))
+
+
+def main():
+    '''Prints the decode timings with and without sub field expansion for each test file.'''
+    print(f"{'file':<40}{'read (ms)':>12}{'no sub fields (ms)':>20}")
+    for file in sorted(glob.glob('tests/fits/*.fit') + glob.glob('../examples/Activity.fit')):
+        with open(file, 'rb') as fit_file:
+            data = fit_file.read()
+
+        read_time = _best_time(lambda: Decoder(Stream.from_byte_array(data)).read())
+        no_sub_fields_time = _best_time(lambda: Decoder(Stream.from_byte_array(data)).read(expand_sub_fields=False))
+
+        print(f"{file:<40}{read_time * 1000:>12.1f}{no_sub_fields_time * 1000:>20.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+'''bench_timestamps.py: Compares converting FIT timestamps with datetime.fromtimestamp and with a timedelta from the cached epoch.
+
+Run from the py directory with: python -m tests.bench_timestamps
+'''
+
+###########################################################################################
+# Copyright 2025 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+import glob
+import timeit
+from datetime import datetime, timezone
+
+from garmin_fit_sdk import Decoder, Stream, util
+
+_REPEAT = 5
+_NUMBER = 100000
+_TIMESTAMP = 995749880
+
+
+def _fromtimestamp(timestamp):
+    utc_datetime = datetime.fromtimestamp((timestamp if timestamp else 0) + util.FIT_EPOCH_S, timezone.utc)
+    return utc_datetime.replace(tzinfo=timezone.utc)
+
+
+def _best_time(function, number=1):
+    return min(timeit.repeat(function, number=number, repeat=_REPEAT)) / number
+
+
+def _count_messages(messages):
+    return sum(len(mesgs) for mesgs in messages.values())
+
+
+def main():
+    '''Prints the per conversion timings and the per message cost of converting timestamps while decoding.'''
+    assert _fromtimestamp(_TIMESTAMP) == util.convert_timestamp_to_datetime(_TIMESTAMP)
+
+    fromtimestamp_time = _best_time(lambda: _fromtimestamp(_TIMESTAMP), _NUMBER)
+    epoch_time = _best_time(lambda: util.convert_timestamp_to_datetime(_TIMESTAMP), _NUMBER)
+    print(f"{'fromtimestamp':<24}{fromtimestamp_time * 1e9:>10.0f} ns")
+    print(f"{'epoch + timedelta':<24}{epoch_time * 1e9:>10.0f} ns")
+    print()
+
+    print(f"{'file':<40}{'messages':>10}{'datetimes (us/mesg)':>22}{'raw (us/mesg)':>16}")
+    for file in sorted(glob.glob('tests/fits/*.fit') + glob.glob('../examples/MonitoringFile.fit')):
+        with open(file, 'rb') as fit_file:
+            data = fit_file.read()
+
+        messages, _ = Decoder(Stream.from_byte_array(data)).read()
+        num_messages = _count_messages(messages)
+
+        datetimes_time = _best_time(lambda: Decoder(Stream.from_byte_array(data)).read())
+        raw_time = _best_time(lambda: Decoder(Stream.from_byte_array(data)).read(convert_datetimes_to_dates=False))
+
+        print(f"{file:<40}{num_messages:>10}{datetimes_time / num_messages * 1e6:>22.2f}{raw_time / num_messages * 1e6:>16.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -146,6 +146,28 @@ class TestFromInteger:
             assert actual == expected
             index += 1
 
+@pytest.mark.parametrize(
+    "data,base_type,bits_to_read",
+    [
+        ([0x10, 0x32, 0x54, 0x76], FIT.BASE_TYPE['UINT8'], [3, 7, 11, 5, 6]),
+        ([0xABCD, 0x1234, 0xFFFF], FIT.BASE_TYPE['UINT16'], [12, 12, 12, 12]),
+        (0xDEADBEEF, FIT.BASE_TYPE['UINT32'], [1, 30, 1]),
+        ([0x12345678, 0x9ABCDEF0], FIT.BASE_TYPE['UINT32'], [20, 24, 20]),
+    ],
+)
+def test_read_bits_matches_read_bit(data, base_type, bits_to_read):
+    '''Tests that reading several bits at once across element boundaries matches reading them one at a time.'''
+    bit_stream = BitStream(data, base_type)
+    reference = BitStream(data, base_type)
+
+    for number_bits in bits_to_read:
+        expected = 0
+        for i in range(number_bits):
+            expected |= reference.read_bit() << i
+
+        assert bit_stream.read_bits(number_bits) == expected
+        assert bit_stream.bits_available() == reference.bits_available()
+
 def test_exception_raised_big_overstep():
     '''Test that makes sure that an index error exception is raised when reading too many bits.'''
     try:
@@ -43,3 +43,55 @@ def test_file_crc(data, crc_expected, is_correct_crc, file_length):
         assert (
             CrcCalculator.calculate_crc(data, 0, file_length) == crc_expected
         ) == is_correct_crc
+
+
+def nibble_crc(buffer, start, end):
+    '''Reference CRC implementation using the FIT protocol's 16-entry nibble table.'''
+    nibble_table = [
+        0x0000, 0xCC01, 0xD801, 0x1400, 0xF001, 0x3C00, 0x2800, 0xE401,
+        0xA001, 0x6C00, 0x7800, 0xB401, 0x5000, 0x9C01, 0x8801, 0x4400
+    ]
+
+    crc = 0
+    for i in range(start, end):
+        value = buffer[i]
+
+        temp = nibble_table[crc & 0xF]
+        crc = (crc >> 4) & 0x0FFF
+        crc = crc ^ temp ^ nibble_table[value & 0xF]
+
+        temp = nibble_table[crc & 0xF]
+        crc = (crc >> 4) & 0x0FFF
+        crc = crc ^ temp ^ nibble_table[(value >> 4) & 0xF]
+
+    return crc
+
+
+@pytest.mark.parametrize(
+    "file",
+    [
+        ('tests/fits/ActivityDevFields.fit'),
+        ('tests/fits/HrmPluginTestActivity.fit'),
+        ('tests/fits/WithGearChangeData.fit'),
+    ],
+)
+def test_crc_matches_nibble_implementation(file):
+    '''Tests that the table driven CRC matches the nibble based CRC on whole files.'''
+    with open(file, 'rb') as fit_file:
+        data = fit_file.read()
+
+    assert CrcCalculator.calculate_crc(data, 0, len(data)) == nibble_crc(data, 0, len(data))
+    assert CrcCalculator.calculate_crc(data, 0, len(data)) == 0
+
+
+def test_update_in_chunks():
+    '''Tests that updating the CRC with chunks of bytes, bytearrays and memoryviews gives the same CRC as one update.'''
+    data = bytes(Data.fit_file_short)
+
+    crc_calculator = CrcCalculator()
+    crc_calculator.update(data[0:5])
+    crc_calculator.update(bytearray(data[5:20]))
+    crc_calculator.update(memoryview(data)[20:len(data) - 2])
+
+    assert crc_calculator.get_crc() == 0x4F87
+    assert crc_calculator.get_crc() == CrcCalculator.calculate_crc(data, 0, len(data) - 2)
@@ -11,7 +11,7 @@
 from datetime import datetime, timezone
 
 import pytest
-from garmin_fit_sdk import Decoder, Stream, CrcCalculator
+from garmin_fit_sdk import Decoder, FitEnum, Stream, CrcCalculator, Profile
 from garmin_fit_sdk.decoder import DecodeMode
 
 from tests.data import Data
@@ -206,14 +206,22 @@ class TestDecoderRead():
         messages, errors = decoder.read()
         assert len(errors) == 0 and len(messages) == 0
 
-    def test_compressed_timestamp_message_should_throw(self):
-        '''Tests that the decoder should throw an error when reading a message with a compressed timestamp'''
+    def test_compressed_timestamp_message(self):
+        '''Tests that the decoder reads a message with a compressed timestamp header'''
         stream = Stream.from_byte_array(Data.fit_file_short_compressed_timestamp)
         decoder = Decoder(stream)
-        messages, errors = decoder.read()
+        messages, errors = decoder.read(enable_crc_check=False)
 
-        assert len(errors) == 1
-        assert "Compressed timestamp messages are not currently supported" in str(errors[0])
+        assert len(errors) == 0
+        assert len(messages['file_id_mesgs']) == 1
+        assert messages['file_id_mesgs'][0]['product_name'] == 'abcdefghi'
+        # File Id messages do not have a timestamp field in the profile, so the compressed timestamp is not added
+        assert 253 not in messages['file_id_mesgs'][0]
+        assert 'timestamp' not in messages['file_id_mesgs'][0]
+
+        columns, errors = Decoder(Stream.from_byte_array(Data.fit_file_short_compressed_timestamp)).read_columnar(enable_crc_check=False)
+        assert len(errors) == 0
+        assert set(columns['file_id_mesgs']['columns']) == set(messages['file_id_mesgs'][0])
 
     def test_read_incorrect_field_def_size(self):
         '''Tests that the decoder doesn't break when reading a message with an incorrect field definition size.'''
@@ -392,7 +400,7 @@ class TestDecoderRead():
     )
     def test_enable_crc_options(self, mocker, option_status):
         '''Tests enabling and disabling CRC calculation when decoding a FIT file.'''
-        spy_add_bytes = mocker.spy(CrcCalculator, "add_bytes")
+        spy_update = mocker.spy(CrcCalculator, "update")
         spy_get_crc = mocker.spy(CrcCalculator, "get_crc")
 
         stream = Stream.from_byte_array(Data.fit_file_short)
@@ -405,7 +413,7 @@ class TestDecoderRead():
 
         assert len(errors) == 0
 
-        assert spy_add_bytes.call_count == 0 if option_status is False else spy_add_bytes.call_count > 0
+        assert spy_update.call_count == 0 if option_status is False else spy_update.call_count > 0
         assert spy_get_crc.call_count == 0 if option_status is False else spy_get_crc.call_count > 0
 
     @pytest.mark.parametrize(
@@ -490,6 +498,20 @@ class TestDecoderRead():
         for mesg, distance in zip(duration_distance_workout_step_mesgs, distances):
             assert mesg['duration_distance'] == distance
 
+    def test_expand_sub_fields_does_not_change_main_field(self):
+        '''Tests that scaling a sub field leaves the value of the field it was expanded from unchanged'''
+        stream = Stream.from_byte_array(Data.fit_file_800m_repeats_little_endian)
+        decoder = Decoder(stream)
+        messages, errors = decoder.read(merge_heart_rates=False)
+
+        assert len(errors) == 0
+
+        duration_distance_workout_step_mesgs = [mesg for mesg in messages['workout_step_mesgs'] if 'duration_distance' in mesg]
+
+        assert len(duration_distance_workout_step_mesgs) == 4
+        for mesg in duration_distance_workout_step_mesgs:
+            assert mesg['duration_value'] == mesg['duration_distance'] * 100
+
     def test_messages_with_no_fields(self):
         '''Tests reading messages with no fields assigned in their message definition'''
         stream = Stream.from_byte_array(Data.fit_file_messages_with_no_fields)
@@ -631,6 +653,22 @@ class TestMergeHeartrates:
         messages, errors = decoder.read(apply_scale_and_offset=False)
         assert len(errors) == 1
 
+    def test_datetime64_columns(self):
+        '''Tests that date_time columns are returned as NumPy datetime64 values when requested.'''
+        numpy = pytest.importorskip('numpy')
+
+        messages, errors = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).read()
+        assert len(errors) == 0
+
+        columns, errors = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).read_columnar(
+            convert_datetimes_to_datetime64=True)
+        assert len(errors) == 0
+
+        timestamps = columns['record_mesgs']['columns']['timestamp']
+        assert timestamps.dtype == numpy.dtype('datetime64[s]')
+        assert timestamps[0].item() == messages['record_mesgs'][0]['timestamp'].replace(tzinfo=None)
+        assert columns['session_mesgs']['columns']['start_time'].dtype == numpy.dtype('datetime64[s]')
+
     def test_merge_heart_rate_fails_without_expand_components(self):
         '''Tests to ensure that decoding fails when merge_heart_rates == True but expand_components == False'''
         stream = Stream.from_file('tests/fits/HrmPluginTestActivity.fit')
@@ -721,3 +759,310 @@ def test_mesg_listener():
 
     assert len(errors) == 1
     assert str(errors[0]) == "The message listener was called!"
+
+class TestBufferStreamDecoding:
+    '''Set of tests which verify that zero-copy streams decode the same as file streams.'''
+    @pytest.mark.parametrize(
+        "file",
+        [
+            ('tests/fits/ActivityDevFields.fit'),
+            ('tests/fits/HrmPluginTestActivity.fit'),
+            ('tests/fits/WithGearChangeData.fit'),
+        ],
+    )
+    def test_read_from_mmap_and_buffer(self, file):
+        '''Tests that reading from a memory-mapped file and from a memoryview matches reading from a file.'''
+        expected_messages, expected_errors = Decoder(Stream.from_file(file)).read()
+        assert len(expected_errors) == 0
+
+        with open(file, 'rb') as fit_file:
+            data = fit_file.read()
+
+        for stream in [Stream.from_mmap(file), Stream.from_buffer(memoryview(data))]:
+            decoder = Decoder(stream)
+            assert decoder.is_fit() is True
+            assert decoder.check_integrity() is True
+            stream.reset()
+
+            messages, errors = decoder.read()
+            assert len(errors) == 0
+            assert messages == expected_messages
+            stream.close()
+
+
+class TestCompressedTimestamps:
+    '''Set of tests which verify decoding messages with compressed timestamp headers.'''
+    MESSAGES = bytearray([
+        0x40, 0x00, 0x00, 0x14, 0x00, 0x02, 0xFD, 0x04, 0x86, 0x03, 0x01, 0x02, # Record Definition with timestamp and heart_rate
+        0x41, 0x00, 0x00, 0x14, 0x00, 0x01, 0x03, 0x01, 0x02, # Record Definition with heart_rate only
+        0x42, 0x00, 0x00, 0x15, 0x00, 0x02, 0xFD, 0x04, 0x86, 0x00, 0x01, 0x00, # Event Definition with timestamp and event
+        0x00, 0xE8, 0x03, 0x00, 0x00, 0x64, # Record timestamp = 1000, heart_rate = 100
+        0xAA, 0x65, # Compressed Record, time offset = 10 -> timestamp = 1002, heart_rate = 101
+        0xA2, 0x66, # Compressed Record, time offset = 2 rolls over -> timestamp = 1026, heart_rate = 102
+        0x02, 0xD0, 0x07, 0x00, 0x00, 0x00, # Event timestamp = 2000
+        0xB1, 0x67, # Compressed Record, time offset = 17 -> timestamp = 2001, heart_rate = 103
+    ])
+
+    @staticmethod
+    def build_fit_file(messages):
+        '''Wraps the given messages with a file header and CRC.'''
+        header = bytearray([0x0E, 0x20, 0x8B, 0x08]) + len(messages).to_bytes(4, 'little') + bytearray(b'.FIT')
+        header += CrcCalculator.calculate_crc(header, 0, len(header)).to_bytes(2, 'little')
+        fit_file = header + messages
+        return fit_file + CrcCalculator.calculate_crc(fit_file, 0, len(fit_file)).to_bytes(2, 'little')
+
+    def test_read_compressed_timestamps(self):
+        '''Tests that the time offsets roll forward from the last full timestamp, including across a rollover.'''
+        stream = Stream.from_byte_array(self.build_fit_file(self.MESSAGES))
+        messages, errors = Decoder(stream).read(convert_datetimes_to_dates=False)
+
+        assert len(errors) == 0
+        assert [(mesg['timestamp'], mesg['heart_rate']) for mesg in messages['record_mesgs']] == \
+            [(1000, 100), (1002, 101), (1026, 102), (2001, 103)]
+        assert messages['event_mesgs'][0]['timestamp'] == 2000
+
+    def test_read_compressed_timestamps_as_datetimes(self):
+        '''Tests that compressed timestamps are converted to datetimes the same as full timestamps.'''
+        stream = Stream.from_byte_array(self.build_fit_file(self.MESSAGES))
+        messages, errors = Decoder(stream).read()
+
+        assert len(errors) == 0
+        assert messages['record_mesgs'][1]['timestamp'] == datetime.fromtimestamp(631065600 + 1002, timezone.utc)
+
+    def test_skipped_messages_update_last_timestamp(self):
+        '''Tests that timestamps of skipped message types are still used for following compressed timestamps.'''
+        stream = Stream.from_byte_array(self.build_fit_file(self.MESSAGES))
+        messages, errors = Decoder(stream).read(convert_datetimes_to_dates=False, exclude_mesgs=['event'])
+
+        assert len(errors) == 0
+        assert 'event_mesgs' not in messages
+        assert messages['record_mesgs'][3]['timestamp'] == 2001
+
+
+class TestReadColumnar:
+    '''Set of tests which verify decoding messages into columns.'''
+    @pytest.mark.parametrize(
+        "file",
+        [
+            ('tests/fits/ActivityDevFields.fit'),
+            ('tests/fits/WithGearChangeData.fit'),
+            ('tests/fits/HrmPluginTestActivity.fit'),
+        ], ids=["Developer Fields", "Sub Fields and Components", "Merged Heart Rates"]
+    )
+    def test_columns_match_read(self, file):
+        '''Tests that the columns hold the same values as the messages returned by read.'''
+        messages, errors = Decoder(Stream.from_file(file)).read(convert_datetimes_to_dates=False, convert_types_to_strings=False)
+        assert len(errors) == 0
+
+        columns, errors = Decoder(Stream.from_file(file)).read_columnar()
+        assert len(errors) == 0
+
+        for messages_key, mesgs in ((key, mesgs) for key, mesgs in messages.items() if len(mesgs) > 0):
+            table = columns[messages_key]
+            assert table['num_rows'] == len(mesgs)
+
+            for field_name, column in table['columns'].items():
+                valid = table['valid'][field_name]
+                for row, message in enumerate(mesgs):
+                    assert message.get(field_name) == (column[row] if valid[row] else None)
+
+    @pytest.mark.parametrize(
+        "options",
+        [
+            ({'expand_sub_fields': False}),
+            ({'expand_components': False, 'merge_heart_rates': False}),
+            ({'convert_types_to_strings': True, 'convert_datetimes_to_dates': True}),
+        ], ids=["Without Sub Fields", "Without Components", "Converted Types And Dates"]
+    )
+    def test_columns_match_read_with_options(self, options):
+        '''Tests that the columns decoded straight from the stream match read with other decode options.'''
+        options = {'convert_datetimes_to_dates': False, 'convert_types_to_strings': False, **options}
+        messages, errors = Decoder(Stream.from_file('tests/fits/WithGearChangeData.fit')).read(**options)
+        assert len(errors) == 0
+
+        columns, errors = Decoder(Stream.from_file('tests/fits/WithGearChangeData.fit')).read_columnar(**options)
+        assert len(errors) == 0
+
+        for messages_key, mesgs in messages.items():
+            table = columns[messages_key]
+            assert table['num_rows'] == len(mesgs)
+            assert set(table['columns']) == set(field_name for message in mesgs for field_name in message)
+
+            for field_name, column in table['columns'].items():
+                valid = table['valid'][field_name]
+                for row, message in enumerate(mesgs):
+                    assert message.get(field_name) == (column[row] if valid[row] else None)
+
+    def test_compressed_timestamp_columns(self):
+        '''Tests that compressed timestamps are written into the timestamp column.'''
+        stream = Stream.from_byte_array(TestCompressedTimestamps.build_fit_file(TestCompressedTimestamps.MESSAGES))
+        columns, errors = Decoder(stream).read_columnar()
+        assert len(errors) == 0
+
+        records = columns['record_mesgs']
+        assert list(records['columns']['timestamp']) == [1000, 1002, 1026, 2001]
+        assert list(records['columns']['heart_rate']) == [100, 101, 102, 103]
+
+    def test_record_columns(self):
+        '''Tests that record columns are typed and skip rows where a field is invalid.'''
+        columns, errors = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit')).read_columnar()
+        assert len(errors) == 0
+
+        records = columns['record_mesgs']
+        assert records['num_rows'] == 3601
+        assert records['columns']['altitude'][0] == -127
+        assert len(records['columns']['timestamp']) == len(records['valid']['timestamp']) == 3601
+
+    def test_merge_heart_rate_fails_without_expand_components(self):
+        '''Tests that reading columns fails when merge_heart_rates == True but expand_components == False'''
+        columns, errors = Decoder(Stream.from_file('tests/fits/HrmPluginTestActivity.fit')).read_columnar(expand_components=False)
+        assert len(errors) == 1
+
+class TestIterMessages:
+    '''Set of tests which verify decoding messages one at a time with the streaming generator.'''
+    def test_messages_match_read(self):
+        '''Tests that the generator yields the same messages, in the same order, as read.'''
+        stream = Stream.from_file('tests/fits/WithGearChangeData.fit')
+        decoder = Decoder(stream)
+
+        listened = []
+        def mesg_listener(mesg_num, message):
+            listened.append((mesg_num, message))
+
+        messages, errors = decoder.read(mesg_listener=mesg_listener)
+        assert len(errors) == 0
+
+        decoder = Decoder(Stream.from_file('tests/fits/WithGearChangeData.fit'))
+        iterated = list(decoder.iter_messages())
+
+        assert iterated == listened
+        assert decoder.get_num_messages() == 0
+
+    def test_developer_fields(self):
+        '''Tests that developer fields are decoded while streaming.'''
+        decoder = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit'))
+
+        sessions = [message for mesg_num, message in decoder.iter_messages() if mesg_num == Profile['mesg_num']['SESSION']]
+
+        assert len(sessions) == 1
+        assert sessions[0]['developer_fields'][2] == [-10, 12]
+
+    def test_merge_heart_rates(self):
+        '''Tests that heart rates are merged into records, which are yielded in file order, the same as read.'''
+        listened = []
+        def mesg_listener(mesg_num, message):
+            listened.append((mesg_num, message))
+
+        messages, errors = Decoder(Stream.from_file('tests/fits/HrmPluginTestActivity.fit')).read(mesg_listener=mesg_listener)
+        assert len(errors) == 0
+
+        iterated = list(Decoder(Stream.from_file('tests/fits/HrmPluginTestActivity.fit')).iter_messages())
+
+        assert iterated == listened
+        assert [message for mesg_num, message in iterated if mesg_num == Profile['mesg_num']['RECORD']] == messages['record_mesgs']
+
+    def test_without_merge_heart_rates(self):
+        '''Tests that records are not merged with heart rates when merge_heart_rates is disabled.'''
+        messages, errors = Decoder(Stream.from_file('tests/fits/HrmPluginTestActivity.fit')).read(merge_heart_rates=False)
+        assert len(errors) == 0
+
+        decoder = Decoder(Stream.from_file('tests/fits/HrmPluginTestActivity.fit'))
+        records = [message for mesg_num, message in decoder.iter_messages(merge_heart_rates=False)
+                   if mesg_num == Profile['mesg_num']['RECORD']]
+
+        assert records == messages['record_mesgs']
+
+    def test_errors_are_raised(self):
+        '''Tests that decoding errors are raised by the generator.'''
+        decoder = Decoder(Stream.from_byte_array(Data.fit_file_short_invalid_CRC))
+
+        with pytest.raises(RuntimeError):
+            list(decoder.iter_messages())
+
+class TestMesgFiltering:
+    '''Set of tests which verify including and excluding message types when decoding.'''
+    @pytest.mark.parametrize(
+        "include_mesgs,exclude_mesgs,expected_keys",
+        [
+            (['record', 'file_id'], None, ['file_id_mesgs', 'record_mesgs']),
+            ([20, 0], None, ['file_id_mesgs', 'record_mesgs']),
+            (None, ['record', 'EVENT'], ['activity_mesgs', 'file_id_mesgs']),
+            (['record', 'event'], [21], ['record_mesgs']),
+        ], ids=["Include By Name", "Include By Mesg Num", "Exclude By Name", "Include and Exclude"]
+    )
+    def test_filtered_read(self, include_mesgs, exclude_mesgs, expected_keys):
+        '''Tests that only the wanted message types are decoded and that they decode the same as without filtering.'''
+        all_messages, errors = Decoder(Stream.from_file('tests/fits/WithGearChangeData.fit')).read()
+        assert len(errors) == 0
+
+        decoder = Decoder(Stream.from_file('tests/fits/WithGearChangeData.fit'))
+        messages, errors = decoder.read(include_mesgs=include_mesgs, exclude_mesgs=exclude_mesgs)
+        assert len(errors) == 0
+
+        assert sorted(messages.keys()) == expected_keys
+        for messages_key in messages:
+            assert messages[messages_key] == all_messages[messages_key]
+
+    @pytest.mark.parametrize(
+        "enable_crc_check",
+        [
+            (True),
+            (False),
+        ], ids=["With CRC", "Without CRC"]
+    )
+    def test_skipped_mesgs_with_developer_data(self, enable_crc_check):
+        '''Tests that developer fields are still decoded when other message types are skipped.'''
+        decoder = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit'))
+        messages, errors = decoder.read(include_mesgs=['session'], enable_crc_check=enable_crc_check)
+
+        assert len(errors) == 0
+        assert 'record_mesgs' not in messages
+        assert messages['session_mesgs'][0]['developer_fields'][2] == [-10, 12]
+
+    def test_unknown_mesg_name(self):
+        '''Tests that an unknown message name is returned as an error.'''
+        decoder = Decoder(Stream.from_file('tests/fits/ActivityDevFields.fit'))
+        messages, errors = decoder.read(include_mesgs=['not_a_message'])
+
+        assert len(errors) == 1
+
+class TestConvertTypesToEnums:
+    '''Set of tests which verify decoding enum values as shared FitEnum values.'''
+    def test_enums_match_strings_and_ints(self):
+        '''Tests that FitEnum values print as the string values and compare equal to the integer values.'''
+        string_messages, errors = Decoder(Stream.from_file('tests/fits/WithGearChangeData.fit')).read()
+        assert len(errors) == 0
+        int_messages, errors = Decoder(Stream.from_file('tests/fits/WithGearChangeData.fit')).read(convert_types_to_strings=False)
+        assert len(errors) == 0
+        enum_messages, errors = Decoder(Stream.from_file('tests/fits/WithGearChangeData.fit')).read(convert_types_to_enums=True)
+        assert len(errors) == 0
+
+        for messages_key in string_messages:
+            for string_mesg, int_mesg, enum_mesg in zip(string_messages[messages_key], int_messages[messages_key],
+                                                        enum_messages[messages_key]):
+                for field_name, value in enum_mesg.items():
+                    if isinstance(value, FitEnum):
+                        assert str(value) == string_mesg[field_name]
+                        assert value == int_mesg[field_name]
+                    else:
+                        assert value == string_mesg[field_name]
+
+    def test_enums_are_shared(self):
+        '''Tests that messages with the same enum value share one FitEnum instance.'''
+        messages, errors = Decoder(Stream.from_file('tests/fits/WithGearChangeData.fit')).read(convert_types_to_enums=True)
+        assert len(errors) == 0
+
+        events = [mesg['event'] for mesg in messages['event_mesgs'] if str(mesg['event']) == 'rear_gear_change']
+        assert len(events) > 1
+        assert all(event is events[0] for event in events)
+        assert events[0].name == 'rear_gear_change' and events[0].type == 'event'
+
+    def test_unknown_values_are_not_converted(self):
+        '''Tests that values missing from the profile are left as integers.'''
+        stream = Stream.from_byte_array(Data.fit_file_short_new)
+        messages, errors = Decoder(stream).read(convert_types_to_enums=True)
+
+        assert len(errors) == 0
+        assert messages['file_id_mesgs'][0]['type'] == 4
+        assert repr(messages['file_id_mesgs'][0]['type']) == '<file.activity: 4>'
+
@@ -8,6 +8,8 @@
 ###########################################################################################
 
 
+import itertools
+
 from garmin_fit_sdk import hr_mesg_utils
 from garmin_fit_sdk.decoder import Decoder
 from garmin_fit_sdk.stream import Stream
@@ -49,3 +51,43 @@ def test_hr_mesgs_to_record_mesgs():
         assert message['timestamp'] == expected['timestamp']
         assert message['heart_rate'] == expected['heart_rate']
         index += 1
+
+def test_heart_rate_merger_merges_records_once_heart_rates_pass_them():
+    '''Tests that a record is merged as soon as a heart rate after its timestamp has been added.'''
+    heart_rate_merger = hr_mesg_utils.HeartRateMerger()
+    first_record = {'timestamp': 10}
+    second_record = {'timestamp': 11}
+
+    heart_rate_merger.add_record_mesg(first_record)
+    heart_rate_merger.add_hr_mesg({'timestamp': 9, 'fractional_timestamp': 0, 'event_timestamp': 0, 'filtered_bpm': 100})
+    assert heart_rate_merger.get_num_pending_records() == 1
+
+    heart_rate_merger.add_hr_mesg({'event_timestamp': [1.0, 2.0], 'filtered_bpm': [120, 130]})
+    assert heart_rate_merger.get_num_pending_records() == 0
+    assert first_record['heart_rate'] == 105
+
+    # No heart rate after the last record, so it is not merged
+    heart_rate_merger.add_record_mesg(second_record)
+    heart_rate_merger.finish()
+    assert heart_rate_merger.get_num_pending_records() == 0
+    assert 'heart_rate' not in second_record
+
+def test_heart_rate_merger_interleaved_messages():
+    '''Tests that merging heart rate and record messages as they are decoded matches merging them at the end.'''
+    stream = Stream.from_file("tests/fits/HrmPluginTestActivity.fit")
+    messages, errors = Decoder(stream).read(merge_heart_rates=False, convert_datetimes_to_dates=False)
+    assert len(errors) == 0
+
+    heart_rate_merger = hr_mesg_utils.HeartRateMerger()
+    records = iter(messages['record_mesgs'])
+    for hr_mesg in messages['hr_mesgs']:
+        heart_rate_merger.add_hr_mesg(hr_mesg)
+        for record in itertools.islice(records, 3):
+            heart_rate_merger.add_record_mesg(record)
+
+    for record in records:
+        heart_rate_merger.add_record_mesg(record)
+    heart_rate_merger.finish()
+
+    assert [(message['timestamp'], message['heart_rate']) for message in messages['record_mesgs']] == \
+        [(message['timestamp'], message['heart_rate']) for message in data_expand_hr_mesgs.merged_record_messages]
@@ -0,0 +1,117 @@
+'''test_lazy_profile.py: Contains the set of tests for the LazyProfile class in the Python FIT SDK'''
+
+###########################################################################################
+# Copyright 2025 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+import os
+import sys
+
+import pytest
+import garmin_fit_sdk
+from garmin_fit_sdk import LazyProfile
+from garmin_fit_sdk.profile import Profile
+
+
+@pytest.mark.parametrize(
+    "use_cache",
+    [
+        (True),
+        (False),
+    ], ids=["With marshal cache", "Without marshal cache"]
+)
+def test_lazy_profile_matches_profile(tmp_path, monkeypatch, use_cache):
+    '''Tests that the lazily loaded profile has the same contents as the profile module.'''
+    monkeypatch.setattr(sys, 'dont_write_bytecode', False)
+    cache_file = str(tmp_path / 'profile.marshal') if use_cache else None
+    lazy_profile = LazyProfile(cache_file)
+
+    assert lazy_profile['version'] == Profile['version']
+    assert lazy_profile['messages'][20] == Profile['messages'][20]
+    assert lazy_profile['types']['file'] == Profile['types']['file']
+    assert lazy_profile == Profile
+    assert os.path.exists(tmp_path / 'profile.marshal') is use_cache
+
+
+def test_lazy_profile_reads_cache(tmp_path, monkeypatch):
+    '''Tests that a second profile is loaded from the cache written by the first.'''
+    monkeypatch.setattr(sys, 'dont_write_bytecode', False)
+    cache_file = str(tmp_path / 'profile.marshal')
+    LazyProfile(cache_file).load()
+
+    lazy_profile = LazyProfile(cache_file)
+    assert lazy_profile['messages'][0]['name'] == 'file_id'
+    assert lazy_profile['mesg_num']['RECORD'] == 20
+    assert lazy_profile == Profile
+
+
+def test_lazy_profile_does_not_write_cache_when_bytecode_is_disabled(tmp_path, monkeypatch):
+    '''Tests that the cache is not written when writing bytecode is disabled.'''
+    monkeypatch.setattr(sys, 'dont_write_bytecode', True)
+    lazy_profile = LazyProfile(str(tmp_path / 'profile.marshal'))
+
+    assert lazy_profile['messages'][20]['name'] == 'record'
+    assert os.path.exists(tmp_path / 'profile.marshal') is False
+
+
+def test_lazy_profile_ignores_invalid_cache(tmp_path):
+    '''Tests that a corrupt cache is rebuilt from the profile module.'''
+    cache_file = tmp_path / 'profile.marshal'
+    cache_file.write_bytes(b'not a marshal blob')
+
+    lazy_profile = LazyProfile(str(cache_file))
+    assert lazy_profile['messages'][20]['name'] == 'record'
+
+
+def test_lazy_profile_only_loads_accessed_entries(tmp_path):
+    '''Tests that messages and types are only unmarshalled when they are accessed.'''
+    lazy_profile = LazyProfile(str(tmp_path / 'profile.marshal'))
+    messages = lazy_profile['messages']
+
+    assert 20 in messages
+    assert 0xFFFF not in messages
+    assert len(messages) == len(Profile['messages'])
+    assert dict.__len__(messages) == 0
+
+    assert messages[20]['name'] == 'record'
+    assert messages.get(0xFFFF) is None
+    assert dict.__len__(messages) == 1
+
+    with pytest.raises(KeyError):
+        _ = messages[0xFFFF]
+
+    with pytest.raises(KeyError):
+        _ = lazy_profile['not_a_key']
+
+
+def test_lazy_table_iteration_loads_all_entries(tmp_path):
+    '''Tests that iterating the keys, values and items of a table loads every entry.'''
+    types = LazyProfile(str(tmp_path / 'profile.marshal'))['types']
+
+    assert dict(types.items()) == Profile['types']
+    assert list(types.keys()) == list(Profile['types'].keys())
+    assert list(types.values()) == list(Profile['types'].values())
+
+
+def test_package_profile_iteration():
+    '''Tests that the tables of the profile exported by the package can be iterated.'''
+    messages = dict(garmin_fit_sdk.Profile['messages'].items())
+    type_names = list(garmin_fit_sdk.Profile['types'].keys())
+
+    assert messages == Profile['messages']
+    assert type_names == list(Profile['types'].keys())
+
+
+def test_lazy_profile_iteration_order_after_lookup():
+    '''Tests that iterating the tables follows the profile's order after entries have been looked up.'''
+    lazy_profile = LazyProfile(cache_file=None)
+    last_type = list(Profile['types'])[-1]
+    lazy_profile['types'][last_type]
+    lazy_profile['messages'][Profile['mesg_num']['RECORD']]
+
+    assert list(lazy_profile['types'].keys()) == list(Profile['types'].keys())
+    assert list(lazy_profile['messages'].items()) == list(Profile['messages'].items())
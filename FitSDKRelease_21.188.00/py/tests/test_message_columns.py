@@ -0,0 +1,107 @@
+'''test_message_columns.py: Contains the set of tests for the MessageColumns class in the Python FIT SDK'''
+
+###########################################################################################
+# Copyright 2025 Garmin International, Inc.
+# Licensed under the Flexible and Interoperable Data Transfer (FIT) Protocol License; you
+# may not use this file except in compliance with the Flexible and Interoperable Data
+# Transfer (FIT) Protocol License.
+###########################################################################################
+
+
+import pytest
+from garmin_fit_sdk import MessageColumns
+
+
+def test_columns_are_padded_and_masked():
+    '''Tests that fields missing from some messages are padded and marked invalid.'''
+    columns = MessageColumns()
+    columns.append({'power': 100})
+    columns.append({'power': 110, 'heart_rate': 140})
+    columns.append({'heart_rate': 141})
+
+    table = columns.to_dict()
+
+    assert table['num_rows'] == 3
+    assert list(table['valid']['power']) == [1, 1, 0]
+    assert list(table['valid']['heart_rate']) == [0, 1, 1]
+    assert list(table['columns']['power'])[0:2] == [100, 110]
+    assert list(table['columns']['heart_rate'])[1:3] == [140, 141]
+
+@pytest.mark.parametrize(
+    "values,expected_type_code,expected_dtype",
+    [
+        ([1, 2, 3], 'q', 'int64'),
+        ([1.5, 2.5], 'd', 'float64'),
+        ([1, 2.5, 3], 'd', 'float64'),
+        ([2.5, 1], 'd', 'float64'),
+    ], ids=["Integers", "Floats", "Integers Widened To Floats", "Integers Stored In Floats"]
+)
+def test_numeric_columns_are_typed(values, expected_type_code, expected_dtype):
+    '''Tests that numeric fields are stored in typed arrays, or NumPy arrays when NumPy is installed.'''
+    columns = MessageColumns()
+    for value in values:
+        columns.append({'value': value})
+
+    column = columns.to_dict()['columns']['value']
+
+    if hasattr(column, 'dtype'):
+        assert str(column.dtype) == expected_dtype
+    else:
+        assert column.typecode == expected_type_code
+    assert list(column) == values
+
+def test_non_numeric_columns_fall_back_to_lists():
+    '''Tests that columns holding strings or arrays are stored as lists with None for missing values.'''
+    columns = MessageColumns()
+    columns.append({'value': 1})
+    columns.append({})
+    columns.append({'value': 'garmin'})
+    columns.append({'value': [1, 2]})
+
+    column = columns.to_dict()['columns']['value']
+
+    assert column == [1, None, 'garmin', [1, 2]]
+
+def test_set_value():
+    '''Tests updating the value of a field in an existing row.'''
+    columns = MessageColumns()
+    columns.append({'timestamp': 1})
+    columns.append({'timestamp': 2})
+
+    columns.set_value(1, 'heart_rate', 120)
+
+    assert columns.get_value(0, 'heart_rate') is None
+    assert columns.get_value(1, 'heart_rate') == 120
+
+    with pytest.raises(IndexError):
+        columns.set_value(2, 'heart_rate', 120)
+
+def test_write_value():
+    '''Tests writing the values of a message into a new row one field at a time.'''
+    columns = MessageColumns()
+    columns.append({'power': 100})
+
+    assert columns.add_row() == 1
+    columns.write_value('heart_rate', 140)
+    columns.write_value('power', 2 ** 64)
+    columns.write_value('heart_rate', 141)
+
+    assert columns.get_num_rows() == 2
+    assert columns.get_value(0, 'heart_rate') is None
+    assert columns.get_value(1, 'heart_rate') == 141
+    assert columns.to_dict()['columns']['power'] == [100, 2 ** 64]
+
+def test_datetime64_columns():
+    '''Tests that timestamp columns are returned as NumPy datetime64 values when requested.'''
+    numpy = pytest.importorskip('numpy')
+
+    columns = MessageColumns()
+    columns.append({'timestamp': 995749880, 'power': 100})
+    columns.append({'power': 110})
+
+    table = columns.to_dict(datetime64_fields={'timestamp'})
+
+    assert table['columns']['timestamp'].dtype == numpy.dtype('datetime64[s]')
+    assert str(table['columns']['timestamp'][0]) == '2021-07-20T21:11:20'
+    assert list(table['valid']['timestamp']) == [True, False]
+    assert table['columns']['power'].dtype == numpy.dtype('int64')
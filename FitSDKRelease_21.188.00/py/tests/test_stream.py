@@ -9,9 +9,11 @@
 
 
 import io
+import os
+import struct
 
 import pytest
-from garmin_fit_sdk import Stream, util
+from garmin_fit_sdk import BufferStream, CrcCalculator, Decoder, Stream, util
 
 
 def test_stream_from_buffered_reader():
@@ -42,6 +44,36 @@ def test_stream_from_file():
     assert stream.get_buffered_reader() is not None
     assert stream.peek_byte() == 0x0E
 
+def test_stream_from_mmap():
+    '''Tests creating a zero-copy stream from a memory-mapped binary fit file'''
+    stream = Stream.from_mmap("tests/fits/ActivityDevFields.fit")
+    assert isinstance(stream, BufferStream)
+    assert stream.get_length() == os.path.getsize("tests/fits/ActivityDevFields.fit")
+    assert stream.peek_byte() == 0x0E
+    stream.close()
+    assert stream.get_buffer() is None
+
+def test_stream_context_manager():
+    '''Tests that leaving a with block closes the stream and its memory map'''
+    with Stream.from_mmap("tests/fits/ActivityDevFields.fit") as stream:
+        assert stream.peek_byte() == 0x0E
+    assert stream.get_buffer() is None
+
+    with Stream.from_file("tests/fits/ActivityDevFields.fit") as stream:
+        assert stream.peek_byte() == 0x0E
+    assert stream.get_buffered_reader().closed
+
+def test_stream_from_buffer():
+    '''Tests creating a zero-copy stream from a memoryview'''
+    stream = Stream.from_buffer(memoryview(bytearray([0x0E, 0x20, 0x8B])))
+    assert isinstance(stream, BufferStream)
+    assert stream.get_buffered_reader() is None
+    assert stream.get_length() == 3
+    assert stream.peek_byte() == 0x0E
+
+    stream = Stream.from_buffer(bytes([0x0E, 0x20, 0x8B]), 2)
+    assert stream.get_length() == 2
+
 
 @pytest.mark.parametrize(
     "given_bytes,position,expected_value",
@@ -232,3 +264,94 @@ class TestReadValues:
         assert strings[13] == "" # Not '��'
         assert strings[42] == "Race goal pace." # Not '��Race goal pace.'
         assert strings[53] == "|75% ef" # Not '�|75% ef'
+
+@pytest.mark.parametrize(
+    "given_bytes,num_bytes,with_crc",
+    [
+        (bytearray([0x0E, 0x20, 0x8B]), 2, True),
+        (bytearray([0x0E, 0x20, 0x8B]), 2, False),
+        (bytearray([0x0E, 0x20, 0x8B]), 3, False),
+    ],
+)
+def test_skip_bytes(given_bytes, num_bytes, with_crc):
+    '''Tests skipping bytes advances the stream and still updates the CRC when one is set'''
+    stream = Stream.from_byte_array(given_bytes)
+    crc_calculator = CrcCalculator() if with_crc else None
+    stream.set_crc_calculator(crc_calculator)
+
+    stream.skip_bytes(num_bytes)
+
+    assert stream.position() == num_bytes
+    if with_crc:
+        assert crc_calculator.get_crc() == CrcCalculator.calculate_crc(given_bytes, 0, num_bytes)
+
+    with pytest.raises(IndexError):
+        stream.skip_bytes(len(given_bytes))
+
+
+class TestBufferStream:
+    '''Set of tests which verify the zero-copy BufferStream reads the same as the BufferedReader backed Stream.'''
+    GIVEN_BYTES = bytearray([0x0E, 0x20, 0x8B, 0x00, 0xFF, 0x2E, 0x46, 0x49, 0x54])
+
+    def test_read_methods(self):
+        '''Tests the read, peek and seek methods return the same values for both streams'''
+        for stream in [Stream.from_byte_array(self.GIVEN_BYTES), Stream.from_buffer(self.GIVEN_BYTES)]:
+            assert stream.peek_byte() == 0x0E
+            assert stream.read_byte() == 0x0E
+            assert stream.peek_bytes(2) == bytes([0x20, 0x8B])
+            assert stream.read_unint_16() == 0x8B20
+            assert stream.read_and_unpack(2, '=BB') == [0x00, 0xFF]
+            assert stream.position() == 5
+            assert stream.read_string(4) == [b'.FIT']
+            assert stream.slice(1, 3) == bytes([0x20, 0x8B])
+            assert stream.position() == 9
+
+            with pytest.raises(IndexError):
+                stream.read_byte()
+
+            stream.seek(1)
+            assert stream.read_struct(struct.Struct('<HB')) == (0x8B20, 0x00)
+
+            stream.reset()
+            assert stream.position() == 0
+            with pytest.raises(IndexError):
+                stream.read_bytes(len(self.GIVEN_BYTES) + 1)
+
+    def test_read_view(self):
+        '''Tests that reading a view returns the bytes without copying them, and that the stream can still be closed'''
+        stream = Stream.from_mmap("tests/fits/ActivityDevFields.fit")
+        view = stream.read_view(4)
+        assert isinstance(view, memoryview)
+        assert view.obj is stream.get_buffer().obj
+        assert view.tobytes() == Stream.from_file("tests/fits/ActivityDevFields.fit").read_bytes(4)
+        assert stream.position() == 4
+
+        view.release()
+        stream.close()
+        assert stream.get_buffer() is None
+
+    def test_check_integrity_does_not_copy(self, monkeypatch):
+        '''Tests that the CRC of a buffer backed stream is calculated over a view of the file'''
+        with Stream.from_mmap("tests/fits/ActivityDevFields.fit") as stream:
+            copied_sizes = []
+            read_bytes = stream.read_bytes
+            def copy_bytes(num_bytes):
+                copied_sizes.append(num_bytes)
+                return read_bytes(num_bytes)
+
+            monkeypatch.setattr(stream, 'read_bytes', copy_bytes)
+            assert Decoder(stream).check_integrity() is True
+            assert max(copied_sizes) <= 4
+
+    def test_read_updates_crc(self):
+        '''Tests that every read advances the CRC calculator over the bytes read'''
+        stream = Stream.from_buffer(self.GIVEN_BYTES)
+        crc_calculator = CrcCalculator()
+        stream.set_crc_calculator(crc_calculator)
+
+        stream.read_byte()
+        stream.read_bytes(2)
+        stream.skip_bytes(2)
+        stream.read_struct(struct.Struct('<4s'))
+
+        assert crc_calculator.get_crc() == CrcCalculator.calculate_crc(self.GIVEN_BYTES, 0, len(self.GIVEN_BYTES))
@@ -28,3 +28,20 @@ def test_convert_datetime(given_timestamp, expected_datetime):
 
     actual_datetime = util.convert_timestamp_to_datetime(given_timestamp)
     assert str(actual_datetime) == str(expected_datetime)
+
+@pytest.mark.parametrize(
+    "given_timestamp",
+    [
+        (1),
+        (995749880),
+        (0xFFFFFFFE),
+        (1029086357.5),
+    ], ids=["One second", "Regular timestamp", "Largest valid timestamp", "Fractional timestamp"],
+)
+def test_convert_datetime_matches_fromtimestamp(given_timestamp):
+    '''Tests that converting from the cached epoch gives the same datetime as datetime.fromtimestamp'''
+    expected_datetime = datetime.fromtimestamp(given_timestamp + util.FIT_EPOCH_S, timezone.utc)
+
+    actual_datetime = util.convert_timestamp_to_datetime(given_timestamp)
+    assert actual_datetime == expected_datetime
+    assert actual_datetime.tzinfo == timezone.utc
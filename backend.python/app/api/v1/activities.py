@@ -4,7 +4,23 @@ from sqlalchemy.orm import Session
 from fastapi.responses import JSONResponse, Response
 from app.api.v1.auth import get_current_user
 from app.deps import get_db
-from app.models.activity import Activity, ActivityPoint, ActivityLap
+from app.models.activity import Activity, ActivityLap, ActivityTrackLevel
+from app.services.activity_curve_service import (
+    CURVE_CHANNELS,
+    CURVE_PERIODS,
+    get_activity_curves,
+    get_user_curve,
+)
+from app.services.activity_stats_service import get_activity_stats, list_activities_page
+from app.services.activity_stream_service import load_activity_columns
+from app.services.track_simplify_service import (
+    build_track_levels,
+    columns_to_rows,
+    decode_track_level,
+    level_for_request,
+    serialize_track_level,
+    shrink_track_level,
+)
 from app.core.config import settings
 import httpx
 import json
@@ -14,31 +30,27 @@ router = APIRouter(prefix="/activities", tags=["activities"])
 @router.get("", summary="获取运动记录列表")
 async def get_activities(
     type: Optional[str] = Query(None, description="运动类型筛选"),
-    page: int = Query(1, ge=1, description="页码"),
+    cursor: Optional[str] = Query(None, description="分页游标，取上一页返回的 next_cursor，为空时返回第一页"),
+    page: Optional[int] = Query(None, ge=1, deprecated=True, description="页码（已弃用，请改用 cursor），指定 cursor 时忽略"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
     current_user: Dict = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """获取用户的运动记录列表"""
-    q = db.query(Activity).filter(Activity.user_id == current_user["id"])
-    if type:
-        q = q.filter(Activity.type == type)
-    
-    total = q.count()
-    items = (
-        q.order_by(Activity.created_at.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
-    )
-    
+    """获取用户的运动记录列表
+
+    stats 为筛选后全部运动记录的统计（按类型分组聚合，按用户缓存），列表按创建时间倒序做 keyset 分页。
+    旧客户端仍可以用 page 按页码分页（OFFSET），同样返回 next_cursor 以便改用游标。
+    """
+    stats = get_activity_stats(db, current_user["id"], type)
+    if cursor:
+        page = None
+    try:
+        items, next_cursor = list_activities_page(db, current_user["id"], type, cursor, page_size, page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     return {
-        "stats": {
-            "total_activities": total,
-            "total_distance": sum(i.distance or 0 for i in items),
-            "total_duration": sum(i.duration or 0 for i in items),
-            "total_elevation": sum(i.total_elevation or 0 for i in items),
-        },
+        "stats": stats,
         "activities": [
             {
                 "id": a.id,
@@ -48,33 +60,120 @@ async def get_activities(
                 "duration": a.duration,
                 "avg_speed": a.avg_speed,
                 "total_elevation": a.total_elevation,
+                "elevation_gain": a.elevation_gain,
+                "moving_time": a.moving_time,
+                "avg_heart_rate": a.avg_heart_rate,
+                "avg_power": a.avg_power,
+                "normalized_power": a.normalized_power,
+                "start_time": a.start_time.isoformat() if a.start_time else None,
+                "status": a.status,
                 "created_at": a.created_at.isoformat() if a.created_at else None,
             }
             for a in items
         ],
-        "pagination": {"page": page, "page_size": page_size, "total": total},
+        "pagination": {
+            "page": page or (None if cursor else 1),
+            "page_size": page_size,
+            "total": stats["total_activities"],
+            "next_cursor": next_cursor,
+        },
+    }
+
+
+@router.get("/curves", summary="获取用户的最大均值曲线")
+async def get_user_best_curve(
+    channel: str = Query("power", description="通道：power / heart_rate"),
+    period: str = Query("all", description="统计区间：all 历史最佳 / 90d 最近 90 天"),
+    duration: Optional[int] = Query(None, ge=1, description="只返回该时长（秒）的最佳值，如 1200 为最佳 20 分钟"),
+    current_user: Dict = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """返回每个时长的最大平均值及其所在的运动记录，入库时增量维护，不扫描轨迹点"""
+    if channel not in CURVE_CHANNELS:
+        raise HTTPException(status_code=400, detail=f"不支持的通道: {channel}")
+    if period not in CURVE_PERIODS:
+        raise HTTPException(status_code=400, detail=f"不支持的统计区间: {period}")
+
+    best = get_user_curve(db, current_user["id"], channel, period)
+    if duration is not None:
+        best = {duration: best[duration]} if duration in best else {}
+
+    return {
+        "channel": channel,
+        "period": period,
+        "curve": [{"duration": d, **best[d]} for d in sorted(best)],
+    }
+
+
+@router.get("/{activity_id}/curves", summary="获取运动记录的最大均值曲线")
+async def get_activity_curve(
+    activity_id: int,
+    current_user: Dict = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """返回该运动记录功率、心率在各时长内的最大平均值"""
+    a = db.query(Activity).filter_by(id=activity_id, user_id=current_user["id"]).first()
+    if not a:
+        raise HTTPException(status_code=404, detail="运动记录不存在")
+
+    curves = get_activity_curves(db, a.id)
+    return {
+        "activity_id": a.id,
+        "curves": {
+            channel: [{"duration": d, "value": curve[d]} for d in sorted(curve)]
+            for channel, curve in curves.items()
+        },
     }
 
 
 @router.get("/{activity_id}", summary="获取运动记录详情")
 async def get_activity_detail(
     activity_id: int,
+    max_points: Optional[int] = Query(None, ge=2, description="最多返回的轨迹点数，取不超过该值的预计算精度等级（500 / 2000 / 5000），小于 500 时从 500 的等级再抽稀"),
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="地图缩放级别，未指定 max_points 时按缩放级别选择精度"),
     current_user: Dict = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """获取指定运动记录的详细信息，包括GPS轨迹点和分段数据"""
+    """获取指定运动记录的详细信息，包括GPS轨迹点和分段数据
+
+    心率、功率、踏频等汇总字段在入库时计算并保存在 Activity 中，不从轨迹点重新计算。
+
+    指定 max_points 或 zoom 时返回预计算的抽稀数据：points 为按时间分桶的采样点（用于图表），
+    track 为抽稀后的轨迹（用于地图），不读取全部轨迹点。
+    """
     a = db.query(Activity).filter_by(id=activity_id, user_id=current_user["id"]).first()
     if not a:
         raise HTTPException(status_code=404, detail="运动记录不存在")
 
-    # 获取GPS轨迹点
-    points = (
-        db.query(ActivityPoint)
-        .filter_by(activity_id=a.id)
-        .order_by(ActivityPoint.id)
-        .all()
-    )
-    
+    level = level_for_request(max_points, zoom)
+    lod = None
+    if level is not None:
+        # 取不超过所选等级的最大预计算等级（点数少的记录只保存了包含全部点的等级）
+        stored = (
+            db.query(ActivityTrackLevel)
+            .filter(ActivityTrackLevel.activity_id == a.id, ActivityTrackLevel.max_points <= level)
+            .order_by(ActivityTrackLevel.max_points.desc())
+            .first()
+        )
+        if stored is not None:
+            lod = decode_track_level(stored.data)
+
+    if lod is None:
+        # 获取GPS轨迹点（按列存储时直接解码各通道）
+        columns = load_activity_columns(db, a.id)
+        if level is not None:
+            # 旧数据没有预计算的等级，从原始轨迹点计算
+            lod = serialize_track_level(build_track_levels(columns, levels=(level,))[0])
+        else:
+            columns["time"] = [t.isoformat() if t else None for t in columns["time"]]
+            point_dicts = columns_to_rows(columns)
+
+    if lod is not None:
+        # 请求的点数小于所选等级时在该等级上继续抽稀，返回的点数不超过 max_points
+        if max_points is not None and max_points < lod["max_points"]:
+            lod = shrink_track_level(lod, max_points)
+        point_dicts = columns_to_rows(lod["chart"])
+
     # 获取分段数据
     laps = (
         db.query(ActivityLap)
@@ -83,52 +182,31 @@ async def get_activity_detail(
         .all()
     )
 
-    # 计算基于 points 的汇总数据（如果Activity表中没有这些数据）
-    def _safe_mean(values):
-        vals = [v for v in values if v is not None]
-        return sum(vals) / len(vals) if vals else None
-
-    hr_values = [p.heart_rate for p in points if p.heart_rate is not None]
-    power_values = [p.power for p in points if p.power is not None]
-    cadence_values = [p.cadence for p in points if p.cadence is not None]
-
-    computed_avg_hr = _safe_mean(hr_values)
-    computed_max_hr = max(hr_values) if hr_values else None
-    computed_avg_power = _safe_mean(power_values)
-    computed_max_power = max(power_values) if power_values else None
-    computed_avg_cadence = _safe_mean(cadence_values)
-
-    return {
+    result = {
         "id": a.id,
         "name": a.name,
         "type": a.type,
+        "status": a.status,
         "distance": a.distance,
         "duration": a.duration,
-        "avg_speed": getattr(a, "avg_speed", None),
-        "max_speed": getattr(a, "max_speed", None),
-        "total_elevation": getattr(a, "total_elevation", None),
-        "avg_heart_rate": getattr(a, "avg_heart_rate", None) or (int(computed_avg_hr) if computed_avg_hr is not None else None),
-        "max_heart_rate": getattr(a, "max_heart_rate", None) or computed_max_hr,
-        "avg_power": getattr(a, "avg_power", None) or (int(computed_avg_power) if computed_avg_power is not None else None),
-        "max_power": getattr(a, "max_power", None) or computed_max_power,
-        "avg_cadence": getattr(a, "avg_cadence", None) or (int(computed_avg_cadence) if computed_avg_cadence is not None else None),
-        "calories": getattr(a, "calories", None),
-        "start_time": getattr(a, "start_time", None).isoformat() if getattr(a, "start_time", None) else None,
-        "end_time": getattr(a, "end_time", None).isoformat() if getattr(a, "end_time", None) else None,
+        "avg_speed": a.avg_speed,
+        "max_speed": a.max_speed,
+        "total_elevation": a.total_elevation,
+        "elevation_gain": a.elevation_gain,
+        "elevation_loss": a.elevation_loss,
+        "moving_time": a.moving_time,
+        "avg_heart_rate": a.avg_heart_rate,
+        "max_heart_rate": a.max_heart_rate,
+        "avg_power": a.avg_power,
+        "max_power": a.max_power,
+        "normalized_power": a.normalized_power,
+        "avg_cadence": a.avg_cadence,
+        "max_cadence": a.max_cadence,
+        "calories": a.calories,
+        "start_time": a.start_time.isoformat() if a.start_time else None,
+        "end_time": a.end_time.isoformat() if a.end_time else None,
         "created_at": a.created_at.isoformat() if a.created_at else None,
-        "points": [
-            {
-                "time": p.time.isoformat() if p.time else None,
-                "latitude": p.latitude,
-                "longitude": p.longitude,
-                "speed": p.speed,
-                "heart_rate": p.heart_rate,
-                "power": p.power,
-                "cadence": p.cadence,
-                "elevation": p.elevation,
-            }
-            for p in points
-        ],
+        "points": point_dicts,
         "laps": [
             {
                 "lap_index": l.lap_index,
@@ -142,7 +220,8 @@ async def get_activity_detail(
             for l in laps
         ],
     }
-
-
-
-
+    if lod is not None:
+        result["max_points"] = lod["max_points"]
+        result["total_points"] = lod["total_points"]
+        result["track"] = columns_to_rows(lod["track"])
+    return result
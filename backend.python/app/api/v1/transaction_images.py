@@ -5,12 +5,13 @@ from pathlib import Path
 from uuid import uuid4
 from datetime import date
 from PIL import Image
-import io
 from sqlalchemy.orm import Session
 from app.api.v1.auth import get_current_user
+from app.core.config import settings
 from app.deps import get_db
 from app.models.transaction import Transaction
 from app.models.transaction_image import TransactionImage
+from app.services.upload_storage_service import save_upload_file
 
 router = APIRouter(prefix="/transactions/{transaction_id}/images", tags=["transaction_images"])
 
@@ -55,14 +56,13 @@ async def upload_transaction_images(
         unique_filename = f"{uuid4().hex}{file_ext}"
         file_path = user_dir / unique_filename
 
-        # 保存文件
-        content = await file.read()
-        file_path.write_bytes(content)
+        # 按块保存文件，不把整个文件读入内存
+        saved = await save_upload_file(file, file_path, settings.UPLOAD_MAX_IMAGE_BYTES)
 
-        # 获取图片尺寸
+        # 获取图片尺寸（只读取文件头）
         try:
-            img = Image.open(io.BytesIO(content))
-            width, height = img.size
+            with Image.open(file_path) as img:
+                width, height = img.size
         except Exception:
             width, height = None, None
 
@@ -72,7 +72,7 @@ async def upload_transaction_images(
             transaction_id=transaction_id,
             file_path=rel_path,
             file_name=file.filename,
-            file_size=len(content),
+            file_size=saved["size"],
             mime_type=file.content_type,
             width=width,
             height=height
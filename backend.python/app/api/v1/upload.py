@@ -1,21 +1,105 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Dict
 from pathlib import Path
 from uuid import uuid4
 from datetime import date
 import os
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.api.v1.auth import get_current_user
+from app.core.config import settings
 from app.deps import get_db
 from app.models.activity import Activity
-from app.models.activity import ActivityPoint, ActivityLap
-from fitparse import FitFile
+from app.services.activity_ingest_service import (
+    DATA_DIR,
+    enqueue_ingest_job,
+    find_duplicate_activity,
+    get_batch_status,
+    get_ingest_status,
+    ingest_worker_pool,
+    record_duplicate_upload,
+    requeue_failed_activity,
+)
+from app.services.upload_storage_service import check_fit_integrity, save_upload_file
 
 router = APIRouter(prefix="/upload", tags=["upload"])
 
-DATA_DIR = Path(__file__).resolve().parents[3] / "data"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+def _duplicate_entry(db: Session, existing: Activity, batch_id: str) -> Dict:
+    job = record_duplicate_upload(db, existing, batch_id)
+    db.commit()
+    return {"id": existing.id, "name": existing.name, "status": existing.status, "job_id": job.id, "duplicate": True}
+
+
+def _requeue_failed_upload(db: Session, existing: Activity, part: Path, batch_id: str) -> Dict:
+    """上次解析失败的文件重新上传时重新排队解析，已有文件丢失时用本次上传的文件补上"""
+    target = DATA_DIR / existing.name
+    job = requeue_failed_activity(db, existing, batch_id)
+    if job is None:
+        # 其他请求已经重新排队
+        db.rollback()
+        part.unlink()
+        return _duplicate_entry(db, existing, batch_id)
+    if target.exists():
+        part.unlink()
+    else:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(part, target)
+    db.commit()
+    return {"id": existing.id, "name": existing.name, "status": existing.status, "job_id": job.id, "duplicate": False}
+
+
+def _register_upload(db: Session, user_id: int, part: Path, safe_name: str, sha256: str, batch_id: str) -> Dict:
+    """把已保存的临时文件登记为 pending 的 Activity 和解析任务，每个文件单独提交
+
+    返回 {"activity": 返回给客户端的条目} 或 {"rejected": 拒绝原因}，临时文件被移走或删除。
+    CRC 校验和数据库访问都是阻塞操作，由上传接口放到线程池中执行，不阻塞事件循环。
+    同一用户重复上传相同内容的文件时不保留文件，返回已有的运动记录，已有记录解析失败时重新解析；
+    两个请求同时上传同一文件时，后插入的一方违反唯一索引，同样按重复处理。
+    """
+    existing = find_duplicate_activity(db, user_id, sha256)
+    if existing and existing.status == "failed":
+        return {"activity": _requeue_failed_upload(db, existing, part, batch_id)}
+    if existing:
+        part.unlink()
+        return {"activity": _duplicate_entry(db, existing, batch_id)}
+
+    # 文件头、长度或 CRC 不正确的文件不入库
+    if not check_fit_integrity(part):
+        part.unlink()
+        return {"rejected": {"file_name": safe_name, "error": "FIT 文件不完整或已损坏"}}
+
+    # 如果文件名冲突，添加 uuid 后缀避免覆盖
+    target = part.parent / safe_name
+    if target.exists():
+        target = part.parent / f"{target.stem}_{uuid4().hex}{target.suffix}"
+    os.replace(part, target)
+
+    # 在 Activity 中记录相对路径，便于后续解析或下载
+    rel_path = target.relative_to(DATA_DIR).as_posix()
+    try:
+        a = Activity(user_id=user_id, name=rel_path, type="cycling", status="pending", file_hash=sha256)
+        db.add(a)
+        db.flush()
+        job = enqueue_ingest_job(db, a, rel_path, batch_id)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        target.unlink(missing_ok=True)
+        existing = find_duplicate_activity(db, user_id, sha256)
+        if existing is None:
+            raise
+        return {"activity": _duplicate_entry(db, existing, batch_id)}
+    except BaseException:
+        db.rollback()
+        target.unlink(missing_ok=True)
+        raise
+
+    return {"activity": {"id": a.id, "name": a.name, "status": a.status, "job_id": job.id, "duplicate": False}}
+
+
 @router.post("", summary="上传FIT文件")
 async def upload_fit_files(
     files: List[UploadFile] = File(..., description="FIT文件（支持多文件）"),
@@ -25,140 +109,92 @@ async def upload_fit_files(
     if not files:
         raise HTTPException(status_code=400, detail="未选择文件")
 
+    # 同一次上传的所有文件共用一个批次号，解析进度通过 /upload/batches/{batch_id} 汇总查询
+    batch_id = uuid4().hex
+
+    # 先把所有文件按块写入临时文件并计算 SHA-256，不把整个文件读入内存；
+    # 任一文件不合法或超过大小限制时整个请求失败，删除已写入的临时文件
+    parts = []
+    try:
+        for f in files:
+            # 防止路径穿越，取安全文件名
+            safe_name = Path(f.filename).name
+            if not safe_name.lower().endswith(".fit"):
+                raise HTTPException(status_code=400, detail=f"{safe_name} 不是 FIT 文件")
+
+            # 为当前用户创建目录： data/update/fit/<username>/<YYYY_MM_DD>/
+            username_safe = Path(str(current_user.get("username", "user"))).name
+            date_str = date.today().strftime("%Y_%m_%d")
+            user_dir = DATA_DIR / "update" / "fit" / username_safe / date_str
+            user_dir.mkdir(parents=True, exist_ok=True)
+
+            part = user_dir / f".{uuid4().hex}.part"
+            saved = await save_upload_file(f, part, settings.UPLOAD_MAX_FIT_BYTES)
+            parts.append((part, safe_name, saved["sha256"]))
+    except BaseException:
+        for part, _, _ in parts:
+            part.unlink(missing_ok=True)
+        raise
+
+    # 创建 pending 状态的 Activity，解析交给后台 worker，接口立即返回
     created = []
-    for f in files:
-        # 防止路径穿越，取安全文件名
-        safe_name = Path(f.filename).name
-        if not safe_name.lower().endswith(".fit"):
-            raise HTTPException(status_code=400, detail=f"{safe_name} 不是 FIT 文件")
-
-        # 为当前用户创建目录： data/update/fit/<username>/<YYYY_MM_DD>/
-        username_safe = Path(str(current_user.get("username", "user"))).name
-        date_str = date.today().strftime("%Y_%m_%d")
-        user_dir = DATA_DIR / "update" / "fit" / username_safe / date_str
-        user_dir.mkdir(parents=True, exist_ok=True)
-
-        # 如果文件名冲突，添加 uuid 后缀避免覆盖
-        target = user_dir / safe_name
-        if target.exists():
-            target = user_dir / f"{target.stem}_{uuid4().hex}{target.suffix}"
-
-        content = await f.read()
-        target.write_bytes(content)
-
-        # 先创建占位 Activity（后续可在解析后补充指标/点/圈）
-        # 在 Activity 中记录相对路径，便于后续解析或下载
-        rel_path = target.relative_to(DATA_DIR).as_posix()
-        a = Activity(user_id=current_user["id"], name=rel_path, type="cycling")
-        db.add(a)
-        db.commit()
-        db.refresh(a)
-
-        # 解析 FIT 并写入 points / laps，同时更新 Activity 的统计字段
-        try:
-            fit = FitFile(str(target))
-
-            points_added = []
-            max_speed = None
-            elevations = []
-            first_ts = None
-            last_ts = None
-
-            # 记录点
-            for record in fit.get_messages("record"):
-                ts = record.get_value("timestamp")
-                if ts and first_ts is None:
-                    first_ts = ts
-                if ts:
-                    last_ts = ts
-
-                lat = record.get_value("position_lat")
-                lon = record.get_value("position_long")
-                speed = record.get_value("speed")
-                heart_rate = record.get_value("heart_rate")
-                power = record.get_value("power")
-                cadence = record.get_value("cadence")
-                elevation = record.get_value("altitude")
-
-                p = ActivityPoint(
-                    activity_id=a.id,
-                    time=ts,
-                    latitude=lat,
-                    longitude=lon,
-                    speed=speed,
-                    heart_rate=heart_rate,
-                    power=power,
-                    cadence=cadence,
-                    elevation=elevation,
-                )
-                db.add(p)
-                points_added.append(p)
-                if speed is not None:
-                    if max_speed is None or speed > max_speed:
-                        max_speed = speed
-                if elevation is not None:
-                    elevations.append(elevation)
-
-            # 记录圈（lap）
-            lap_index = 0
-            for lap in fit.get_messages("lap"):
-                lap_index += 1
-                start_time = lap.get_value("start_time")
-                elapsed = lap.get_value("total_elapsed_time") or lap.get_value("elapsed_time")
-                distance_l = lap.get_value("total_distance") or lap.get_value("distance")
-                avg_hr = lap.get_value("avg_heart_rate")
-                avg_power = lap.get_value("avg_power")
-                avg_speed_l = lap.get_value("avg_speed")
-
-                l = ActivityLap(
-                    activity_id=a.id,
-                    lap_index=lap_index,
-                    start_time=start_time,
-                    elapsed_time=int(elapsed) if elapsed is not None else None,
-                    distance=int(distance_l) if distance_l is not None else None,
-                    avg_heart_rate=avg_hr,
-                    avg_power=avg_power,
-                    avg_speed=avg_speed_l,
-                )
-                db.add(l)
-
-            db.commit()
-
-            # 更新 Activity 的汇总字段
-            total_distance = None
-            # 尝试读取最后一条 record 的 distance 字段（若存在）
-            try:
-                last_distance = None
-                for rec in fit.get_messages("record"):
-                    d = rec.get_value("distance")
-                    if d is not None:
-                        last_distance = d
-                if last_distance is not None:
-                    total_distance = int(last_distance)
-            except Exception:
-                total_distance = None
-
-            duration = None
-            if first_ts and last_ts:
-                duration = int((last_ts - first_ts).total_seconds())
-
-            a.distance = total_distance or 0
-            a.duration = duration or 0
-            # Convert to km/h: total_distance (meters) / duration (seconds) -> m/s, *3.6 -> km/h
-            a.avg_speed = float(total_distance * 3.6 / duration) if (total_distance and duration and duration > 0) else None
-            a.max_speed = max_speed
-            if elevations:
-                a.total_elevation = int(max(elevations) - min(elevations))
-
-            db.add(a)
-            db.commit()
-        except Exception:
-            # 解析失败不影响上传成功，但留空统计，避免抛出
-            db.rollback()
-
-        created.append({"id": a.id, "name": a.name})
-
-    return {"success": True, "uploaded_count": len(created), "activities": created}
+    rejected = []
+    uploaded_count = 0
+    duplicate_count = 0
+    i = 0
+    try:
+        for i, (part, safe_name, sha256) in enumerate(parts):
+            result = await run_in_threadpool(_register_upload, db, current_user["id"], part, safe_name, sha256, batch_id)
+            if "rejected" in result:
+                rejected.append(result["rejected"])
+                continue
+            entry = result["activity"]
+            created.append(entry)
+            if entry["duplicate"]:
+                duplicate_count += 1
+            else:
+                uploaded_count += 1
+    except BaseException:
+        # 已提交的文件保留，未处理的临时文件删除
+        for part, _, _ in parts[i:]:
+            part.unlink(missing_ok=True)
+        raise
+    finally:
+        if uploaded_count:
+            ingest_worker_pool.notify()
+
+    return {
+        "success": True,
+        "uploaded_count": uploaded_count,
+        "duplicate_count": duplicate_count,
+        "batch_id": batch_id,
+        "activities": created,
+        "rejected": rejected,
+    }
+
+@router.get("/status/{activity_id}", summary="查询FIT文件解析状态")
+def get_upload_status(
+    activity_id: int,
+    current_user: Dict = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """返回 Activity 的解析状态（pending / processing / completed / failed）及解析任务进度"""
+    result = get_ingest_status(db, activity_id, current_user["id"])
+    if result is None:
+        raise HTTPException(status_code=404, detail="运动记录不存在")
+    return result
+
+@router.get("/batches/{batch_id}", summary="查询批量上传的解析进度")
+def get_upload_batch_status(
+    batch_id: str,
+    current_user: Dict = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """返回一次上传中已解析、失败、重复、排队和解析中的文件数量"""
+    result = get_batch_status(db, batch_id, current_user["id"])
+    if result is None:
+        raise HTTPException(status_code=404, detail="上传批次不存在")
+    return result
 
 @router.post("batch", summary="批量上传并合并运动记录")
 async def batch_upload_fit_files(
@@ -38,6 +38,20 @@ class Settings:
     AMAP_API_KEY = os.getenv("AMAP_API_KEY", "")  # 高德地图API密钥
     AMAP_API_SECRET = os.getenv("AMAP_API_SECRET", "")  # 高德地图API安全密钥（如需要）
 
+    # 上传文件配置
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))  # 上传文件按块写入磁盘的块大小(字节)
+    UPLOAD_MAX_FIT_BYTES = int(os.getenv("UPLOAD_MAX_FIT_BYTES", str(50 * 1024 * 1024)))  # 单个 FIT 文件大小上限(字节)
+    UPLOAD_MAX_IMAGE_BYTES = int(os.getenv("UPLOAD_MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))  # 单张图片大小上限(字节)
+
+    # FIT 文件后台解析配置
+    INGEST_PROCESSES = int(os.getenv("INGEST_PROCESSES", "0"))  # 后台解析进程数，0 为 CPU 核数
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "16"))  # 每批领取并一次提交的任务数
+    INGEST_POLL_SECONDS = float(os.getenv("INGEST_POLL_SECONDS", "5"))  # 无新任务通知时轮询任务表的间隔(秒)
+    INGEST_STALE_SECONDS = float(os.getenv("INGEST_STALE_SECONDS", "1800"))  # running 任务开始超过该时间(秒)视为解析进程已退出，重新排队
+    INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))  # 任务最多解析次数，解析进程崩溃或超时达到该次数后标记为失败
+    POINT_STORAGE = os.getenv("POINT_STORAGE", "streams")  # 新入库轨迹点的存储方式：streams 按列 blob / rows 按行
+    FIT_PARSER = os.getenv("FIT_PARSER", "fitparse")  # FIT 解析后端：fitparse / garmin_fit_sdk（需另行安装，HR 消息中的心率会合并到轨迹点）
+
 
 # 创建全局设置实例
 settings = Settings()
\ No newline at end of file
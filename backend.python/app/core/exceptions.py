@@ -94,6 +94,12 @@ class ConflictException(APIException):
         super().__init__(message, code, status.HTTP_409_CONFLICT)
 
 
+class PayloadTooLargeException(APIException):
+    """413 Payload Too Large"""
+    def __init__(self, message: str, code: str = "PAYLOAD_TOO_LARGE"):
+        super().__init__(message, code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+
 class InternalServerException(APIException):
     """500 Internal Server Error"""
     def __init__(self, message: str = "服务器内部错误", code: str = "INTERNAL_ERROR"):
@@ -14,7 +14,7 @@ import uuid
 
 # 数据库相关导入
 from app.models import __all_models__
-from app.db import engine, Base
+from app.schema_upgrade import upgrade_schema
 
 # 路由导入
 from app.api.router import api_router
@@ -23,6 +23,9 @@ from app.web.routers import web_router
 # 异常处理导入
 from app.core.exceptions import APIException
 
+# FIT 文件后台解析
+from app.services.activity_ingest_service import ingest_worker_pool
+
 # 日志器
 logger = logging.getLogger(__name__)
 
@@ -96,9 +99,9 @@ async def log_requests(request: Request, call_next):
     return response
 
 # ========================================
-# 创建数据库表
+# 创建数据库表，并为旧数据库补上新增的列和索引
 # ========================================
-Base.metadata.create_all(bind=engine)
+upgrade_schema()
 
 # ========================================
 # 静态文件挂载
@@ -228,11 +231,13 @@ def root():
 async def startup_event():
     """应用启动"""
     logger.info("Starting Alfred 后端服务...")
+    ingest_worker_pool.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """应用关闭"""
     logger.info("Shutting down Alfred 后端服务...")
+    ingest_worker_pool.stop()
 
 # ========================================
 # 开发环境运行
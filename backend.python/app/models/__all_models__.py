@@ -1,6 +1,6 @@
 from app.models.user import User
 from app.models.health import HealthProfile
-from app.models.activity import Activity, ActivityPoint, ActivityLap
+from app.models.activity import Activity, ActivityPoint, ActivityLap, ActivityStream, ActivityTrackLevel, ActivityCurve, UserCurve, ActivityIngestJob
 from app.models.account import Account
 from app.models.category import Category
 from app.models.transaction import Transaction
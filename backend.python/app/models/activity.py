@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, LargeBinary, Text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db import Base
@@ -14,10 +14,43 @@ class Activity(Base):
     avg_speed = Column(Float)
     max_speed = Column(Float)
     total_elevation = Column(Integer, default=0)
+    # 以下汇总字段在入库时由轨迹点计算；旧数据库启动时由 app/schema_upgrade.py 补上这些列，
+    # 已有记录的值由 app/scripts/backfill_activity_aggregates.py 补算
+    start_time = Column(DateTime)
+    end_time = Column(DateTime)
+    moving_time = Column(Integer)  # 移动时间(秒)
+    elevation_gain = Column(Float)  # 累计爬升(米)
+    elevation_loss = Column(Float)  # 累计下降(米)
+    avg_heart_rate = Column(Integer)
+    max_heart_rate = Column(Integer)
+    avg_power = Column(Integer)
+    max_power = Column(Integer)
+    normalized_power = Column(Integer)  # 标准化功率（30 秒滑动平均的四次方均值再开四次方）
+    avg_cadence = Column(Integer)
+    max_cadence = Column(Integer)
+    calories = Column(Integer)  # 来自 FIT session 消息
+    # 解析状态：pending 等待解析 / processing 解析中 / completed 完成 / failed 失败
+    status = Column(String(20), default="completed", index=True)
+    # 上传文件内容的 SHA-256（十六进制），用于识别同一用户重复上传的文件
+    file_hash = Column(String(64))
     created_at = Column(DateTime, default=datetime.utcnow)
 
     points = relationship("ActivityPoint", cascade="all, delete-orphan", backref="activity")
     laps = relationship("ActivityLap", cascade="all, delete-orphan", backref="activity")
+    streams = relationship("ActivityStream", cascade="all, delete-orphan", backref="activity")
+    track_levels = relationship("ActivityTrackLevel", cascade="all, delete-orphan", backref="activity")
+    curves = relationship("ActivityCurve", cascade="all, delete-orphan", backref="activity")
+
+    __table_args__ = (
+        # 同一用户相同内容的文件只能对应一条记录，并发上传时由数据库拒绝重复插入；
+        # file_hash 为空的旧记录不参与（MySQL 的唯一索引本身允许多个 NULL）
+        Index(
+            'uq_activity_user_file_hash', 'user_id', 'file_hash', unique=True,
+            sqlite_where=file_hash.isnot(None), postgresql_where=file_hash.isnot(None),
+        ),
+        # 列表按 (created_at, id) 做 keyset 分页
+        Index('idx_activity_user_created', 'user_id', 'created_at', 'id'),
+    )
 
 class ActivityPoint(Base):
     __tablename__ = "activity_points"
@@ -43,3 +76,76 @@ class ActivityLap(Base):
     avg_heart_rate = Column(Integer)
     avg_power = Column(Integer)
     avg_speed = Column(Float)
+
+class ActivityStream(Base):
+    """按列存储的轨迹点，每个 Activity 每个通道一行（编码见 activity_stream_service）"""
+    __tablename__ = "activity_streams"
+    id = Column(Integer, primary_key=True)
+    activity_id = Column(Integer, ForeignKey("activities.id", ondelete="CASCADE"))
+    # time / latitude / longitude / speed / heart_rate / power / cadence / elevation
+    channel = Column(String(20), nullable=False)
+    # varint 整数（time 通道为 Unix 时间，scale 为每秒的单位数） / decimal 放大 scale 倍后的整数 / float64
+    encoding = Column(String(20), nullable=False)
+    scale = Column(Integer, default=1)
+    # 采样点数量（含缺失值）
+    count = Column(Integer, nullable=False)
+    data = Column(LargeBinary(16 * 1024 * 1024), nullable=False)
+
+    __table_args__ = (
+        Index('idx_activity_stream_channel', 'activity_id', 'channel', unique=True),
+    )
+
+class ActivityTrackLevel(Base):
+    """入库时预先计算的抽稀轨迹，每个 Activity 每个精度等级一行"""
+    __tablename__ = "activity_track_levels"
+    id = Column(Integer, primary_key=True)
+    activity_id = Column(Integer, ForeignKey("activities.id", ondelete="CASCADE"), index=True)
+    # 该等级最多保留的点数
+    max_points = Column(Integer, nullable=False)
+    # zlib 压缩的 JSON：抽稀轨迹 track 和按时间分桶的图表采样 chart
+    data = Column(LargeBinary(16 * 1024 * 1024), nullable=False)
+
+class ActivityCurve(Base):
+    """单个 Activity 的最大均值曲线，每个通道一行"""
+    __tablename__ = "activity_curves"
+    id = Column(Integer, primary_key=True)
+    activity_id = Column(Integer, ForeignKey("activities.id", ondelete="CASCADE"), index=True)
+    # power / heart_rate
+    channel = Column(String(20), nullable=False)
+    # JSON：时长(秒) -> 该时长内的最大平均值
+    curve = Column(Text, nullable=False)
+
+class UserCurve(Base):
+    """用户的最佳最大均值曲线，每个通道每个统计区间一行，入库时增量更新"""
+    __tablename__ = "user_curves"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    channel = Column(String(20), nullable=False)
+    # all 历史最佳 / 90d 最近 90 天最佳
+    period = Column(String(10), nullable=False)
+    # JSON：时长(秒) -> {"value", "activity_id", "start_time"}
+    curve = Column(Text, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_user_curve', 'user_id', 'channel', 'period', unique=True),
+    )
+
+class ActivityIngestJob(Base):
+    """FIT 文件解析任务，作为本地队列由后台 worker 消费"""
+    __tablename__ = "activity_ingest_jobs"
+    id = Column(Integer, primary_key=True)
+    activity_id = Column(Integer, ForeignKey("activities.id", ondelete="CASCADE"), index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    file_path = Column(String(500), nullable=False)
+    # 同一次上传的任务共用一个批次号，用于汇总批量上传的进度
+    batch_id = Column(String(32), index=True)
+    # queued 排队中 / running 解析中 / done 完成 / failed 失败 / duplicate 重复上传（未解析，activity_id 指向已有记录）
+    status = Column(String(20), default="queued", index=True)
+    attempts = Column(Integer, default=0)
+    points_total = Column(Integer)
+    points_done = Column(Integer, default=0)
+    error = Column(String(500))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
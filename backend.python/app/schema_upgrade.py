@@ -0,0 +1,73 @@
+"""数据库表结构升级
+
+Base.metadata.create_all 只创建不存在的表，不会修改已存在的表。模型在已有表上新增的列和索引
+由 upgrade_schema() 在应用启动时补上，旧数据库不需要手动 ALTER TABLE，也不依赖补算脚本：
+
+- 缺少的列用 ALTER TABLE ADD COLUMN 补上，列的默认值（如 Activity.status 的 completed）写入已有的行
+- 缺少的索引按模型中的定义创建
+
+每一步都先检查再执行，可以重复运行；多个 Web 进程同时启动时，另一个进程先补上的列或索引会被跳过。
+"""
+
+import logging
+from sqlalchemy import inspect, literal, text
+from sqlalchemy.exc import DBAPIError
+from app.db import Base, engine
+
+logger = logging.getLogger(__name__)
+
+
+def _column_ddl(table_name: str, column) -> str:
+    column_type = column.type.compile(dialect=engine.dialect)
+    ddl = f"ALTER TABLE {table_name} ADD COLUMN {column.name} {column_type}"
+    default = column.default
+    if default is not None and default.is_scalar:
+        value = literal(default.arg, column.type).compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+        ddl += f" DEFAULT {value}"
+    return ddl
+
+
+def add_missing_columns(table) -> list:
+    """为已存在的表补上模型中新增的列，返回补上的列名"""
+    existing = {c["name"] for c in inspect(engine).get_columns(table.name)}
+    added = []
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(_column_ddl(table.name, column)))
+        except DBAPIError:
+            # 其他进程已经补上了这一列
+            if column.name not in {c["name"] for c in inspect(engine).get_columns(table.name)}:
+                raise
+            continue
+        added.append(column.name)
+    return added
+
+
+def add_missing_indexes(table) -> list:
+    """为已存在的表补上模型中新增的索引，返回补上的索引名"""
+    existing = {i["name"] for i in inspect(engine).get_indexes(table.name)}
+    added = []
+    for index in table.indexes:
+        if index.name in existing:
+            continue
+        try:
+            index.create(bind=engine)
+        except DBAPIError:
+            if index.name not in {i["name"] for i in inspect(engine).get_indexes(table.name)}:
+                raise
+            continue
+        added.append(index.name)
+    return added
+
+
+def upgrade_schema():
+    """创建缺少的表，并为已存在的表补上新增的列和索引"""
+    Base.metadata.create_all(bind=engine)
+    for table in Base.metadata.sorted_tables:
+        for column in add_missing_columns(table):
+            logger.info(f"Schema upgrade: added column {table.name}.{column}")
+        for index in add_missing_indexes(table):
+            logger.info(f"Schema upgrade: added index {table.name}.{index}")
@@ -0,0 +1,47 @@
+"""补算运动记录的汇总字段和最大均值曲线
+
+汇总字段（心率、功率、踏频、标准化功率、移动时间、爬升/下降等）和功率 / 心率的最大均值曲线
+在入库时计算，这些功能加入之前入库的运动记录由本脚本从已保存的轨迹点补算。
+列和索引由 app/schema_upgrade.py 在服务启动时补上，本脚本运行前同样先补一次，
+不需要先启动服务。
+
+用法: python app/scripts/backfill_activity_aggregates.py [每批数量]
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy.orm import Session
+from app.db import SessionLocal
+from app.models import __all_models__  # noqa: F401 注册所有表，外键才能建表
+from app.schema_upgrade import upgrade_schema
+from app.services.activity_ingest_service import backfill_activity_aggregates, backfill_activity_curves
+
+
+def main():
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    upgrade_schema()
+
+    db: Session = SessionLocal()
+    try:
+        count = backfill_activity_aggregates(db, batch_size)
+        print(f"✅ 成功补算了 {count} 条运动记录的汇总字段")
+        # 曲线中记录的 start_time 来自汇总字段，需在汇总之后补算
+        count = backfill_activity_curves(db, batch_size)
+        print(f"✅ 成功补算了 {count} 条运动记录的最大均值曲线")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ 补算失败: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("开始补算运动记录的汇总字段和最大均值曲线...")
+    main()
+    print("补算完成！")
@@ -0,0 +1,100 @@
+"""轨迹点写入性能对比
+
+解析 Activity.fit 的 record，分别用逐个 ORM 对象 db.add() 和
+bulk_insert_points 批量写入内存 SQLite，对比耗时
+
+用法: python app/scripts/bench_activity_points.py [FIT文件路径] [重复次数]
+"""
+
+import sys
+import os
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from pathlib import Path
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+from app.db import Base
+from app.models import __all_models__  # noqa: F401 注册所有表，外键才能建表
+from app.models.activity import Activity, ActivityPoint
+from app.services.activity_ingest_service import bulk_insert_points
+from app.services.fit_parser_service import get_fit_parser
+
+
+DEFAULT_FIT_FILE = Path(__file__).resolve().parents[3] / "FitSDKRelease_21.188.00" / "examples" / "Activity.fit"
+
+
+def read_records(fit_path):
+    """读取 record 消息为列值字典（不含 activity_id）"""
+    rows = []
+    for name, values in get_fit_parser().iter_messages(str(fit_path)):
+        if name != "record":
+            continue
+        rows.append({
+            "time": values["timestamp"],
+            "latitude": values["position_lat"],
+            "longitude": values["position_long"],
+            "speed": values["speed"],
+            "heart_rate": values["heart_rate"],
+            "power": values["power"],
+            "cadence": values["cadence"],
+            "elevation": values["altitude"],
+        })
+    return rows
+
+
+def insert_with_orm(db, activity_id, records):
+    for r in records:
+        db.add(ActivityPoint(activity_id=activity_id, **r))
+    db.commit()
+
+
+def insert_with_bulk(db, activity_id, records):
+    bulk_insert_points(db, [{"activity_id": activity_id, **r} for r in records])
+    db.commit()
+
+
+def run(insert, records, repeat):
+    """每次使用新的内存数据库，返回最短耗时（秒）和写入行数"""
+    best = None
+    count = 0
+    for _ in range(repeat):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        try:
+            a = Activity(user_id=None, name="bench", type="cycling")
+            db.add(a)
+            db.commit()
+
+            start = time.perf_counter()
+            insert(db, a.id, records)
+            elapsed = time.perf_counter() - start
+
+            count = db.query(func.count(ActivityPoint.id)).scalar()
+            best = elapsed if best is None else min(best, elapsed)
+        finally:
+            db.close()
+            engine.dispose()
+    return best, count
+
+
+def main():
+    fit_path = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FIT_FILE
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    records = read_records(fit_path)
+    print(f"{fit_path.name}: {len(records)} 个轨迹点，重复 {repeat} 次取最短耗时")
+
+    orm_time, orm_count = run(insert_with_orm, records, repeat)
+    bulk_time, bulk_count = run(insert_with_bulk, records, repeat)
+
+    print(f"ORM 逐个 db.add : {orm_time * 1000:8.1f} ms  ({orm_count} 行)")
+    print(f"批量 executemany: {bulk_time * 1000:8.1f} ms  ({bulk_count} 行)")
+    print(f"加速比: {orm_time / bulk_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""轨迹点按行存储与按列存储对比
+
+解析 FIT 文件后分别写入 activity_points（按行）和 activity_streams（按列 blob），
+对比写入耗时、读取全部轨迹点的耗时和数据库文件增长的大小
+
+用法: python app/scripts/bench_activity_streams.py [FIT文件路径] [重复次数]
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from pathlib import Path
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.db import Base
+from app.models import __all_models__  # noqa: F401 注册所有表，外键才能建表
+from app.models.activity import Activity, ActivityPoint, ActivityStream
+from app.services.activity_ingest_service import POINT_COLUMNS, bulk_insert_points, parse_fit_file
+from app.services.activity_stream_service import encode_point_streams, load_activity_columns
+
+
+DEFAULT_FIT_FILE = Path(__file__).resolve().parents[3] / "FitSDKRelease_21.188.00" / "examples" / "Activity.fit"
+
+
+def write_rows(db, activity_id, points):
+    bulk_insert_points(db, [dict(zip(POINT_COLUMNS, p), activity_id=activity_id) for p in points])
+    db.commit()
+
+
+def write_streams(db, activity_id, points):
+    columns = dict(zip(POINT_COLUMNS, (list(c) for c in zip(*points))))
+    for stream in encode_point_streams(columns):
+        db.add(ActivityStream(activity_id=activity_id, **stream))
+    db.commit()
+
+
+def read_orm(db, activity_id):
+    """原详情接口的读取方式：逐行构造 ORM 对象"""
+    return db.query(ActivityPoint).filter_by(activity_id=activity_id).order_by(ActivityPoint.id).all()
+
+
+def database_size(db):
+    page_count = db.execute(text("PRAGMA page_count")).scalar()
+    page_size = db.execute(text("PRAGMA page_size")).scalar()
+    return page_count * page_size
+
+
+def run(write, read, points, repeat):
+    """每次使用新的 SQLite 文件，返回 (最短写入耗时, 最短读取耗时, 数据库增长字节数)"""
+    best_write = best_read = None
+    grown = 0
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{tmp}/bench.db")
+            Base.metadata.create_all(bind=engine)
+            db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+            try:
+                a = Activity(user_id=None, name="bench", type="cycling")
+                db.add(a)
+                db.commit()
+                activity_id = a.id
+                before = database_size(db)
+
+                start = time.perf_counter()
+                write(db, activity_id, points)
+                write_time = time.perf_counter() - start
+                grown = database_size(db) - before
+
+                db.expunge_all()
+                start = time.perf_counter()
+                read(db, activity_id)
+                read_time = time.perf_counter() - start
+
+                best_write = write_time if best_write is None else min(best_write, write_time)
+                best_read = read_time if best_read is None else min(best_read, read_time)
+            finally:
+                db.close()
+                engine.dispose()
+    return best_write, best_read, grown
+
+
+def main():
+    fit_path = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FIT_FILE
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    points = parse_fit_file(str(fit_path), point_storage="rows")["points"]
+    print(f"{fit_path.name}: {len(points)} 个轨迹点，重复 {repeat} 次取最短耗时")
+
+    cases = [
+        ("按行 + ORM 读取  ", write_rows, read_orm),
+        ("按行 + Core 读取 ", write_rows, load_activity_columns),
+        ("按列 blob        ", write_streams, load_activity_columns),
+    ]
+    for name, write, read in cases:
+        write_time, read_time, grown = run(write, read, points, repeat)
+        print(f"{name}: 写入 {write_time * 1000:7.1f} ms  读取 {read_time * 1000:7.1f} ms  占用 {grown / 1024:8.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""FIT 解析后端对比
+
+用每个已安装的解析后端（fitparse / garmin_fit_sdk）解析同一批 FIT 文件，
+报告每个文件的解析耗时和吞吐量，为每个文件选用较快的后端，并逐字段对比归一化后的
+record / lap / session，列出两个后端结果不同的字段。最后汇总每个文件选用的后端，
+以及按文件选用与只用单个后端的总耗时。
+
+用法: python app/scripts/bench_fit_parsers.py [FIT文件或目录] [重复次数]
+"""
+
+import sys
+import os
+import math
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from collections import Counter
+from pathlib import Path
+from app.services.fit_parser_service import FIT_PARSERS, MESSAGE_FIELDS, available_fit_parsers
+
+
+DEFAULT_FIT_DIR = Path(__file__).resolve().parents[3] / "FitSDKRelease_21.188.00" / "py" / "tests" / "fits"
+
+
+def parse(parser, fit_path):
+    """返回 {消息名: [归一化字段]}"""
+    messages = {name: [] for name in MESSAGE_FIELDS}
+    for name, values in parser.iter_messages(str(fit_path)):
+        messages[name].append(values)
+    return messages
+
+
+def timed(parser, fit_path, repeat):
+    """返回 (最短耗时, 解析结果)；解析失败时返回 (None, 异常)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            result = parse(parser, fit_path)
+        except Exception as e:
+            return None, e
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def same_value(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        if a is None or b is None:
+            return False
+        return math.isclose(a, b, rel_tol=1e-6, abs_tol=1e-6)
+    return a == b
+
+
+def diff_messages(base, other):
+    """逐字段对比两个后端的解析结果，返回 {"消息名.字段": 不同的条数}，条数不同时记在 "消息名.count" """
+    diffs = Counter()
+    for name, fields in MESSAGE_FIELDS.items():
+        rows_a, rows_b = base[name], other[name]
+        if len(rows_a) != len(rows_b):
+            diffs[f"{name}.count"] = abs(len(rows_a) - len(rows_b))
+        # 合并心率时 record 可能排在其他消息之后，消息内按顺序对比
+        for row_a, row_b in zip(rows_a, rows_b):
+            for field in fields:
+                if not same_value(row_a[field], row_b[field]):
+                    diffs[f"{name}.{field}"] += 1
+    return diffs
+
+
+def collect_files(target):
+    path = Path(target)
+    if path.is_dir():
+        return sorted(p for p in path.iterdir() if p.suffix.lower() == ".fit")
+    return [path]
+
+
+def main():
+    target = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_FIT_DIR
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    names = available_fit_parsers()
+    if not names:
+        print("❌ 未安装 FIT 解析库（garmin_fit_sdk 或 fitparse）")
+        return
+    print(f"解析后端: {', '.join(names)}，每个文件重复 {repeat} 次取最短耗时")
+    parsers = {name: FIT_PARSERS[name]() for name in names}
+
+    totals = Counter()
+    wins = Counter()
+    # 文件名 -> (选用的后端, 耗时)
+    picks = {}
+    for fit_path in collect_files(target):
+        size_mb = fit_path.stat().st_size / (1024 * 1024)
+        print(f"\n{fit_path.name} ({fit_path.stat().st_size} 字节)")
+
+        results = {}
+        for name, parser in parsers.items():
+            elapsed, result = timed(parser, fit_path, repeat)
+            if elapsed is None:
+                print(f"  {name:<16} 解析失败: {result}")
+                continue
+            results[name] = (elapsed, result)
+            records = len(result["record"])
+            totals[name] += elapsed
+            print(
+                f"  {name:<16} {elapsed * 1000:8.1f} ms  {records:6d} 个 record  "
+                f"{records / elapsed:10.0f} record/s  {size_mb / elapsed:6.2f} MB/s"
+            )
+
+        if not results:
+            continue
+        fastest = min(results, key=lambda name: results[name][0])
+        wins[fastest] += 1
+        picks[fit_path.name] = (fastest, results[fastest][0])
+        print(f"  选用: {fastest}")
+
+        # 以第一个后端为基准对比其他后端的结果
+        base_name = next(iter(results))
+        for name in list(results)[1:]:
+            diffs = diff_messages(results[base_name][1], results[name][1])
+            if diffs:
+                detail = ", ".join(f"{key} {count} 条" for key, count in sorted(diffs.items()))
+                print(f"  {base_name} 与 {name} 不同: {detail}")
+            else:
+                print(f"  {base_name} 与 {name} 结果一致")
+
+    if not picks:
+        return
+    print("\n按文件选用的后端:")
+    for file_name, (name, elapsed) in picks.items():
+        print(f"  {file_name:<40} {name:<16} {elapsed * 1000:8.1f} ms")
+
+    if len(parsers) > 1:
+        print("\n汇总:")
+        for name in parsers:
+            print(f"  {name:<16} 总耗时 {totals[name] * 1000:8.1f} ms，{wins[name]} 个文件较快")
+        print(f"  按文件选用       总耗时 {sum(elapsed for _, elapsed in picks.values()) * 1000:8.1f} ms")
+        print(f"建议 FIT_PARSER={min(totals, key=totals.get)}")
+
+
+if __name__ == "__main__":
+    main()
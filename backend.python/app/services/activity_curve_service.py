@@ -0,0 +1,229 @@
+"""功率 / 心率的最大均值曲线（mean-max curve）
+
+对每个时长（1 秒到 5 小时）求运动中该时长内的最大平均值，例如“最佳 20 分钟功率”。
+入库时计算每个 Activity 的曲线并保存，同时增量更新用户的历史最佳和最近 90 天最佳曲线，
+查询时直接读取，不再扫描轨迹点。最近 90 天曲线中有记录滑出窗口时，由入库和后台解析线程
+（refresh_rolling_user_curves）重新计算，查询接口只读。
+
+计算方法：先按时间把采样重采样为每秒一个值，再用前缀和求每个时长的滑动窗口之和，
+每个时长 O(n)。超过 MAX_FILL_SECONDS 的间隔视为停止：功率按 0 计入，
+心率跳过停止的时间，把间隔两侧的采样直接相连，不让停止的时间拉低平均心率。
+"""
+
+import json
+from datetime import datetime, timedelta
+from itertools import accumulate
+from operator import sub
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+from sqlalchemy.orm import Session
+from app.models.activity import Activity, ActivityCurve, UserCurve
+
+# 曲线的时长（秒）
+CURVE_DURATIONS = (
+    1, 2, 3, 5, 10, 15, 20, 30, 45,
+    60, 120, 180, 300, 480, 600, 900, 1200, 1800, 2700,
+    3600, 5400, 7200, 10800, 14400, 18000,
+)
+
+# 计算曲线的通道
+CURVE_CHANNELS = ("power", "heart_rate")
+
+# 用户曲线的统计区间：all 历史最佳 / 90d 最近 90 天最佳
+CURVE_PERIODS = ("all", "90d")
+ROLLING_DAYS = 90
+
+# 相邻采样间隔不超过该值（秒）时，中间缺失的秒沿用上一个值；更长的间隔视为停止
+MAX_FILL_SECONDS = 5
+
+# 停止的时间按 0 计入曲线的通道，其他通道跳过停止的时间
+ZERO_FILL_CHANNELS = ("power",)
+
+
+def resample_segments(times: Sequence[Optional[datetime]], values: Sequence[Any]) -> List[Tuple[int, List[float]]]:
+    """把采样按时间重采样为每秒一个值，在超过 MAX_FILL_SECONDS 的间隔处分段
+
+    返回 [(该段第一个值距第一个采样的秒数, 每秒的值)]，没有时间戳或值为空的采样忽略，
+    时间倒退到当前段开始之前的采样也忽略。
+    """
+    samples = [(t, v) for t, v in zip(times, values) if t is not None and v is not None]
+    if not samples:
+        return []
+
+    start = samples[0][0]
+    segments: List[Tuple[int, List[float]]] = []
+    offset = 0
+    segment: List[float] = []
+    last_value = 0
+    for t, v in samples:
+        second = int((t - start).total_seconds()) - offset
+        if second < len(segment):
+            # 同一秒内有多个采样时取最后一个
+            if second >= 0:
+                segment[second] = v
+            continue
+        gap = second - len(segment)
+        if gap > MAX_FILL_SECONDS:
+            segments.append((offset, segment))
+            offset += second
+            segment = []
+        else:
+            segment.extend([last_value] * gap)
+        segment.append(v)
+        last_value = v
+    segments.append((offset, segment))
+    return segments
+
+
+def resample_per_second(times: Sequence[Optional[datetime]], values: Sequence[Any]) -> List[float]:
+    """把采样按时间重采样为每秒一个值，超过 MAX_FILL_SECONDS 的间隔按 0 填充"""
+    result: List[float] = []
+    for offset, segment in resample_segments(times, values):
+        result.extend([0] * (offset - len(result)))
+        result.extend(segment)
+    return result
+
+
+def mean_max_curve(samples: Sequence[float], durations: Sequence[int] = CURVE_DURATIONS) -> Dict[int, float]:
+    """用前缀和计算每个时长的最大平均值，超过运动时长的时长不返回"""
+    prefix = [0, *accumulate(samples)]
+    n = len(samples)
+    curve = {}
+    for d in durations:
+        if d > n:
+            break
+        best = max(map(sub, prefix[d:], prefix[:n - d + 1]))
+        curve[d] = round(best / d, 1)
+    return curve
+
+
+def compute_activity_curves(columns: Dict[str, List[Any]]) -> Dict[str, Dict[int, float]]:
+    """从轨迹点（列名 -> 值列表，需包含 time 列）计算各通道的曲线，没有数据的通道不返回"""
+    curves = {}
+    for channel in CURVE_CHANNELS:
+        if channel in ZERO_FILL_CHANNELS:
+            samples = resample_per_second(columns["time"], columns[channel])
+        else:
+            samples = [v for _, segment in resample_segments(columns["time"], columns[channel]) for v in segment]
+        curve = mean_max_curve(samples)
+        if curve:
+            curves[channel] = curve
+    return curves
+
+
+def _dump(values: Dict[int, Any]) -> str:
+    return json.dumps({str(d): v for d, v in values.items()}, separators=(",", ":"))
+
+
+def _load(text: Optional[str]) -> Dict[int, Any]:
+    return {int(d): v for d, v in json.loads(text).items()} if text else {}
+
+
+def _rolling_cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(days=ROLLING_DAYS)
+
+
+def _has_expired_entries(best: Dict[int, Any]) -> bool:
+    """最近 90 天曲线中是否有记录已滑出窗口"""
+    cutoff = _rolling_cutoff().isoformat()
+    return any(entry["start_time"] is None or entry["start_time"] < cutoff for entry in best.values())
+
+
+def _get_user_curve(db: Session, user_id: int, channel: str, period: str) -> UserCurve:
+    row = db.query(UserCurve).filter_by(user_id=user_id, channel=channel, period=period).first()
+    if row is None:
+        row = UserCurve(user_id=user_id, channel=channel, period=period, curve="{}")
+        db.add(row)
+        # 同一事务中后续的查询需要能找到这一行（会话未开启 autoflush）
+        db.flush()
+    return row
+
+
+def _merge(best: Dict[int, Any], curve: Dict[int, float], activity: Activity) -> bool:
+    """把一个 Activity 的曲线合并进最佳曲线，返回是否有更新"""
+    changed = False
+    start_time = activity.start_time.isoformat() if activity.start_time else None
+    for d, value in curve.items():
+        if d not in best or value > best[d]["value"]:
+            best[d] = {"value": value, "activity_id": activity.id, "start_time": start_time}
+            changed = True
+    return changed
+
+
+def store_activity_curves(db: Session, activity: Activity, curves: Dict[str, Dict[int, float]]):
+    """保存 Activity 的曲线，并增量更新该用户的历史最佳和最近 90 天最佳曲线（不提交事务）"""
+    in_window = activity.start_time is not None and activity.start_time >= _rolling_cutoff()
+    for channel, curve in curves.items():
+        db.add(ActivityCurve(activity_id=activity.id, channel=channel, curve=_dump(curve)))
+        if activity.user_id is None:
+            continue
+
+        periods = ("all", "90d") if in_window else ("all",)
+        for period in periods:
+            row = _get_user_curve(db, activity.user_id, channel, period)
+            best = _load(row.curve)
+            changed = False
+            if period == "90d" and _has_expired_entries(best):
+                # 顺便去掉滑出窗口的记录，本 Activity 的曲线尚未 flush，下面单独合并
+                best = compute_user_curve(db, activity.user_id, channel, period)
+                changed = True
+            if _merge(best, curve, activity) or changed:
+                row.curve = _dump(best)
+                row.updated_at = datetime.utcnow()
+
+
+def compute_user_curve(db: Session, user_id: int, channel: str, period: str) -> Dict[int, Dict[str, Any]]:
+    """从该用户所有 Activity 的曲线计算最佳曲线，只读不保存"""
+    q = (
+        db.query(ActivityCurve, Activity)
+        .join(Activity, Activity.id == ActivityCurve.activity_id)
+        .filter(Activity.user_id == user_id, ActivityCurve.channel == channel)
+    )
+    if period == "90d":
+        q = q.filter(Activity.start_time >= _rolling_cutoff())
+
+    best: Dict[int, Any] = {}
+    for curve_row, activity in q.all():
+        _merge(best, _load(curve_row.curve), activity)
+    return best
+
+
+def rebuild_user_curve(db: Session, user_id: int, channel: str, period: str) -> UserCurve:
+    """从该用户所有 Activity 的曲线重新计算并保存最佳曲线（不提交事务）"""
+    best = compute_user_curve(db, user_id, channel, period)
+    row = _get_user_curve(db, user_id, channel, period)
+    row.curve = _dump(best)
+    row.updated_at = datetime.utcnow()
+    return row
+
+
+def refresh_rolling_user_curves(db: Session) -> int:
+    """重新计算有记录滑出窗口的最近 90 天曲线（不提交事务），返回重新计算的数量
+
+    由后台解析线程定期调用，用户没有新的上传时曲线也会随时间更新。
+    """
+    count = 0
+    for row in db.query(UserCurve).filter_by(period="90d").all():
+        if _has_expired_entries(_load(row.curve)):
+            rebuild_user_curve(db, row.user_id, row.channel, row.period)
+            count += 1
+    return count
+
+
+def get_activity_curves(db: Session, activity_id: int) -> Dict[str, Dict[int, float]]:
+    """读取 Activity 的各通道曲线"""
+    rows = db.query(ActivityCurve).filter_by(activity_id=activity_id).all()
+    return {row.channel: _load(row.curve) for row in rows}
+
+
+def get_user_curve(db: Session, user_id: int, channel: str, period: str) -> Dict[int, Dict[str, Any]]:
+    """读取用户的最佳曲线：时长 -> {"value", "activity_id", "start_time"}
+
+    只读。最近 90 天曲线中有记录滑出窗口、后台还未重新计算时，临时从窗口内的 Activity 曲线计算，不保存。
+    """
+    row = db.query(UserCurve).filter_by(user_id=user_id, channel=channel, period=period).first()
+    best = _load(row.curve) if row else {}
+
+    if period == "90d" and _has_expired_entries(best):
+        best = compute_user_curve(db, user_id, channel, period)
+
+    return best
@@ -0,0 +1,903 @@
+"""运动数据入库服务
+
+上传接口只保存文件并创建 pending 状态的 Activity 和解析任务，
+由后台调度线程从任务表中按批领取任务，在进程池中并行解析 FIT 文件，
+再写入轨迹点、圈和汇总字段。
+
+轨迹点数量很大（4小时骑行约1.4万个点），不经过ORM对象，
+直接按批次 executemany 写入 activity_points 表
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models.activity import Activity, ActivityPoint, ActivityLap, ActivityStream, ActivityTrackLevel, ActivityIngestJob
+from app.services.activity_curve_service import (
+    compute_activity_curves,
+    refresh_rolling_user_curves,
+    store_activity_curves,
+)
+from app.services.activity_stream_service import encode_point_streams, load_activity_columns
+from app.services.fit_parser_service import get_fit_parser
+from app.services.track_simplify_service import build_track_levels, encode_track_level
+try:
+    import fcntl
+except ImportError:
+    # Windows 没有 fcntl，不做跨进程互斥
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 上传文件的根目录，任务表中记录相对该目录的路径
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
+# 每批写入的轨迹点数量
+POINT_BATCH_SIZE = 5000
+
+# 补算汇总时读取的轨迹点通道
+AGGREGATE_COLUMNS = ("time", "speed", "heart_rate", "power", "cadence", "elevation")
+
+# 补算最大均值曲线时读取的轨迹点通道
+CURVE_COLUMNS = ("time", "power", "heart_rate")
+
+# 失败信息最大长度（与 ActivityIngestJob.error 列一致）
+MAX_ERROR_LENGTH = 500
+
+# 调度线程互斥锁文件，多个 Web 进程中只有持有该锁的进程解析任务
+DISPATCHER_LOCK_FILE = DATA_DIR / "ingest_dispatcher.lock"
+
+
+def bulk_insert_points(db: Session, rows: List[Dict[str, Any]], batch_size: int = POINT_BATCH_SIZE) -> int:
+    """批量写入轨迹点
+
+    rows 中每一项为 activity_points 的列名到值的字典，
+    使用 Core insert + executemany，不创建 ActivityPoint 对象、不进入 unit of work。
+    不提交事务，由调用方决定 commit / rollback。
+    返回写入的行数。
+    """
+    if not rows:
+        return 0
+
+    table = ActivityPoint.__table__
+    for start in range(0, len(rows), batch_size):
+        db.execute(table.insert(), rows[start:start + batch_size])
+
+    return len(rows)
+
+
+def enqueue_ingest_job(db: Session, activity: Activity, rel_path: str, batch_id: Optional[str] = None) -> ActivityIngestJob:
+    """为已保存的 FIT 文件创建解析任务（不提交事务），同一次上传的任务使用相同的 batch_id"""
+    job = ActivityIngestJob(
+        activity_id=activity.id,
+        user_id=activity.user_id,
+        file_path=rel_path,
+        batch_id=batch_id,
+        status="queued",
+    )
+    db.add(job)
+    return job
+
+
+def find_duplicate_activity(db: Session, user_id: int, file_hash: str) -> Optional[Activity]:
+    """查找该用户已上传过的相同内容的文件对应的 Activity"""
+    return (
+        db.query(Activity)
+        .filter(Activity.user_id == user_id, Activity.file_hash == file_hash)
+        .order_by(Activity.id)
+        .first()
+    )
+
+
+def requeue_failed_activity(db: Session, activity: Activity, batch_id: Optional[str] = None) -> Optional[ActivityIngestJob]:
+    """为解析失败的 Activity 重新创建解析任务（不提交事务）
+
+    重新上传相同内容的文件时调用。用条件更新 (status == 'failed') 保证同时上传时只排队一次，
+    Activity 已不是 failed 状态时返回 None，由调用方按重复上传处理。
+    """
+    requeued = (
+        db.query(Activity)
+        .filter(Activity.id == activity.id, Activity.status == "failed")
+        .update({"status": "pending"}, synchronize_session=False)
+    )
+    if requeued != 1:
+        return None
+    db.refresh(activity)
+    return enqueue_ingest_job(db, activity, activity.name, batch_id)
+
+
+def record_duplicate_upload(db: Session, activity: Activity, batch_id: Optional[str] = None) -> ActivityIngestJob:
+    """记录一次重复上传（不提交事务）
+
+    不保存文件也不解析，只写入一条 duplicate 状态的任务，以便批量上传进度中统计重复文件数。
+    """
+    now = datetime.utcnow()
+    job = ActivityIngestJob(
+        activity_id=activity.id,
+        user_id=activity.user_id,
+        file_path=activity.name,
+        batch_id=batch_id,
+        status="duplicate",
+        started_at=now,
+        finished_at=now,
+    )
+    db.add(job)
+    return job
+
+
+class ActivityAggregator:
+    """在单次遍历 record 的过程中增量计算运动汇总，不保留轨迹点"""
+
+    # 计算平均值和最大值的通道
+    CHANNELS = ("heart_rate", "power", "cadence")
+
+    # 标准化功率的滑动窗口（秒）
+    NP_WINDOW_SECONDS = 30
+
+    # 速度不低于该值（m/s）时计入移动时间
+    MOVING_SPEED_THRESHOLD = 0.5
+
+    # 相邻两点间隔超过该值（秒）视为暂停，不计入移动时间
+    MOVING_MAX_GAP_SECONDS = 30
+
+    # 累计爬升/下降先对海拔做 3 点中值滤波去掉单点跳变，相对上一个计入点的变化达到
+    # ELEVATION_THRESHOLD（米）才计入，过滤气压计和 GPS 海拔的小幅抖动
+    ELEVATION_THRESHOLD = 3.0
+
+    def __init__(self):
+        self.first_time = None
+        self.last_time = None
+        self.last_distance = None
+        self.max_speed = None
+        self.min_elevation = None
+        self.max_elevation = None
+        self.elevation_gain = 0.0
+        self.elevation_loss = 0.0
+        self.moving_time = 0.0
+        # 最近 3 个海拔（中值滤波）和上一个计入累计爬升/下降的海拔
+        self._recent_elevations = deque(maxlen=3)
+        self._ref_elevation = None
+        # 通道名 -> [总和, 个数, 最大值]
+        self._channels = {name: [0, 0, None] for name in self.CHANNELS}
+        # 标准化功率：窗口内的 (时间, 功率)、窗口内功率之和、滑动平均四次方之和与个数
+        self._power_window = deque()
+        self._power_window_sum = 0
+        self._first_power_time = None
+        self._np_sum = 0.0
+        self._np_count = 0
+
+    def add_point(self, row: Dict[str, Any], distance=None):
+        """累加一个轨迹点（activity_points 的列值字典）及该点的累计距离（米）"""
+        ts = row["time"]
+        speed = row["speed"]
+        if ts:
+            if self.first_time is None:
+                self.first_time = ts
+            elif speed is not None and speed >= self.MOVING_SPEED_THRESHOLD:
+                gap = (ts - self.last_time).total_seconds()
+                if 0 < gap <= self.MOVING_MAX_GAP_SECONDS:
+                    self.moving_time += gap
+            self.last_time = ts
+
+        if distance is not None:
+            self.last_distance = distance
+
+        if speed is not None:
+            if self.max_speed is None or speed > self.max_speed:
+                self.max_speed = speed
+
+        elevation = row["elevation"]
+        if elevation is not None:
+            if self.min_elevation is None or elevation < self.min_elevation:
+                self.min_elevation = elevation
+            if self.max_elevation is None or elevation > self.max_elevation:
+                self.max_elevation = elevation
+            self._add_elevation(elevation)
+
+        for name, acc in self._channels.items():
+            value = row[name]
+            if value is not None:
+                acc[0] += value
+                acc[1] += 1
+                if acc[2] is None or value > acc[2]:
+                    acc[2] = value
+
+        power = row["power"]
+        if ts and power is not None:
+            self._add_power(ts, power)
+
+    def _add_elevation(self, elevation):
+        """中值滤波后按阈值累加爬升和下降"""
+        recent = self._recent_elevations
+        recent.append(elevation)
+        if self._ref_elevation is None:
+            self._ref_elevation = elevation
+            return
+        if len(recent) < 3:
+            return
+        smoothed = sorted(recent)[1]
+        delta = smoothed - self._ref_elevation
+        if delta >= self.ELEVATION_THRESHOLD:
+            self.elevation_gain += delta
+            self._ref_elevation = smoothed
+        elif delta <= -self.ELEVATION_THRESHOLD:
+            self.elevation_loss -= delta
+            self._ref_elevation = smoothed
+
+    def _add_power(self, ts, power):
+        """按时间维护 30 秒滑动平均，累加其四次方"""
+        window = self._power_window
+        window.append((ts, power))
+        self._power_window_sum += power
+        while (ts - window[0][0]).total_seconds() >= self.NP_WINDOW_SECONDS:
+            self._power_window_sum -= window.popleft()[1]
+
+        if self._first_power_time is None:
+            self._first_power_time = ts
+        # 满一个窗口后才开始计算滑动平均
+        if (ts - self._first_power_time).total_seconds() >= self.NP_WINDOW_SECONDS - 1:
+            rolling = self._power_window_sum / len(window)
+            self._np_sum += rolling ** 4
+            self._np_count += 1
+
+    def result(self) -> Dict[str, Any]:
+        """返回汇总结果，距离单位米，时长单位秒，速度单位 km/h（max_speed 保持 m/s）"""
+        total_distance = int(self.last_distance) if self.last_distance is not None else None
+
+        duration = None
+        if self.first_time and self.last_time:
+            duration = int((self.last_time - self.first_time).total_seconds())
+
+        summary = {
+            "start_time": self.first_time,
+            "end_time": self.last_time,
+            "distance": total_distance,
+            "duration": duration,
+            # Convert to km/h: total_distance (meters) / duration (seconds) -> m/s, *3.6 -> km/h
+            "avg_speed": float(total_distance * 3.6 / duration) if (total_distance and duration and duration > 0) else None,
+            "max_speed": self.max_speed,
+            "total_elevation": int(self.max_elevation - self.min_elevation) if self.max_elevation is not None else None,
+            "elevation_gain": self.elevation_gain if self._ref_elevation is not None else None,
+            "elevation_loss": self.elevation_loss if self._ref_elevation is not None else None,
+            "moving_time": int(self.moving_time),
+            "normalized_power": (self._np_sum / self._np_count) ** 0.25 if self._np_count else None,
+        }
+        for name, (total, count, maximum) in self._channels.items():
+            summary[f"avg_{name}"] = total / count if count else None
+            summary[f"max_{name}"] = maximum
+        return summary
+
+
+def apply_activity_aggregates(activity: Activity, summary: Dict[str, Any]):
+    """把 ActivityAggregator 的心率、功率、踏频、移动时间和爬升等汇总写入 Activity 的字段"""
+    def _int(value):
+        return int(value) if value is not None else None
+
+    activity.start_time = summary["start_time"]
+    activity.end_time = summary["end_time"]
+    activity.moving_time = summary["moving_time"]
+    activity.elevation_gain = summary["elevation_gain"]
+    activity.elevation_loss = summary["elevation_loss"]
+    activity.avg_heart_rate = _int(summary["avg_heart_rate"])
+    activity.max_heart_rate = summary["max_heart_rate"]
+    activity.avg_power = _int(summary["avg_power"])
+    activity.max_power = summary["max_power"]
+    activity.normalized_power = _int(summary["normalized_power"])
+    activity.avg_cadence = _int(summary["avg_cadence"])
+    activity.max_cadence = summary["max_cadence"]
+
+
+def backfill_activity_curves(db: Session, batch_size: int = 100) -> int:
+    """为没有最大均值曲线的已完成 Activity 从已保存的轨迹点计算曲线
+
+    按 Activity 顺序逐个合并进用户最佳曲线，每批提交一次，返回计算的数量。
+    """
+    count = 0
+    last_id = 0
+    while True:
+        activities = (
+            db.query(Activity)
+            .filter(
+                ~Activity.curves.any(),
+                or_(Activity.status == "completed", Activity.status.is_(None)),
+                Activity.id > last_id,
+            )
+            .order_by(Activity.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not activities:
+            return count
+
+        for activity in activities:
+            columns = load_activity_columns(db, activity.id, CURVE_COLUMNS)
+            store_activity_curves(db, activity, compute_activity_curves(columns))
+            last_id = activity.id
+            count += 1
+        db.commit()
+
+
+def backfill_activity_aggregates(db: Session, batch_size: int = 100) -> int:
+    """为汇总字段为空（moving_time 为 NULL）的已完成 Activity 从已保存的轨迹点补算汇总
+
+    每批提交一次，返回补算的数量。卡路里来自 FIT 的 session 消息，无法从轨迹点补算。
+    """
+    count = 0
+    last_id = 0
+    while True:
+        activities = (
+            db.query(Activity)
+            .filter(
+                Activity.moving_time.is_(None),
+                # 解析状态列加入之前的记录 status 为空
+                or_(Activity.status == "completed", Activity.status.is_(None)),
+                Activity.id > last_id,
+            )
+            .order_by(Activity.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not activities:
+            return count
+
+        for activity in activities:
+            columns = load_activity_columns(db, activity.id, AGGREGATE_COLUMNS)
+            aggregator = ActivityAggregator()
+            for values in zip(*(columns[name] for name in AGGREGATE_COLUMNS)):
+                aggregator.add_point(dict(zip(AGGREGATE_COLUMNS, values)))
+            apply_activity_aggregates(activity, aggregator.result())
+            last_id = activity.id
+            count += 1
+        db.commit()
+
+
+# activity_points 中由 FIT record 填充的列，parse_fit_file 按此顺序返回元组
+POINT_COLUMNS = ("time", "latitude", "longitude", "speed", "heart_rate", "power", "cadence", "elevation")
+
+
+def parse_fit_file(
+    fit_path: str,
+    point_storage: str = settings.POINT_STORAGE,
+    parser: Optional[str] = None,
+) -> Dict[str, Any]:
+    """解析 FIT 文件，只读文件不访问数据库，可在子进程中执行
+
+    只遍历一次消息流，record 同时累加汇总，最后计算各精度等级的抽稀轨迹。
+    返回 {"point_count": 轨迹点数, "points": [按 POINT_COLUMNS 排列的元组], "streams": [按列编码的通道],
+    "laps": [圈字段字典], "summary": 汇总, "track_levels": [(等级, 编码后的数据)],
+    "curves": {通道: 最大均值曲线}}。
+    point_storage 为 "streams" 时轨迹点按列编码、points 为空；为 "rows" 时 streams 为空，
+    轨迹点用元组而不是字典，减少跨进程传回结果时的序列化开销。
+    parser 为解析后端名称（见 fit_parser_service），默认取 settings.FIT_PARSER。
+    """
+    aggregator = ActivityAggregator()
+    points = []
+    laps = []
+    # 多运动（multisport）文件有多个 session，卡路里累加
+    total_calories = None
+
+    for name, values in get_fit_parser(parser).iter_messages(str(fit_path)):
+        if name == "record":
+            row = {
+                "time": values.get("timestamp"),
+                "latitude": values.get("position_lat"),
+                "longitude": values.get("position_long"),
+                "speed": values.get("speed"),
+                "heart_rate": values.get("heart_rate"),
+                "power": values.get("power"),
+                "cadence": values.get("cadence"),
+                "elevation": values.get("altitude"),
+            }
+            aggregator.add_point(row, values.get("distance"))
+            points.append(tuple(row[c] for c in POINT_COLUMNS))
+
+        elif name == "session":
+            calories = values["total_calories"]
+            if calories is not None:
+                total_calories = (total_calories or 0) + calories
+
+        elif name == "lap":
+            # 记录圈（lap）
+            elapsed = values["total_elapsed_time"]
+            distance_l = values["total_distance"]
+            laps.append({
+                "lap_index": len(laps) + 1,
+                "start_time": values.get("start_time"),
+                "elapsed_time": int(elapsed) if elapsed is not None else None,
+                "distance": int(distance_l) if distance_l is not None else None,
+                "avg_heart_rate": values.get("avg_heart_rate"),
+                "avg_power": values.get("avg_power"),
+                "avg_speed": values.get("avg_speed"),
+            })
+
+    # 抽稀、按列编码和最大均值曲线计算量较大，在解析进程中完成
+    track_levels = []
+    streams = []
+    curves = {}
+    if points:
+        columns = dict(zip(POINT_COLUMNS, (list(c) for c in zip(*points))))
+        track_levels = [(level["max_points"], encode_track_level(level)) for level in build_track_levels(columns)]
+        curves = compute_activity_curves(columns)
+        if point_storage == "streams":
+            streams = encode_point_streams(columns)
+
+    return {
+        "point_count": len(points),
+        "points": points if point_storage == "rows" else [],
+        "streams": streams,
+        "laps": laps,
+        "summary": dict(aggregator.result(), calories=total_calories),
+        "track_levels": track_levels,
+        "curves": curves,
+    }
+
+
+def store_parsed_activity(db: Session, activity: Activity, parsed: Dict[str, Any], job: Optional[ActivityIngestJob] = None) -> int:
+    """把 parse_fit_file 的结果写入轨迹点 / laps / 抽稀轨迹 / 最大均值曲线，并更新 Activity 的统计字段
+
+    轨迹点按解析时的存储方式写入 activity_streams（按列）或 activity_points（按行）。
+    不提交事务，由调用方决定 commit / rollback。返回写入的轨迹点数量。
+    """
+    # 轨迹点按批次写入，不逐个创建 ORM 对象
+    points = parsed["points"]
+    for start in range(0, len(points), POINT_BATCH_SIZE):
+        rows = [
+            dict(zip(POINT_COLUMNS, p), activity_id=activity.id)
+            for p in points[start:start + POINT_BATCH_SIZE]
+        ]
+        bulk_insert_points(db, rows)
+
+    for stream in parsed["streams"]:
+        db.add(ActivityStream(activity_id=activity.id, **stream))
+    points_done = parsed["point_count"]
+
+    for lap in parsed["laps"]:
+        db.add(ActivityLap(activity_id=activity.id, **lap))
+
+    for max_points, data in parsed["track_levels"]:
+        db.add(ActivityTrackLevel(activity_id=activity.id, max_points=max_points, data=data))
+
+    # 更新 Activity 的汇总字段
+    summary = parsed["summary"]
+    activity.distance = summary["distance"] or 0
+    activity.duration = summary["duration"] or 0
+    activity.avg_speed = summary["avg_speed"]
+    activity.max_speed = summary["max_speed"]
+    if summary["total_elevation"] is not None:
+        activity.total_elevation = summary["total_elevation"]
+    activity.calories = summary["calories"]
+    apply_activity_aggregates(activity, summary)
+
+    # 最大均值曲线用到 start_time，需在汇总字段之后写入
+    store_activity_curves(db, activity, parsed["curves"])
+
+    if job is not None:
+        job.points_total = points_done
+        job.points_done = points_done
+
+    return points_done
+
+
+def ingest_fit_file(db: Session, activity: Activity, fit_path: Path, job: Optional[ActivityIngestJob] = None) -> int:
+    """在当前进程中解析 FIT 文件并写入数据库（用于脚本，不提交事务）
+
+    解析失败时抛出异常，由调用方回滚。返回写入的轨迹点数量。
+    """
+    return store_parsed_activity(db, activity, parse_fit_file(str(fit_path)), job)
+
+
+def get_ingest_status(db: Session, activity_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+    """查询 Activity 的解析状态，Activity 不存在时返回 None"""
+    a = db.query(Activity).filter_by(id=activity_id, user_id=user_id).first()
+    if not a:
+        return None
+
+    # 重复上传的记录不代表解析进度
+    job = (
+        db.query(ActivityIngestJob)
+        .filter(ActivityIngestJob.activity_id == a.id, ActivityIngestJob.status != "duplicate")
+        .order_by(ActivityIngestJob.id.desc())
+        .first()
+    )
+
+    result = {
+        "activity_id": a.id,
+        "status": a.status,
+        "job": None,
+    }
+    if job:
+        result["job"] = {
+            "id": job.id,
+            "batch_id": job.batch_id,
+            "status": job.status,
+            "attempts": job.attempts,
+            "points_total": job.points_total,
+            "points_done": job.points_done,
+            "error": job.error,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        }
+        if job.status == "queued":
+            # 排在该任务之前的任务数量
+            result["job"]["queue_position"] = (
+                db.query(ActivityIngestJob)
+                .filter(ActivityIngestJob.status == "queued", ActivityIngestJob.id < job.id)
+                .count()
+            )
+    return result
+
+
+def get_batch_status(db: Session, batch_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+    """汇总一次上传中所有文件的解析进度，批次不存在时返回 None"""
+    rows = (
+        db.query(ActivityIngestJob.status, func.count(ActivityIngestJob.id), func.sum(ActivityIngestJob.points_done))
+        .filter(ActivityIngestJob.batch_id == batch_id, ActivityIngestJob.user_id == user_id)
+        .group_by(ActivityIngestJob.status)
+        .all()
+    )
+    if not rows:
+        return None
+
+    counts = {status: count for status, count, _ in rows}
+    queued = counts.get("queued", 0)
+    running = counts.get("running", 0)
+    return {
+        "batch_id": batch_id,
+        "total": sum(counts.values()),
+        "queued": queued,
+        "running": running,
+        "parsed": counts.get("done", 0),
+        "failed": counts.get("failed", 0),
+        "deduplicated": counts.get("duplicate", 0),
+        "points": int(sum(points or 0 for _, _, points in rows)),
+        "finished": queued == 0 and running == 0,
+    }
+
+
+def _init_parse_process():
+    # 中断信号由主进程处理，解析进程忽略 Ctrl+C，避免每个子进程各打印一遍 KeyboardInterrupt
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class IngestWorkerPool:
+    """后台解析进程池
+
+    任务表 activity_ingest_jobs 即队列：调度线程每次领取最多 batch_size 个最早的 queued 任务，
+    用条件更新 (status == 'queued') 保证同一个任务只被领取一次。
+    领取的文件交给进程池并行解析（进程数默认为 CPU 核数），解析不访问数据库；
+    解析结果由调度线程写入数据库，每批任务只提交一次事务。
+    上传接口提交任务后调用 notify() 唤醒调度线程，另外按固定间隔轮询，
+    以便进程重启后继续处理遗留任务。
+
+    uvicorn / gunicorn 启动多个 Web 进程时每个进程都会调用 start()，但只有拿到
+    DISPATCHER_LOCK_FILE 文件锁的进程创建进程池并解析任务，其他进程定期尝试拿锁，
+    在持锁进程退出后接替它，因此全部 Web 进程合计只有 processes 个解析进程。
+    其他进程中上传的任务由持锁进程在下一次轮询时领取。
+    running 状态的任务只有开始时间超过 stale_seconds 时才重新排队，不会抢走仍在解析的任务。
+    解析进程崩溃（BrokenProcessPool）时关闭进程池，同一批的任务重新排队；重试的任务单独一批解析，
+    不连累其他文件。解析次数达到 max_attempts 的任务不再排队，标记为失败。
+    队列空闲时每隔 CURVE_REFRESH_SECONDS 重新计算有记录滑出窗口的最近 90 天曲线。
+    """
+
+    # 空闲时重新计算最近 90 天曲线的间隔（秒）
+    CURVE_REFRESH_SECONDS = 3600
+
+    def __init__(
+        self,
+        processes: int = settings.INGEST_PROCESSES,
+        batch_size: int = settings.INGEST_BATCH_SIZE,
+        poll_seconds: float = settings.INGEST_POLL_SECONDS,
+        stale_seconds: float = settings.INGEST_STALE_SECONDS,
+        max_attempts: int = settings.INGEST_MAX_ATTEMPTS,
+        lock_file: Path = DISPATCHER_LOCK_FILE,
+    ):
+        # processes 为 0 时使用 CPU 核数
+        self.processes = max(1, processes or os.cpu_count() or 1)
+        self.batch_size = max(1, batch_size)
+        self.poll_seconds = poll_seconds
+        self.stale_seconds = stale_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.lock_file = lock_file
+        self._lock_fd: Optional[int] = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._curves_refreshed_at: Optional[float] = None
+
+    def start(self):
+        """启动调度线程，拿到调度锁后开始解析任务"""
+        if self._thread:
+            return
+
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="fit-ingest", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """停止调度线程和解析进程，正在解析的一批任务会先完成"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._release_dispatcher_lock()
+
+    def notify(self):
+        """有新任务时唤醒调度线程"""
+        self._wakeup.set()
+
+    def run_pending(self) -> int:
+        """在当前线程中处理所有排队的任务，返回处理的任务数量（用于脚本和测试）"""
+        count = 0
+        while True:
+            processed = self._process_next_batch()
+            if not processed:
+                return count
+            count += processed
+
+    def _run(self):
+        while not self._stopping.is_set():
+            if not self._acquire_dispatcher_lock():
+                # 其他 Web 进程正在调度，等它退出后再接替
+                self._stopping.wait(self.poll_seconds)
+                continue
+
+            try:
+                processed = self._process_next_batch()
+                if not processed:
+                    self._requeue_stale_jobs()
+                    self._refresh_user_curves()
+            except Exception:
+                logger.error("FIT ingest worker error", exc_info=True)
+                processed = 0
+
+            if not processed:
+                self._wakeup.wait(self.poll_seconds)
+                self._wakeup.clear()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # 使用 spawn 启动解析进程，不继承 Web 进程中的线程和数据库连接
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_parse_process,
+            )
+        return self._executor
+
+    def _reset_executor(self):
+        """解析进程异常退出后进程池不能再提交任务，关闭它，下一批重新创建"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _acquire_dispatcher_lock(self) -> bool:
+        """尝试拿到调度锁，已持有时直接返回 True；锁在进程退出时由系统释放"""
+        if self._lock_fd is not None:
+            return True
+        if fcntl is None:
+            self._lock_fd = -1
+        else:
+            self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            self._lock_fd = fd
+
+        logger.info(f"FIT ingest dispatcher started: {self.processes} processes, batch size {self.batch_size}")
+        # 上一个调度进程退出时未完成的任务
+        self._requeue_stale_jobs()
+        return True
+
+    def _release_dispatcher_lock(self):
+        if self._lock_fd is not None and self._lock_fd >= 0:
+            os.close(self._lock_fd)
+        self._lock_fd = None
+
+    def _requeue_stale_jobs(self) -> int:
+        """把开始时间超过 stale_seconds 的 running 任务重新放回队列，返回数量
+
+        解析次数已达到 max_attempts 的任务标记为失败，不再排队。
+        """
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=self.stale_seconds)
+        db = SessionLocal()
+        try:
+            stale = (
+                db.query(ActivityIngestJob)
+                .filter(
+                    ActivityIngestJob.status == "running",
+                    or_(ActivityIngestJob.started_at < cutoff, ActivityIngestJob.started_at.is_(None)),
+                )
+                .all()
+            )
+            count = 0
+            for job in stale:
+                if (job.attempts or 0) >= self.max_attempts:
+                    activity = db.get(Activity, job.activity_id) if job.activity_id else None
+                    self._mark_failed(job, activity, "解析超时或解析进程退出次数过多")
+                else:
+                    job.status = "queued"
+                    count += 1
+            db.commit()
+        finally:
+            db.close()
+        if count:
+            logger.warning(f"FIT ingest requeued {count} stale running jobs")
+        if len(stale) > count:
+            logger.warning(f"FIT ingest failed {len(stale) - count} stale running jobs after {self.max_attempts} attempts")
+        return count
+
+    def _refresh_user_curves(self):
+        now = time.monotonic()
+        if self._curves_refreshed_at is not None and now - self._curves_refreshed_at < self.CURVE_REFRESH_SECONDS:
+            return
+        self._curves_refreshed_at = now
+
+        db = SessionLocal()
+        try:
+            count = refresh_rolling_user_curves(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        if count:
+            logger.info(f"Refreshed {count} rolling 90-day user curves")
+
+    def _claim_next_job(self, db: Session, first_attempt_only: bool = False) -> Optional[ActivityIngestJob]:
+        """领取最早的 queued 任务，first_attempt_only 时只领取未解析过的任务"""
+        while True:
+            query = db.query(ActivityIngestJob).filter(ActivityIngestJob.status == "queued")
+            if first_attempt_only:
+                query = query.filter(or_(ActivityIngestJob.attempts == 0, ActivityIngestJob.attempts.is_(None)))
+            job = query.order_by(ActivityIngestJob.id).first()
+            if job is None:
+                return None
+
+            claimed = (
+                db.query(ActivityIngestJob)
+                .filter(ActivityIngestJob.id == job.id, ActivityIngestJob.status == "queued")
+                .update(
+                    {
+                        "status": "running",
+                        "attempts": (job.attempts or 0) + 1,
+                        "started_at": datetime.utcnow(),
+                    },
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if claimed == 1:
+                db.refresh(job)
+                return job
+            # 被其他进程抢先领取，继续找下一个
+
+    @staticmethod
+    def _mark_done(job: ActivityIngestJob, activity: Activity):
+        activity.status = "completed"
+        job.status = "done"
+        job.finished_at = datetime.utcnow()
+
+    def _retry_or_fail(self, job: ActivityIngestJob, activity: Activity, error):
+        """解析进程崩溃的任务重新排队，次数达到 max_attempts 时标记为失败"""
+        if (job.attempts or 0) >= self.max_attempts:
+            self._mark_failed(job, activity, error)
+            return
+        activity.status = "pending"
+        job.status = "queued"
+        job.started_at = None
+
+    @staticmethod
+    def _mark_failed(job: ActivityIngestJob, activity: Optional[Activity], error):
+        # 解析失败不影响上传成功，但留空统计
+        if activity is not None:
+            activity.status = "failed"
+        job.status = "failed"
+        job.error = str(error)[:MAX_ERROR_LENGTH]
+        job.finished_at = datetime.utcnow()
+
+    def _process_next_batch(self) -> int:
+        """领取并处理一批任务，返回处理的任务数量"""
+        db = SessionLocal()
+        try:
+            jobs = []
+            while len(jobs) < self.batch_size:
+                job = self._claim_next_job(db, first_attempt_only=bool(jobs))
+                if job is None:
+                    break
+                jobs.append(job)
+                # 重试的任务单独一批，解析进程再次崩溃时不连累其他任务
+                if job.attempts > 1:
+                    break
+            if not jobs:
+                return 0
+
+            activities = {
+                a.id: a
+                for a in db.query(Activity).filter(Activity.id.in_([job.activity_id for job in jobs]))
+            }
+            pending = []
+            for job in jobs:
+                activity = activities.get(job.activity_id)
+                if activity is None:
+                    # Activity 已被删除
+                    self._mark_failed(job, None, "运动记录不存在")
+                else:
+                    activity.status = "processing"
+                    pending.append((job, activity))
+            db.commit()
+
+            # 并行解析，失败的任务先单独提交
+            executor = self._get_executor()
+            futures = {
+                executor.submit(parse_fit_file, str(DATA_DIR / job.file_path)): (job, activity)
+                for job, activity in pending
+            }
+            parsed = []
+            for future in as_completed(futures):
+                job, activity = futures[future]
+                try:
+                    parsed.append((job, activity, future.result()))
+                except BrokenProcessPool as e:
+                    # 解析进程异常退出，无法确定是哪个文件导致的，同一批未完成的任务都重新排队
+                    self._reset_executor()
+                    logger.warning(f"FIT ingest process died while parsing activity {job.activity_id}: {e}")
+                    self._retry_or_fail(job, activity, e)
+                except Exception as e:
+                    logger.warning(f"FIT ingest failed for activity {job.activity_id}: {e}")
+                    self._mark_failed(job, activity, e)
+            db.commit()
+
+            # 同一批的解析结果在一个事务中写入
+            try:
+                for job, activity, result in parsed:
+                    store_parsed_activity(db, activity, result, job)
+                    self._mark_done(job, activity)
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.warning("FIT ingest batch commit failed, storing activities one by one", exc_info=True)
+                self._store_one_by_one(db, parsed)
+
+            logger.info(f"FIT ingest batch: {len(jobs)} jobs, {len(parsed)} parsed, {len(jobs) - len(parsed)} failed or requeued")
+            return len(jobs)
+        finally:
+            db.close()
+
+    def _store_one_by_one(self, db: Session, parsed):
+        for job, activity, result in parsed:
+            try:
+                store_parsed_activity(db, activity, result, job)
+                self._mark_done(job, activity)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"FIT ingest failed for activity {job.activity_id}: {e}")
+                self._mark_failed(job, activity, e)
+                db.commit()
+
+
+# 应用内共享的后台解析进程池，在 app.main 的 startup / shutdown 事件中启动和停止
+ingest_worker_pool = IngestWorkerPool()
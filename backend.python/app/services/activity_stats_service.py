@@ -0,0 +1,98 @@
+"""运动记录列表的统计与分页
+
+统计（次数、距离、时长、爬升）用一条按运动类型分组的 SQL 聚合查询计算，覆盖用户筛选后的
+全部运动记录，而不是当前页。聚合只扫描用户自己的记录，每次请求重新计算，不做进程内缓存，
+多个 Web 进程、后台解析和补算脚本写入的数据都能立即反映到统计中。
+
+列表按 (created_at, id) 倒序做 keyset 分页，游标为上一页最后一条记录的 created_at 和 id，
+翻到很深的页也不需要 OFFSET 扫描前面的记录。旧的页码分页（page）仍然支持，按 OFFSET 实现。
+"""
+
+import base64
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+from app.models.activity import Activity
+
+
+def get_activity_stats(db: Session, user_id: int, activity_type: Optional[str] = None) -> Dict[str, Any]:
+    """按运动类型分组聚合用户的运动记录，返回总计和各类型的小计"""
+    q = db.query(
+        Activity.type,
+        func.count(Activity.id),
+        func.coalesce(func.sum(Activity.distance), 0),
+        func.coalesce(func.sum(Activity.duration), 0),
+        func.coalesce(func.sum(Activity.total_elevation), 0),
+    ).filter(Activity.user_id == user_id)
+    if activity_type:
+        q = q.filter(Activity.type == activity_type)
+
+    by_type = [
+        {
+            "type": t,
+            "total_activities": count,
+            "total_distance": int(distance),
+            "total_duration": int(duration),
+            "total_elevation": int(elevation),
+        }
+        for t, count, distance, duration, elevation in q.group_by(Activity.type).order_by(Activity.type)
+    ]
+    return {
+        "total_activities": sum(s["total_activities"] for s in by_type),
+        "total_distance": sum(s["total_distance"] for s in by_type),
+        "total_duration": sum(s["total_duration"] for s in by_type),
+        "total_elevation": sum(s["total_elevation"] for s in by_type),
+        "by_type": by_type,
+    }
+
+
+def encode_cursor(activity: Activity) -> str:
+    raw = f"{activity.created_at.isoformat()}|{activity.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """解析游标，格式不正确时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, activity_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(activity_id)
+    except Exception as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+
+
+def list_activities_page(
+    db: Session,
+    user_id: int,
+    activity_type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    page_size: int = 20,
+    page: Optional[int] = None,
+) -> Tuple[List[Activity], Optional[str]]:
+    """按 (created_at, id) 倒序返回一页运动记录和下一页的游标，没有下一页时游标为 None
+
+    page 为已弃用的页码分页，未指定 cursor 时按 OFFSET 跳过前面的页。
+    """
+    q = db.query(Activity).filter(Activity.user_id == user_id)
+    if activity_type:
+        q = q.filter(Activity.type == activity_type)
+    if cursor:
+        created_at, activity_id = decode_cursor(cursor)
+        q = q.filter(
+            or_(
+                Activity.created_at < created_at,
+                and_(Activity.created_at == created_at, Activity.id < activity_id),
+            )
+        )
+
+    q = q.order_by(Activity.created_at.desc(), Activity.id.desc())
+    if page is not None and not cursor:
+        q = q.offset((page - 1) * page_size)
+
+    # 多取一条判断是否还有下一页
+    items = q.limit(page_size + 1).all()
+    if len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    return items, encode_cursor(items[-1])
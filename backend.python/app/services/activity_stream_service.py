@@ -0,0 +1,226 @@
+"""轨迹点的按列存储
+
+activity_points 每个采样点一行，带自增主键和外键，是库中最大的表，读取时还要逐行构造 ORM 对象。
+这里把每个 Activity 的每个通道（time / latitude / longitude / speed / heart_rate /
+power / cadence / elevation）编码为一个 blob，存入 activity_streams 表：
+
+- 整数通道：差分 + zigzag varint，编码为 "varint"
+- time 通道转为 Unix 时间后同样编码为 "varint"，scale 为每秒的单位数：整秒时为 1，
+  有小数秒时为 1000（毫秒）或 1000000（微秒），解码后还原为不带时区的 UTC datetime
+- 小数通道（activity_points 中为 Float 的列）：按 10 的幂放大为整数后同样差分 varint，
+  编码为 "decimal"，scale 为放大倍数，只有放大后能无损还原时才使用；否则按 float64 原样保存，
+  编码为 "float64"。解码后与从 activity_points 读出的值类型一致
+- 有缺失值时在数据前加一个有效位图
+- 整个 blob 再用 zlib 压缩
+
+读取时直接解码为 array，再按有效位图还原出带 None 的列表。
+"""
+
+import zlib
+from array import array
+from calendar import timegm
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Sequence
+from sqlalchemy import Float, select
+from sqlalchemy.orm import Session
+from app.models.activity import ActivityPoint, ActivityStream
+
+# 按列存储的通道，与 activity_points 的列一致
+STREAM_CHANNELS = ("time", "latitude", "longitude", "speed", "heart_rate", "power", "cadence", "elevation")
+
+# 小数通道，与 activity_points 中 Float 类型的列一致
+_FLOAT_CHANNELS = frozenset(
+    column.name for column in ActivityPoint.__table__.columns if isinstance(column.type, Float)
+)
+
+# 小数通道尝试的放大倍数
+_DECIMAL_SCALES = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+# time 通道尝试的单位：秒 / 毫秒 / 微秒
+_TIME_SCALES = (1, 1000, 1000000)
+
+# blob 第一个字节：是否带有效位图
+_ALL_VALID = 0
+_HAS_VALIDITY = 1
+
+
+def _encode_varints(values) -> bytes:
+    """差分 + zigzag varint 编码整数序列"""
+    out = bytearray()
+    prev = 0
+    for v in values:
+        delta = v - prev
+        prev = v
+        z = delta << 1 if delta >= 0 else ((-delta) << 1) - 1
+        while z >= 0x80:
+            out.append((z & 0x7F) | 0x80)
+            z >>= 7
+        out.append(z)
+    return bytes(out)
+
+
+def _decode_varints(data: bytes, count: int) -> array:
+    values = array("q")
+    prev = 0
+    z = 0
+    shift = 0
+    for b in data:
+        z |= (b & 0x7F) << shift
+        if b & 0x80:
+            shift += 7
+            continue
+        prev += (z >> 1) if not z & 1 else -((z + 1) >> 1)
+        values.append(prev)
+        z = 0
+        shift = 0
+    if len(values) != count:
+        raise ValueError(f"stream has {len(values)} values, expected {count}")
+    return values
+
+
+def _find_decimal_scale(values) -> Optional[int]:
+    """返回能把所有小数无损放大为整数的最小倍数，不存在时返回 None"""
+    for scale in _DECIMAL_SCALES:
+        if all(round(v * scale) / scale == v for v in values):
+            return scale
+    return None
+
+
+def _find_time_scale(times) -> int:
+    """返回能无损保存所有时间的小数秒的最小单位（每秒的单位数）"""
+    for scale in _TIME_SCALES[:-1]:
+        step = 1000000 // scale
+        if all(t.microsecond % step == 0 for t in times):
+            return scale
+    return _TIME_SCALES[-1]
+
+
+def _decode_times(values, scale: int) -> List[datetime]:
+    if scale == 1:
+        return [datetime.fromtimestamp(v, timezone.utc).replace(tzinfo=None) for v in values]
+    step = 1000000 // scale
+    return [
+        datetime.fromtimestamp(v // scale, timezone.utc).replace(tzinfo=None, microsecond=v % scale * step)
+        for v in values
+    ]
+
+
+def encode_stream(channel: str, values: Sequence[Any]) -> Dict[str, Any]:
+    """把一个通道的值（可含 None）编码为 activity_streams 的列值字典（不含 activity_id）"""
+    present = [v for v in values if v is not None]
+    count = len(values)
+
+    if len(present) == count:
+        header = bytes([_ALL_VALID])
+    else:
+        bitmap = bytearray((count + 7) // 8)
+        for i, v in enumerate(values):
+            if v is not None:
+                bitmap[i >> 3] |= 1 << (i & 7)
+        header = bytes([_HAS_VALIDITY]) + bytes(bitmap)
+
+    scale = 1
+    if channel == "time":
+        encoding = "varint"
+        scale = _find_time_scale(present)
+        step = 1000000 // scale
+        payload = _encode_varints(timegm(t.utctimetuple()) * scale + t.microsecond // step for t in present)
+    elif channel not in _FLOAT_CHANNELS and all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        encoding = "varint"
+        payload = _encode_varints(present)
+    else:
+        present = [float(v) for v in present]
+        found = _find_decimal_scale(present)
+        if found is not None:
+            encoding = "decimal"
+            scale = found
+            payload = _encode_varints(round(v * scale) for v in present)
+        else:
+            encoding = "float64"
+            payload = array("d", present).tobytes()
+
+    return {
+        "channel": channel,
+        "encoding": encoding,
+        "scale": scale,
+        "count": count,
+        "data": zlib.compress(header + payload),
+    }
+
+
+def decode_stream_values(encoding: str, scale: int, count: int, data: bytes):
+    """解码一个通道，返回 (有效值 array, 有效位图或 None)"""
+    raw = zlib.decompress(data)
+    if raw[0] == _HAS_VALIDITY:
+        bitmap_len = (count + 7) // 8
+        validity = raw[1:1 + bitmap_len]
+        payload = raw[1 + bitmap_len:]
+        present = sum(bin(b).count("1") for b in validity)
+    else:
+        validity = None
+        payload = raw[1:]
+        present = count
+
+    if encoding == "float64":
+        values = array("d")
+        values.frombytes(payload)
+    else:
+        values = _decode_varints(payload, present)
+        if encoding == "decimal":
+            values = array("d", (v / scale for v in values))
+    return values, validity
+
+
+def decode_stream(channel: str, encoding: str, scale: int, count: int, data: bytes) -> List[Any]:
+    """解码一个通道为长度为 count 的列表，缺失值为 None，time 通道还原为不带时区的 UTC datetime"""
+    values, validity = decode_stream_values(encoding, scale, count, data)
+    result = values.tolist()
+    if channel == "time":
+        result = _decode_times(result, scale)
+
+    if validity is None:
+        return result
+
+    full = [None] * count
+    it = iter(result)
+    for i in range(count):
+        if validity[i >> 3] & (1 << (i & 7)):
+            full[i] = next(it)
+    return full
+
+
+def encode_point_streams(columns: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """把全部轨迹点（列名 -> 值列表）编码为每个通道一个 blob"""
+    return [encode_stream(channel, columns[channel]) for channel in STREAM_CHANNELS if channel in columns]
+
+
+def load_activity_columns(db: Session, activity_id: int, channels: Sequence[str] = STREAM_CHANNELS) -> Dict[str, List[Any]]:
+    """读取 Activity 的轨迹点，返回 列名 -> 值列表
+
+    优先读取 activity_streams；按行存储的旧数据从 activity_points 读取（Core 查询，不构造 ORM 对象）。
+    没有轨迹点时每列为空列表。
+    """
+    streams = (
+        db.query(ActivityStream)
+        .filter(ActivityStream.activity_id == activity_id, ActivityStream.channel.in_(channels))
+        .all()
+    )
+    if streams:
+        by_channel = {s.channel: s for s in streams}
+        count = streams[0].count
+        columns = {}
+        for channel in channels:
+            s = by_channel.get(channel)
+            if s is None:
+                columns[channel] = [None] * count
+            else:
+                columns[channel] = decode_stream(channel, s.encoding, s.scale, s.count, s.data)
+        return columns
+
+    table = ActivityPoint.__table__
+    rows = db.execute(
+        select(*(table.c[channel] for channel in channels))
+        .where(table.c.activity_id == activity_id)
+        .order_by(table.c.id)
+    ).all()
+    return {channel: [row[i] for row in rows] for i, channel in enumerate(channels)}
@@ -0,0 +1,143 @@
+"""FIT 文件解析后端
+
+FitParser 定义统一的解析接口，fitparse 和 garmin_fit_sdk 两个后端把 record / lap / session
+消息归一化为相同的字段和取值，入库、PoC 解析和对比脚本只依赖这个接口：
+
+- 时间统一为不带时区的 UTC datetime（garmin_fit_sdk 返回带时区的 datetime）
+- speed / altitude 缺失时取 enhanced_speed / enhanced_altitude（新设备只写 enhanced 字段）
+- 只保留 *_FIELDS 中列出的字段，开发者字段和其他字段忽略
+
+garmin_fit_sdk 会展开组件字段，并把 HR 消息中的心率合并到 record；fitparse 不合并，
+所以只在 HR 消息中记录心率的文件（如心率带插件）两者的 heart_rate 不同。
+
+后端由 settings.FIT_PARSER 选择，默认 fitparse；garmin_fit_sdk 需要显式配置，
+切换前用 app/scripts/bench_fit_parsers.py 对比两个后端的速度和解析结果。
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterator, Optional, Tuple, Union
+from app.core.config import settings
+try:
+    from fitparse import FitFile
+except Exception:
+    FitFile = None
+try:
+    from garmin_fit_sdk import Decoder, Stream, Profile
+except Exception:
+    Decoder = None
+    Stream = None
+    Profile = None
+
+# 各消息保留的字段
+RECORD_FIELDS = (
+    "timestamp", "position_lat", "position_long", "distance", "speed", "heart_rate", "power", "cadence", "altitude",
+    "enhanced_altitude",
+)
+LAP_FIELDS = (
+    "start_time", "total_elapsed_time", "total_distance", "avg_heart_rate", "avg_power", "avg_speed",
+)
+SESSION_FIELDS = (
+    "start_time", "total_elapsed_time", "total_distance", "total_calories", "avg_heart_rate", "avg_power",
+    "sport", "sub_sport",
+)
+MESSAGE_FIELDS = {"record": RECORD_FIELDS, "lap": LAP_FIELDS, "session": SESSION_FIELDS}
+
+# 字段缺失时依次尝试的替代字段
+FALLBACK_FIELDS = {
+    "speed": "enhanced_speed",
+    "altitude": "enhanced_altitude",
+    "avg_speed": "enhanced_avg_speed",
+}
+
+FitSource = Union[str, bytes]
+
+
+def _normalize_value(value):
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def normalize_message(name: str, values: Dict[str, Any]) -> Dict[str, Any]:
+    """按 MESSAGE_FIELDS 取出消息的字段，缺失的字段为 None"""
+    result = {}
+    for field in MESSAGE_FIELDS[name]:
+        value = values.get(field)
+        if value is None and field in FALLBACK_FIELDS:
+            value = values.get(FALLBACK_FIELDS[field])
+        result[field] = _normalize_value(value)
+    return result
+
+
+class FitParser(ABC):
+    """FIT 解析后端的接口
+
+    iter_messages 按文件中的顺序（合并心率时 record 可能排在最后）产生 (消息名, 归一化字段) 元组，
+    消息名为 record / lap / session，解析失败时抛出异常。source 为文件路径或文件内容。
+    """
+    name = ""
+
+    @classmethod
+    @abstractmethod
+    def available(cls) -> bool:
+        """解析库是否已安装"""
+
+    @abstractmethod
+    def iter_messages(self, source: FitSource) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """逐条产生 (消息名, 归一化字段)"""
+
+
+class FitparseParser(FitParser):
+    name = "fitparse"
+
+    @classmethod
+    def available(cls) -> bool:
+        return FitFile is not None
+
+    def iter_messages(self, source: FitSource) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        fit = FitFile(source)
+        for message in fit.get_messages(list(MESSAGE_FIELDS)):
+            yield message.name, normalize_message(message.name, message.get_values())
+
+
+class GarminSdkParser(FitParser):
+    name = "garmin_fit_sdk"
+
+    @classmethod
+    def available(cls) -> bool:
+        return Decoder is not None
+
+    def iter_messages(self, source: FitSource) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        names = {Profile["mesg_num"][name.upper()]: name for name in MESSAGE_FIELDS}
+        if isinstance(source, (bytes, bytearray)):
+            stream = Stream.from_byte_array(bytearray(source))
+        else:
+            stream = Stream.from_mmap(source)
+
+        with stream:
+            # 逐条解码并跳过不需要的消息，HR 消息用于合并心率
+            messages = Decoder(stream).iter_messages(include_mesgs=list(MESSAGE_FIELDS) + ["hr"], merge_heart_rates=True)
+            for mesg_num, message in messages:
+                name = names.get(mesg_num)
+                if name is not None:
+                    yield name, normalize_message(name, message)
+
+
+FIT_PARSERS = {parser.name: parser for parser in (FitparseParser, GarminSdkParser)}
+
+
+def available_fit_parsers():
+    """返回已安装的解析后端名称"""
+    return [name for name, parser in FIT_PARSERS.items() if parser.available()]
+
+
+def get_fit_parser(name: Optional[str] = None) -> FitParser:
+    """按名称返回解析后端，默认取 settings.FIT_PARSER"""
+    name = name or settings.FIT_PARSER
+    parser = FIT_PARSERS.get(name)
+    if parser is None:
+        raise ValueError(f"不支持的 FIT 解析后端: {name}")
+    if not parser.available():
+        raise RuntimeError(f"FIT 解析后端 {name} 未安装")
+    return parser()
@@ -0,0 +1,221 @@
+"""轨迹抽稀服务
+
+详情页地图只需要几千个点就能画出轨迹，图表也不需要 1Hz 的原始采样。
+入库时为每个 Activity 预先计算几个精度等级（TRACK_LEVELS），每个等级包含：
+- track: 按 Douglas–Peucker 在经纬度上抽稀后的轨迹点
+- chart: 按时间分桶取平均后的采样点，用于心率、功率等图表
+
+等级数据以 zlib 压缩的 JSON 保存在 activity_track_levels 表中，
+详情接口按 max_points / zoom 取对应等级，不需要读取全部轨迹点；
+max_points 不是预计算的等级时把上一级等级进一步抽稀到 max_points 个点。
+
+输入输出都是按列组织的字典：列名 -> 值列表，time 列为 datetime（输出为 ISO 字符串）。
+"""
+
+import heapq
+import json
+import zlib
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+# 预计算的精度等级（每个等级最多保留的点数）
+TRACK_LEVELS = (500, 2000, 5000)
+
+# 地图缩放级别 -> 精度等级，缩放级别越大显示越细
+ZOOM_LEVELS = ((10, 500), (14, 2000))
+
+# 不参与分桶平均的列
+_POSITION_COLUMNS = ("time", "latitude", "longitude")
+
+
+def level_for_request(max_points: Optional[int] = None, zoom: Optional[int] = None) -> Optional[int]:
+    """根据请求参数选择精度等级，都未指定时返回 None（返回原始轨迹点）
+
+    max_points 取不小于它的最小等级（再由 shrink_track_level 抽稀到 max_points 个点），
+    大于最大等级时取最大等级。
+    """
+    if max_points is not None:
+        for level in TRACK_LEVELS:
+            if level >= max_points:
+                return level
+        return TRACK_LEVELS[-1]
+
+    if zoom is not None:
+        for max_zoom, level in ZOOM_LEVELS:
+            if zoom <= max_zoom:
+                return level
+        return TRACK_LEVELS[-1]
+
+    return None
+
+
+def _farthest_point(xs: List[float], ys: List[float], start: int, end: int):
+    """返回 (start, end) 之间离线段 start-end 最远的点的距离平方和下标"""
+    x1, y1 = xs[start], ys[start]
+    dx, dy = xs[end] - x1, ys[end] - y1
+    seg_len2 = dx * dx + dy * dy
+
+    best_dist, best_index = -1.0, start + 1
+    for k in range(start + 1, end):
+        px, py = xs[k] - x1, ys[k] - y1
+        if seg_len2 > 0:
+            t = (px * dx + py * dy) / seg_len2
+            if t < 0:
+                t = 0.0
+            elif t > 1:
+                t = 1.0
+            px -= t * dx
+            py -= t * dy
+        dist = px * px + py * py
+        if dist > best_dist:
+            best_dist, best_index = dist, k
+    return best_dist, best_index
+
+
+def rank_track_points(xs: List[float], ys: List[float], limit: int) -> List[int]:
+    """按 Douglas–Peucker 的重要性对轨迹点排序，返回前 limit 个点的下标
+
+    每次在误差最大的线段上取离线段最远的点，排序结果的任意前 N 个点
+    就是保留 N 个点时的抽稀结果，一次计算即可得到所有精度等级。
+    """
+    n = len(xs)
+    if n <= 2:
+        return list(range(n))
+
+    order = [0, n - 1]
+    dist, k = _farthest_point(xs, ys, 0, n - 1)
+    heap = [(-dist, 0, n - 1, k)]
+
+    while heap and len(order) < limit:
+        _, start, end, k = heapq.heappop(heap)
+        order.append(k)
+        for a, b in ((start, k), (k, end)):
+            if b - a > 1:
+                dist, m = _farthest_point(xs, ys, a, b)
+                heapq.heappush(heap, (-dist, a, b, m))
+
+    return order
+
+
+def bucket_by_time(columns: Dict[str, list], max_points: int) -> Dict[str, list]:
+    """按时间把采样点分成 max_points 个桶，返回每个桶的采样点
+
+    桶内数值列取平均（整数列四舍五入），时间和经纬度取桶内第一个点。
+    没有时间戳时按顺序等分。点数不超过 max_points 时原样返回。
+    """
+    times = columns["time"]
+    n = len(times)
+    if n <= max_points:
+        return {name: list(values) for name, values in columns.items()}
+
+    first = next((t for t in times if t is not None), None)
+    last = next((t for t in reversed(times) if t is not None), None)
+    span = (last - first).total_seconds() if first is not None else 0
+
+    buckets: List[List[int]] = [[] for _ in range(max_points)]
+    current = 0
+    for i, t in enumerate(times):
+        if span > 0:
+            # 缺少时间戳的点归入上一个桶，早于第一个时间戳的点（时钟回拨）归入第一个桶
+            if t is not None:
+                current = min(max(int((t - first).total_seconds() * max_points / span), 0), max_points - 1)
+        else:
+            current = i * max_points // n
+        buckets[current].append(i)
+
+    result: Dict[str, list] = {name: [] for name in columns}
+    for indexes in buckets:
+        if not indexes:
+            continue
+        head = indexes[0]
+        for name, values in columns.items():
+            if name in _POSITION_COLUMNS:
+                result[name].append(values[head])
+                continue
+
+            vals = [values[i] for i in indexes if values[i] is not None]
+            if not vals:
+                result[name].append(None)
+            elif isinstance(vals[0], int):
+                result[name].append(int(round(sum(vals) / len(vals))))
+            else:
+                result[name].append(sum(vals) / len(vals))
+    return result
+
+
+def build_track_levels(columns: Dict[str, list], levels=TRACK_LEVELS) -> List[Dict[str, Any]]:
+    """为每个精度等级计算抽稀后的轨迹和图表采样点
+
+    columns 为全部轨迹点按列组织的字典，需包含 time / latitude / longitude 列。
+    返回 [{"max_points": 等级, "total_points": 原始点数, "track": 列字典, "chart": 列字典}]，
+    某个等级已包含全部点时不再计算更大的等级。
+    """
+    total = len(columns["time"])
+    # 只有带经纬度的点参与轨迹抽稀
+    located = [
+        i for i, (lat, lon) in enumerate(zip(columns["latitude"], columns["longitude"]))
+        if lat is not None and lon is not None
+    ]
+    xs = [columns["longitude"][i] for i in located]
+    ys = [columns["latitude"][i] for i in located]
+    order = rank_track_points(xs, ys, min(len(located), max(levels)))
+
+    result = []
+    for level in levels:
+        kept = sorted(located[j] for j in order[:level])
+        result.append({
+            "max_points": level,
+            "total_points": total,
+            "track": {name: [columns[name][i] for i in kept] for name in _POSITION_COLUMNS},
+            "chart": bucket_by_time(columns, level),
+        })
+        if level >= total:
+            break
+    return result
+
+
+def serialize_track_level(level: Dict[str, Any]) -> Dict[str, Any]:
+    """把一个精度等级中的时间转为 ISO 字符串，便于编码为 JSON"""
+    payload = dict(level)
+    for key in ("track", "chart"):
+        cols = dict(payload[key])
+        cols["time"] = [t.isoformat() if t else None for t in cols["time"]]
+        payload[key] = cols
+    return payload
+
+
+def encode_track_level(level: Dict[str, Any]) -> bytes:
+    """把一个精度等级编码为 zlib 压缩的 JSON"""
+    payload = serialize_track_level(level)
+    return zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_track_level(data: bytes) -> Dict[str, Any]:
+    """解码 encode_track_level 的结果，time 列保持 ISO 字符串"""
+    return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+def shrink_track_level(level: Dict[str, Any], max_points: int) -> Dict[str, Any]:
+    """把 decode_track_level 解码的等级（time 为 ISO 字符串）抽稀到最多 max_points 个点
+
+    track 按 Douglas–Peucker 重要性保留前 max_points 个点，chart 按时间重新分桶。
+    """
+    track = level["track"]
+    kept = sorted(rank_track_points(track["longitude"], track["latitude"], max_points))
+    chart = dict(level["chart"])
+    chart["time"] = [datetime.fromisoformat(t) if t else None for t in chart["time"]]
+    chart = bucket_by_time(chart, max_points)
+    chart["time"] = [t.isoformat() if t else None for t in chart["time"]]
+
+    return dict(
+        level,
+        max_points=max_points,
+        track={name: [values[i] for i in kept] for name, values in track.items()},
+        chart=chart,
+    )
+
+
+def columns_to_rows(columns: Dict[str, list]) -> List[Dict[str, Any]]:
+    """把列字典转换为逐点的字典列表"""
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*(columns[name] for name in names))]
@@ -0,0 +1,70 @@
+"""上传文件落盘服务
+
+按块把上传文件写入磁盘，同时计算 SHA-256，不把整个文件读入内存，
+超过大小限制时删除已写入的部分并返回 413。
+FIT 文件写入后用 garmin_fit_sdk 检查文件头、长度和 CRC，通过 mmap 读取已保存的文件。
+"""
+
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Any
+from fastapi import UploadFile
+from app.core.config import settings
+from app.core.exceptions import PayloadTooLargeException
+try:
+    from garmin_fit_sdk import Decoder, Stream
+except Exception:
+    Decoder = None
+    Stream = None
+
+logger = logging.getLogger(__name__)
+
+
+async def save_upload_file(upload: UploadFile, target: Path, max_bytes: int) -> Dict[str, Any]:
+    """把上传文件按块写入 target，返回 {"size": 字节数, "sha256": 十六进制摘要}
+
+    文件超过 max_bytes 时删除 target 并抛出 PayloadTooLargeException。
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    try:
+        with open(target, "wb") as out:
+            while True:
+                chunk = await upload.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise PayloadTooLargeException(
+                        f"{Path(upload.filename).name} 超过大小限制 {round(max_bytes / (1024 * 1024), 1):g}MB"
+                    )
+                sha256.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        target.unlink(missing_ok=True)
+        raise
+
+    return {"size": size, "sha256": sha256.hexdigest()}
+
+
+def check_fit_integrity(path: Path) -> bool:
+    """检查已保存的 FIT 文件是否完整（文件头、长度、CRC），未安装 garmin_fit_sdk 时跳过检查"""
+    if Decoder is None:
+        return True
+
+    try:
+        # 旧版本 SDK 没有 from_mmap，退回按文件读取
+        from_mmap = getattr(Stream, "from_mmap", None)
+        stream = from_mmap(str(path)) if from_mmap else Stream.from_file(str(path))
+    except (OSError, ValueError):
+        # 空文件无法 mmap
+        return False
+
+    try:
+        return Decoder(stream).check_integrity()
+    except Exception as e:
+        logger.warning(f"FIT integrity check failed for {path}: {e}")
+        return False
+    finally:
+        stream.close()
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 导入 app 之前指定测试数据库，不读写 data/data.db
+TEST_DIR = Path(tempfile.mkdtemp(prefix="backend-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DIR / 'test.db'}"
+
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.models import __all_models__  # noqa: E402,F401 注册所有表，外键才能建表
+from app.models.user import User  # noqa: E402
+from app.services import activity_ingest_service  # noqa: E402
+
+# SDK 自带的示例 FIT 文件
+FIT_DIR = Path(__file__).resolve().parents[2] / "FitSDKRelease_21.188.00" / "py" / "tests" / "fits"
+
+
+@pytest.fixture
+def db():
+    """每个测试使用新建的空表"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def user(db):
+    user = User(username="tester", password_hash="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """上传文件保存到临时目录"""
+    from app.api.v1 import upload
+
+    monkeypatch.setattr(activity_ingest_service, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(upload, "DATA_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def client(db, user, data_dir):
+    """以 user 身份调用接口的 TestClient，不启动后台解析线程"""
+    from fastapi.testclient import TestClient
+    from app.api.v1.auth import get_current_user
+    from app.main import app
+
+    app.dependency_overrides[get_current_user] = lambda: {"id": user.id, "username": user.username}
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    engine.dispose()
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
@@ -0,0 +1,50 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.activity_ingest_service import ActivityAggregator
+
+START = datetime(2025, 1, 1, 8, 0, 0)
+
+
+def _aggregate(elevations):
+    aggregator = ActivityAggregator()
+    for i, elevation in enumerate(elevations):
+        aggregator.add_point({
+            "time": START + timedelta(seconds=i),
+            "speed": 5.0,
+            "elevation": elevation,
+            "heart_rate": None,
+            "power": None,
+            "cadence": None,
+        })
+    return aggregator.result()
+
+
+def test_noisy_flat_profile_has_no_elevation_gain():
+    rng = random.Random(1)
+    elevations = [100 + rng.uniform(-1.5, 1.5) for _ in range(3600)]
+    # 单点跳变
+    elevations[1000] = 180.0
+
+    result = _aggregate(elevations)
+    assert result["elevation_gain"] < ActivityAggregator.ELEVATION_THRESHOLD
+    assert result["elevation_loss"] < ActivityAggregator.ELEVATION_THRESHOLD
+
+
+def test_noisy_climb_counts_net_gain():
+    rng = random.Random(2)
+    climb = [100 + i * 0.1 for i in range(1000)]
+    descent = [climb[-1] - i * 0.1 for i in range(1000)]
+    elevations = [e + rng.uniform(-1, 1) for e in climb + descent]
+
+    result = _aggregate(elevations)
+    assert result["elevation_gain"] == pytest.approx(100, abs=ActivityAggregator.ELEVATION_THRESHOLD + 2)
+    assert result["elevation_loss"] == pytest.approx(100, abs=ActivityAggregator.ELEVATION_THRESHOLD + 2)
+
+
+def test_missing_elevation():
+    result = _aggregate([None, None])
+    assert result["elevation_gain"] is None
+    assert result["elevation_loss"] is None
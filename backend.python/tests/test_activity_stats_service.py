@@ -0,0 +1,31 @@
+from app.models.activity import Activity
+from app.services.activity_stats_service import get_activity_stats
+
+
+def _add(db, user, activity_type, distance, duration):
+    db.add(Activity(user_id=user.id, name="a.fit", type=activity_type, distance=distance, duration=duration))
+    db.commit()
+
+
+def test_stats_grouped_by_type(db, user):
+    _add(db, user, "cycling", 1000, 60)
+    _add(db, user, "cycling", 2000, 120)
+    _add(db, user, "running", 500, 30)
+
+    stats = get_activity_stats(db, user.id)
+    assert stats["total_activities"] == 3
+    assert stats["total_distance"] == 3500
+    assert [(s["type"], s["total_activities"], s["total_duration"]) for s in stats["by_type"]] == [
+        ("cycling", 2, 180),
+        ("running", 1, 30),
+    ]
+    assert get_activity_stats(db, user.id, "running")["total_distance"] == 500
+
+
+def test_stats_reflect_new_activities(db, user):
+    _add(db, user, "cycling", 1000, 60)
+    assert get_activity_stats(db, user.id)["total_distance"] == 1000
+
+    # 其他进程写入的记录也要立即反映到统计中
+    _add(db, user, "cycling", 2000, 120)
+    assert get_activity_stats(db, user.id)["total_distance"] == 3000
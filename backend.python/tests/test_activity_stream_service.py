@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.activity_stream_service import decode_stream, encode_point_streams, encode_stream
+
+START = datetime(2025, 1, 1, 8, 0, 0)
+
+
+def _round_trip(channel, values):
+    stream = encode_stream(channel, values)
+    return stream, decode_stream(channel, stream["encoding"], stream["scale"], stream["count"], stream["data"])
+
+
+@pytest.mark.parametrize("channel, values, encoding", [
+    ("heart_rate", [120, 121, 119, 200, 0, 65535], "varint"),
+    ("power", [None, 250, None, None, 0, -5, 2 ** 40], "varint"),
+    ("latitude", [30.123456, 30.123457, None, 30.1], "decimal"),
+    ("speed", [0.0, 5.25, 12.5, 3.0], "decimal"),
+    ("elevation", [100.0, 1 / 3, 101.5], "float64"),
+    ("cadence", [None, None], "varint"),
+    ("speed", [], "decimal"),
+])
+def test_round_trip(channel, values, encoding):
+    stream, decoded = _round_trip(channel, values)
+    assert stream["encoding"] == encoding
+    assert stream["count"] == len(values)
+    assert decoded == values
+
+
+def test_float_channel_keeps_float_type():
+    # Float 列中的整数值解码后仍为 float，与 activity_points 读出的一致
+    _, decoded = _round_trip("elevation", [100, 101, None])
+    assert decoded == [100.0, 101.0, None]
+    assert all(isinstance(v, float) for v in decoded if v is not None)
+
+
+def test_time_round_trip_whole_seconds():
+    times = [START + timedelta(seconds=i) for i in range(10)] + [None, START - timedelta(days=20000)]
+    stream, decoded = _round_trip("time", times)
+    assert stream["scale"] == 1
+    assert decoded == times
+    assert all(t.tzinfo is None for t in decoded if t is not None)
+
+
+@pytest.mark.parametrize("step, scale", [
+    (timedelta(milliseconds=250), 1000),
+    (timedelta(microseconds=1), 1000000),
+])
+def test_time_round_trip_keeps_fraction(step, scale):
+    times = [START + step * i for i in range(10)]
+    stream, decoded = _round_trip("time", times)
+    assert stream["scale"] == scale
+    assert decoded == times
+
+
+def test_encode_point_streams_channels():
+    columns = {"time": [START, START + timedelta(seconds=1)], "heart_rate": [100, None], "unknown": [1, 2]}
+    streams = encode_point_streams(columns)
+    assert [s["channel"] for s in streams] == ["time", "heart_rate"]
@@ -0,0 +1,37 @@
+import pytest
+
+from app.core.config import settings
+from app.services.fit_parser_service import FitParser, FitparseParser, GarminSdkParser, get_fit_parser
+from tests.conftest import FIT_DIR
+
+
+def test_default_parser_is_fitparse():
+    assert settings.FIT_PARSER == "fitparse"
+    assert isinstance(get_fit_parser(), FitparseParser)
+
+
+def test_unknown_parser():
+    with pytest.raises(ValueError):
+        get_fit_parser("auto")
+
+
+def test_parser_interface_is_abstract():
+    with pytest.raises(TypeError):
+        FitParser()
+
+
+@pytest.mark.skipif(not GarminSdkParser.available(), reason="garmin_fit_sdk 未安装")
+@pytest.mark.parametrize("file_name", ["WithGearChangeData.fit", "ActivityDevFields.fit"])
+def test_parsers_match(file_name):
+    # 这些文件没有 HR 消息，两个后端的结果应完全相同
+    source = str(FIT_DIR / file_name)
+    expected = list(FitparseParser().iter_messages(source))
+    actual = list(GarminSdkParser().iter_messages(source))
+    assert [name for name, _ in actual] == [name for name, _ in expected]
+    for (_, values), (_, expected_values) in zip(actual, expected):
+        assert values.keys() == expected_values.keys()
+        for field, value in expected_values.items():
+            if isinstance(value, float):
+                assert values[field] == pytest.approx(value, rel=1e-6)
+            else:
+                assert values[field] == value, field
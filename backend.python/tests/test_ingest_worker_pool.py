@@ -0,0 +1,95 @@
+import os
+import shutil
+
+import pytest
+
+from app.models.activity import Activity, ActivityIngestJob
+from app.services import activity_ingest_service
+from app.services.activity_ingest_service import IngestWorkerPool, enqueue_ingest_job, parse_fit_file
+from tests.conftest import FIT_DIR
+
+# 解析进程读到该文件名时直接退出，模拟解析进程崩溃
+CRASH_FILE_NAME = "crash.fit"
+
+
+def parse_or_crash(fit_path, *args, **kwargs):
+    """在解析进程中执行，必须是模块级函数才能被 spawn 进程导入"""
+    if os.path.basename(fit_path) == CRASH_FILE_NAME:
+        os._exit(1)
+    return parse_fit_file(fit_path, *args, **kwargs)
+
+
+def _add_activity(db, user, data_dir, name, source=None, content=None):
+    path = data_dir / name
+    if source is not None:
+        shutil.copy(source, path)
+    else:
+        path.write_bytes(content or b"")
+    activity = Activity(user_id=user.id, name=name, type="cycling", status="pending")
+    db.add(activity)
+    db.flush()
+    enqueue_ingest_job(db, activity, name)
+    db.commit()
+    return activity
+
+
+def _statuses(db, activity):
+    db.expire_all()
+    job = db.query(ActivityIngestJob).filter(ActivityIngestJob.activity_id == activity.id).one()
+    return db.get(Activity, activity.id).status, job
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = IngestWorkerPool(processes=1, batch_size=4, max_attempts=2, lock_file=tmp_path / "dispatcher.lock")
+    yield pool
+    pool.stop()
+
+
+def test_pending_activity_completed(db, user, data_dir, pool):
+    activity = _add_activity(db, user, data_dir, "activity.fit", source=FIT_DIR / "WithGearChangeData.fit")
+
+    assert pool.run_pending() == 1
+
+    status, job = _statuses(db, activity)
+    assert status == "completed"
+    assert job.status == "done"
+    assert job.attempts == 1
+    assert job.points_done > 0
+    assert db.get(Activity, activity.id).distance > 0
+
+
+def test_invalid_file_failed(db, user, data_dir, pool):
+    activity = _add_activity(db, user, data_dir, "broken.fit", content=b"not a fit file")
+
+    assert pool.run_pending() == 1
+
+    status, job = _statuses(db, activity)
+    assert status == "failed"
+    assert job.status == "failed"
+    assert job.error
+    assert job.attempts == 1
+
+
+def test_broken_pool_requeues_then_fails(db, user, data_dir, pool, monkeypatch):
+    monkeypatch.setattr(activity_ingest_service, "parse_fit_file", parse_or_crash)
+    crash = _add_activity(db, user, data_dir, CRASH_FILE_NAME, content=b"crash")
+    good = _add_activity(db, user, data_dir, "activity.fit", source=FIT_DIR / "WithGearChangeData.fit")
+
+    pool.run_pending()
+
+    status, job = _statuses(db, crash)
+    assert status == "failed"
+    assert job.status == "failed"
+    assert job.attempts == pool.max_attempts
+
+    # 同一批的正常文件重新排队后解析成功
+    status, job = _statuses(db, good)
+    assert status == "completed"
+    assert job.status == "done"
+
+    # 崩溃后重新创建了进程池，仍能继续解析
+    assert pool._executor is not None
+    later = _add_activity(db, user, data_dir, "later.fit", source=FIT_DIR / "WithGearChangeData.fit")
+    assert pool.run_pending() == 1
+    assert _statuses(db, later)[0] == "completed"
@@ -0,0 +1,68 @@
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.track_simplify_service import (
+    TRACK_LEVELS,
+    bucket_by_time,
+    build_track_levels,
+    decode_track_level,
+    encode_track_level,
+    level_for_request,
+    shrink_track_level,
+)
+
+START = datetime(2025, 1, 1, 8, 0, 0)
+
+
+def _columns(n):
+    return {
+        "time": [START + timedelta(seconds=i) for i in range(n)],
+        "latitude": [30 + math.sin(i / 50) * 0.01 for i in range(n)],
+        "longitude": [120 + i * 0.0001 for i in range(n)],
+        "heart_rate": [100 + i % 50 for i in range(n)],
+    }
+
+
+@pytest.mark.parametrize("max_points, expected", [
+    (100, 500),
+    (500, 500),
+    (501, 2000),
+    (1000, 2000),
+    (5000, 5000),
+    (20000, 5000),
+])
+def test_level_for_max_points(max_points, expected):
+    assert level_for_request(max_points=max_points) == expected
+
+
+def test_level_for_zoom():
+    assert level_for_request(zoom=8) == 500
+    assert level_for_request(zoom=12) == 2000
+    assert level_for_request(zoom=18) == TRACK_LEVELS[-1]
+    assert level_for_request() is None
+
+
+def test_shrink_level_to_max_points():
+    levels = build_track_levels(_columns(3000))
+    level = decode_track_level(encode_track_level(levels[1]))
+    assert level["max_points"] == level_for_request(max_points=1000)
+
+    shrunk = shrink_track_level(level, 1000)
+    assert shrunk["max_points"] == 1000
+    assert len(shrunk["track"]["time"]) == 1000
+    assert 0 < len(shrunk["chart"]["time"]) <= 1000
+
+
+def test_bucket_by_time_clamps_earlier_timestamps():
+    columns = _columns(100)
+    # 时钟回拨：后面的点时间早于第一个点
+    columns["time"][50] = START - timedelta(seconds=30)
+
+    result = bucket_by_time(columns, 10)
+    assert len(result["time"]) == 10
+    assert result["time"][0] == START
+    # 回拨的点并入第一个桶参与平均
+    first_bucket = [v for i, v in enumerate(columns["heart_rate"]) if i < 10 or i == 50]
+    assert result["heart_rate"][0] == int(round(sum(first_bucket) / len(first_bucket)))
@@ -0,0 +1,83 @@
+import pytest
+
+from app.models.activity import Activity, ActivityIngestJob
+from app.services.activity_ingest_service import IngestWorkerPool
+from app.services.upload_storage_service import Decoder
+from tests.conftest import FIT_DIR
+
+UPLOAD_URL = "/api/v1/upload"
+
+
+def _fit_file(name, file_name="WithGearChangeData.fit"):
+    return ("files", (name, (FIT_DIR / file_name).read_bytes(), "application/octet-stream"))
+
+
+def test_duplicates_in_one_request(client, db):
+    result = client.post(UPLOAD_URL, files=[_fit_file("ride.fit"), _fit_file("ride_copy.fit")]).json()
+
+    assert result["uploaded_count"] == 1
+    assert result["duplicate_count"] == 1
+    first, second = result["activities"]
+    assert first["duplicate"] is False
+    assert second["duplicate"] is True
+    assert second["id"] == first["id"]
+    assert db.query(Activity).count() == 1
+    # 重复文件只记录任务，不排队解析
+    jobs = db.query(ActivityIngestJob).order_by(ActivityIngestJob.id).all()
+    assert [job.status for job in jobs] == ["queued", "duplicate"]
+    assert {job.batch_id for job in jobs} == {result["batch_id"]}
+
+
+def test_duplicates_across_requests(client, db, data_dir):
+    first = client.post(UPLOAD_URL, files=[_fit_file("ride.fit")]).json()
+    second = client.post(UPLOAD_URL, files=[_fit_file("ride.fit"), _fit_file("other.fit", "ActivityDevFields.fit")]).json()
+
+    assert first["uploaded_count"] == 1
+    assert second["uploaded_count"] == 1
+    assert second["duplicate_count"] == 1
+    duplicate, other = second["activities"]
+    assert duplicate == dict(first["activities"][0], duplicate=True, job_id=duplicate["job_id"])
+    assert other["duplicate"] is False
+    assert db.query(Activity).count() == 2
+    # 重复文件不保存
+    assert len(list(data_dir.rglob("*.fit"))) == 2
+
+
+@pytest.mark.skipif(Decoder is None, reason="garmin_fit_sdk 未安装，不检查文件完整性")
+def test_corrupt_file_rejected(client, db):
+    content = (FIT_DIR / "WithGearChangeData.fit").read_bytes()
+    files = [("files", ("broken.fit", content[:-10], "application/octet-stream")), _fit_file("ride.fit")]
+    result = client.post(UPLOAD_URL, files=files).json()
+
+    assert result["success"] is True
+    assert result["uploaded_count"] == 1
+    assert result["rejected"] == [{"file_name": "broken.fit", "error": "FIT 文件不完整或已损坏"}]
+    assert [a["name"].rsplit("/", 1)[-1] for a in result["activities"]] == ["ride.fit"]
+    assert db.query(Activity).count() == 1
+
+
+def test_failed_activity_requeued_on_reupload(client, db, tmp_path):
+    first = client.post(UPLOAD_URL, files=[_fit_file("ride.fit")]).json()
+    activity_id = first["activities"][0]["id"]
+    # 模拟解析失败
+    db.get(Activity, activity_id).status = "failed"
+    db.query(ActivityIngestJob).update({"status": "failed"})
+    db.commit()
+
+    second = client.post(UPLOAD_URL, files=[_fit_file("ride.fit")]).json()
+
+    assert second["uploaded_count"] == 1
+    assert second["duplicate_count"] == 0
+    entry = second["activities"][0]
+    assert entry["id"] == activity_id
+    assert entry["status"] == "pending"
+    assert entry["duplicate"] is False
+
+    pool = IngestWorkerPool(processes=1, lock_file=tmp_path / "dispatcher.lock")
+    try:
+        pool.run_pending()
+    finally:
+        pool.stop()
+    db.expire_all()
+    assert db.get(Activity, activity_id).status == "completed"
+    assert db.query(ActivityIngestJob).filter(ActivityIngestJob.status == "done").count() == 1
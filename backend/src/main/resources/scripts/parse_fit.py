@@ -2,76 +2,103 @@
 """
 FIT文件解析脚本
 使用fitparse库解析Garmin .fit文件，输出JSON格式的运动数据
+
+本脚本作为 JVM 后端的资源文件单独分发和调用，不能导入 backend.python 中的
+app.services.fit_parser_service，因此不走 FitParser 接口，固定使用 fitparse；
+JVM 端也是按 fitparse 的输出（未合并 HR 消息中的心率、altitude 不回退到 enhanced_altitude）解析结果的。
+
+用法:
+    parse_fit.py <fit_file_path>
+        解析单个文件，输出一行JSON后退出
+    parse_fit.py --worker [--workers N]
+        常驻模式：从stdin逐行读取请求，向stdout逐行写出结果(NDJSON)
+    parse_fit.py --socket <path> [--workers N]
+        常驻模式：在本地Unix socket上提供同样的NDJSON协议
+
+常驻模式的请求格式: {"id": "任意标识", "path": "/path/to/file.fit"}
+结果格式: {"id": "同请求", "success": true, ...} 或 {"id": ..., "success": false, "error": "..."}
+多个文件由进程池并发解析，结果按完成顺序返回，调用方通过id对应请求。
 """
-import sys
+import argparse
 import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from fitparse import FitFile
 
-def parse_fit_file(file_path):
-    """解析FIT文件并返回运动数据"""
-    try:
-        fitfile = FitFile(file_path)
-
-        records = []
-        laps = []
-
-        # 解析记录点
-        for record in fitfile.get_messages('record'):
-            record_data = {
-                'timestamp': record.get_value('timestamp'),
-                'position_lat': record.get_value('position_lat'),
-                'position_long': record.get_value('position_long'),
-                'altitude': record.get_value('altitude'),
-                'speed': record.get_value('speed'),
-                'heart_rate': record.get_value('heart_rate'),
-                'power': record.get_value('power'),
-                'cadence': record.get_value('cadence'),
-                'distance': record.get_value('distance')
-            }
-
-            # 只保留有效数据
-            if record_data['timestamp'] is not None or record_data['position_lat'] is not None:
-                # 转换datetime为ISO格式字符串
-                if record_data['timestamp']:
-                    record_data['timestamp'] = record_data['timestamp'].isoformat()
-                records.append(record_data)
-
-        # 解析分段
-        for lap in fitfile.get_messages('lap'):
-            lap_data = {
-                'start_time': lap.get_value('start_time'),
-                'total_elapsed_time': lap.get_value('total_elapsed_time'),
-                'total_distance': lap.get_value('total_distance'),
-                'avg_heart_rate': lap.get_value('avg_heart_rate'),
-                'avg_power': lap.get_value('avg_power'),
-                'avg_speed': lap.get_value('avg_speed')
-            }
-
-            if lap_data['start_time']:
-                lap_data['start_time'] = lap_data['start_time'].isoformat()
-            laps.append(lap_data)
-
-        # 解析会话信息（获取运动类型、总距离等）
-        sessions = list(fitfile.get_messages('session'))
-        session_data = {}
-        if sessions:
-            session = sessions[0]
-            session_data = {
-                'sport': session.get_value('sport'),
-                'total_distance': session.get_value('total_distance'),
-                'total_timer_time': session.get_value('total_timer_time'),
-                'total_calories': session.get_value('total_calories')
-            }
+def parse_fit(file_path):
+    """解析FIT文件并返回运动数据字典，解析失败时抛出异常"""
+    fitfile = FitFile(file_path)
 
-        result = {
-            'success': True,
-            'records': records,
-            'laps': laps,
-            'session': session_data
+    records = []
+    laps = []
+
+    # 解析记录点
+    for record in fitfile.get_messages('record'):
+        record_data = {
+            'timestamp': record.get_value('timestamp'),
+            'position_lat': record.get_value('position_lat'),
+            'position_long': record.get_value('position_long'),
+            'altitude': record.get_value('altitude'),
+            'speed': record.get_value('speed'),
+            'heart_rate': record.get_value('heart_rate'),
+            'power': record.get_value('power'),
+            'cadence': record.get_value('cadence'),
+            'distance': record.get_value('distance')
+        }
+
+        # 只保留有效数据
+        if record_data['timestamp'] is not None or record_data['position_lat'] is not None:
+            # 转换datetime为ISO格式字符串
+            if record_data['timestamp']:
+                record_data['timestamp'] = record_data['timestamp'].isoformat()
+            records.append(record_data)
+
+    # 解析分段
+    for lap in fitfile.get_messages('lap'):
+        lap_data = {
+            'start_time': lap.get_value('start_time'),
+            'total_elapsed_time': lap.get_value('total_elapsed_time'),
+            'total_distance': lap.get_value('total_distance'),
+            'avg_heart_rate': lap.get_value('avg_heart_rate'),
+            'avg_power': lap.get_value('avg_power'),
+            'avg_speed': lap.get_value('avg_speed')
         }
 
-        print(json.dumps(result, default=str))
+        if lap_data['start_time']:
+            lap_data['start_time'] = lap_data['start_time'].isoformat()
+        laps.append(lap_data)
+
+    # 解析会话信息（获取运动类型、总距离等）
+    sessions = list(fitfile.get_messages('session'))
+    session_data = {}
+    if sessions:
+        session = sessions[0]
+        session_data = {
+            'sport': session.get_value('sport'),
+            'total_distance': session.get_value('total_distance'),
+            'total_timer_time': session.get_value('total_timer_time'),
+            'total_calories': session.get_value('total_calories')
+        }
+
+    result = {
+        'success': True,
+        'records': records,
+        'laps': laps,
+        'session': session_data
+    }
+
+    return result
+
+
+def parse_fit_file(file_path):
+    """解析FIT文件并输出JSON格式的结果"""
+    try:
+        print(json.dumps(parse_fit(file_path), default=str))
         return 0
 
     except Exception as e:
@@ -82,10 +109,148 @@ def parse_fit_file(file_path):
         print(json.dumps(error_result))
         return 1
 
-if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print(json.dumps({'success': False, 'error': 'Usage: parse_fit.py <fit_file_path>'}))
-        sys.exit(1)
 
-    fit_file_path = sys.argv[1]
-    sys.exit(parse_fit_file(fit_file_path))
+def handle_request(line):
+    """在工作进程中处理一行请求，返回一行JSON结果（序列化也在工作进程中完成）"""
+    request_id = None
+    try:
+        request = json.loads(line)
+        request_id = request.get('id')
+        result = parse_fit(request['path'])
+    except Exception as e:
+        result = {
+            'success': False,
+            'error': str(e)
+        }
+
+    return json.dumps({'id': request_id, **result}, default=str)
+
+
+def init_worker():
+    """工作进程忽略Ctrl+C，由主进程负责关闭进程池"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class ParseWorkerPool:
+    """常驻的解析进程池，工作进程只启动一次，fitparse保持已导入状态"""
+
+    def __init__(self, workers):
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+
+    def submit(self, line, write_line):
+        """提交一行请求，解析完成后通过write_line回写结果"""
+        future = self.executor.submit(handle_request, line)
+        future.add_done_callback(lambda f: write_line(self._result_line(line, f)))
+        return future
+
+    @staticmethod
+    def _result_line(line, future):
+        try:
+            return future.result()
+        except Exception as e:
+            # 工作进程异常退出等情况
+            try:
+                request_id = json.loads(line).get('id')
+            except Exception:
+                request_id = None
+            return json.dumps({'id': request_id, 'success': False, 'error': str(e)})
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+def serve_stdin(workers):
+    """从stdin逐行读取请求，结果逐行写到stdout，stdin关闭后等待所有任务完成再退出"""
+    lock = threading.Lock()
+
+    def write_line(result_line):
+        with lock:
+            sys.stdout.write(result_line + '\n')
+            sys.stdout.flush()
+
+    pool = ParseWorkerPool(workers)
+    try:
+        for line in sys.stdin:
+            if line.strip():
+                pool.submit(line, write_line)
+    finally:
+        pool.shutdown()
+    return 0
+
+
+def serve_socket(socket_path, workers):
+    """在Unix socket上提供NDJSON协议，每个连接可以连续发送多个请求"""
+    pool = ParseWorkerPool(workers)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            condition = threading.Condition()
+            pending = [0]
+
+            def write_line(result_line):
+                with condition:
+                    try:
+                        self.wfile.write((result_line + '\n').encode('utf-8'))
+                        self.wfile.flush()
+                    except OSError:
+                        # 客户端已断开
+                        pass
+                    pending[0] -= 1
+                    condition.notify_all()
+
+            for raw_line in self.rfile:
+                line = raw_line.decode('utf-8')
+                if line.strip():
+                    with condition:
+                        pending[0] += 1
+                    pool.submit(line, write_line)
+
+            # 连接的读端关闭后，等待该连接的结果全部写回
+            with condition:
+                condition.wait_for(lambda: pending[0] == 0)
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+    server.daemon_threads = True
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.shutdown()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+    return 0
+
+
+def main(argv):
+    if len(argv) == 1 and not argv[0].startswith('--'):
+        return parse_fit_file(argv[0])
+
+    parser = argparse.ArgumentParser(description='FIT文件解析')
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--worker', action='store_true', help='从stdin读取NDJSON请求，向stdout写出结果')
+    mode.add_argument('--socket', metavar='PATH', help='在指定的Unix socket上提供服务')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='解析进程数，默认为CPU核数')
+
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit:
+        print(json.dumps({'success': False, 'error': 'Usage: parse_fit.py <fit_file_path> | --worker | --socket <path> [--workers N]'}))
+        return 1
+
+    if args.workers < 1:
+        print(json.dumps({'success': False, 'error': '--workers must be at least 1'}))
+        return 1
+
+    if args.socket:
+        return serve_socket(args.socket, args.workers)
+
+    return serve_stdin(args.workers)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))